@@ -11,18 +11,25 @@ class Settings(BaseSettings):
     SHOPKEEPERS_SAVE: str = "/minecraft/shopkeepers/data/save.yml"
     SHOPKEEPERS_DB: str
     PLAYTIME_DB: str
+    TRADE_INDEX_DB: str = "/app/data/trade_index.db" # Sidecar index over the read-only trade log
     STOCK_FILE_PATH: str = "/minecraft/automation/shop_stock.json" 
-    COMMAND_QUEUE_PATH: str = "/minecraft/automation/command_queue.json" # Already pointing here
+    COMMAND_JOURNAL_DIR: str = "/minecraft/automation/command_journal" # NDJSON command segments + consumer ack file
+    COMMAND_QUEUE_PATH: str = "/minecraft/automation/command_queue.json" # Legacy JSON queue; drained into the journal on startup
     MINECRAFT_STATS_DIR: str = "/minecraft/mcstats"
+    STATS_SNAPSHOT_DIR: str = "/app/data/stats_snapshots" # Compressed ranking history for gains/movers
+    STATS_SNAPSHOT_INTERVAL_HOURS: int = 6
+    STATS_SNAPSHOT_RETENTION_DAYS: int = 90
     
     # Ko-fi Webhook
     KOFI_VERIFICATION_TOKEN: str
+    KOFI_WEBHOOK_RETENTION_DAYS: int = 30 # Processed webhook payloads (donor names/emails) are deleted after this
     
     
     
     # Minecraft Server (for status queries)
     MC_SERVER_HOST: str = "localhost"
     MC_SERVER_PORT: int = 25565
+    STATUS_HISTORY_DIR: str = "/app/data/status_history" # Downsampled player-count/uptime segments
     
     # Database
     DATABASE_URL: str
@@ -36,9 +43,12 @@ class Settings(BaseSettings):
     BANNED_PLAYERS_JSON: str = "/minecraft/banned-players.json"     
     BANNED_IPS_JSON: str = "/minecraft/banned-ips.json"             
     USERCACHE_JSON: str = "/minecraft/usercache.json"
+    TRUST_PROXY_HEADERS: bool = False # Behind the host's reverse proxy: take the client IP from X-Real-IP / X-Forwarded-For
+    TRUSTED_PROXIES: str = "127.0.0.1,::1" # Comma-separated IPs/CIDRs whose proxy headers are honoured (only with TRUST_PROXY_HEADERS)
     
     # Security
     SECRET_KEY: str
+    METRICS_TOKEN: str = "" # Bearer token for scraping /metrics; empty = admin sessions only
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080
     
@@ -1,8 +1,8 @@
 """
 Database configuration with multiple database support.
-Handles: Website DB, Shopkeepers DB, Playtime DB
+Handles: Website DB, Shopkeepers DB, Playtime DB, Trade index sidecar DB
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from contextlib import contextmanager
@@ -13,33 +13,63 @@ settings = get_settings()
 # ============================================
 # Website Database (SQLite - Read/Write)
 # ============================================
+# WAL lets readers run on their own pooled connections while the single
+# writer (see services/website_writer.py) commits; an in-memory DB has to
+# stay on one shared connection.
+_website_in_memory = settings.DATABASE_URL.startswith("sqlite") and ":memory:" in settings.DATABASE_URL
 website_engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=StaticPool if _website_in_memory else None,
     echo=settings.ENVIRONMENT == "development"
 )
 
+@event.listens_for(website_engine, "connect")
+def _enable_website_wal(dbapi_connection, connection_record):
+    if not _website_in_memory and settings.DATABASE_URL.startswith("sqlite"):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+        dbapi_connection.execute("PRAGMA busy_timeout=5000")
+
 WebsiteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=website_engine)
 
 # ============================================
 # Shopkeepers Database (SQLite - Read Only)
 # ============================================
+# Read-only DBs use the default pool (one connection per concurrent user)
+# so lookups can run in parallel worker threads.
 shopkeepers_engine = create_engine(
     f"sqlite:///{settings.SHOPKEEPERS_DB}",
-    connect_args={"check_same_thread": False, "uri": True},
-    poolclass=StaticPool
+    connect_args={"check_same_thread": False, "uri": True}
 )
 
 ShopkeepersSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=shopkeepers_engine)
 
+# ============================================
+# Trade Index Database (SQLite - Read/Write sidecar)
+# ============================================
+# The Shopkeepers DB is read-only, so indexes we derive from it live here.
+# It is ATTACHed to the Shopkeepers connection as "trade_index" so queries
+# can join against it.
+trade_index_engine = create_engine(
+    f"sqlite:///{settings.TRADE_INDEX_DB}",
+    connect_args={"check_same_thread": False}
+)
+
+@event.listens_for(trade_index_engine, "connect")
+def _enable_trade_index_wal(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+@event.listens_for(shopkeepers_engine, "connect")
+def _attach_trade_index(dbapi_connection, connection_record):
+    dbapi_connection.execute("ATTACH DATABASE ? AS trade_index", (settings.TRADE_INDEX_DB,))
+
 # ============================================
 # Playtime Database (SQLite - Read Only)
 # ============================================
 playtime_engine = create_engine(
     f"sqlite:///{settings.PLAYTIME_DB}",
-    connect_args={"check_same_thread": False, "uri": True},
-    poolclass=StaticPool
+    connect_args={"check_same_thread": False, "uri": True}
 )
 
 PlaytimeSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=playtime_engine)
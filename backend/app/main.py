@@ -1,11 +1,27 @@
 """FastAPI application entry point"""
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .database import init_website_db
 from .config import get_settings
-from .routers import shops, trades, players, server, auth, stats, webhooks
+from .routers import shops, trades, players, server, auth, stats, webhooks, events
 from .services.item_mapping import load_item_map_cache 
+from .services.trade_index import trade_index
+from .services.stats import player_stats_index
+from .services.stats_awards import awards_engine
+from .services.stats_history import snapshot_store
+from .services.trade_rollups import trade_rollups
+from .services.file_watcher import file_watcher
+from .services.server_status import server_status_poller
+from .services.events import event_broker
+from .services.http_client import http_client
+from .services.sessions import session_store, get_admin_user
+from .services.website_writer import website_writer
+from .services.kofi_outbox import kofi_outbox
+from .services.command_journal import command_journal, migrate_legacy_queue
+from .services.webhook_queue import kofi_webhooks
+import asyncio
+import hmac
 
 settings = get_settings()
 
@@ -15,12 +31,62 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Peaceful Haven API...")
     init_website_db()
     
+    # All website-DB writes go through one writer task; sessions are served from memory
+    asyncio.create_task(website_writer.run())
+    await asyncio.to_thread(session_store.load)
+    sessions_task = asyncio.create_task(session_store.run())
+    # Commands still sitting in the pre-journal JSON queue are moved into the journal first
+    try:
+        await asyncio.to_thread(migrate_legacy_queue, command_journal)
+    except Exception as e:
+        print(f"ERROR migrating the legacy command queue: {e}")
+    # Ko-fi orders recorded by the webhook are drained into the plugin's command journal
+    outbox_task = asyncio.create_task(kofi_outbox.run())
+    # Ko-fi webhooks are persisted and acknowledged by the endpoint, then processed by these workers
+    await kofi_webhooks.start()
+    
+    # Pooled outbound HTTP client shared by the login chain and the item data fetch
+    await http_client.start()
+    
     # Load item map during startup
     await load_item_map_cache() 
     
+    # Catch the trade time index up in the background (first run parses the whole log)
+    index_task = asyncio.create_task(trade_index.run())
+    # Keep the trade leaderboards caught up in the background; the name resolver falls back to names seen in the trade log
+    rollups_task = asyncio.create_task(trade_rollups.run())
+    
+    # Reload bans, usercache, stock, shop owners and rankings when the server rewrites them
+    await file_watcher.start()
+    
+    # Compute the stats Hall of Fame now; the file watcher triggers recomputes on ranking changes
+    awards_task = asyncio.create_task(awards_engine.run())
+    # Player -> stat standings index for /stats/player cards, built off the event loop
+    stats_index_task = asyncio.create_task(player_stats_index.run())
+    # Periodic compressed snapshots of every ranking, for gains/movers views
+    snapshot_task = asyncio.create_task(snapshot_store.run())
+    
+    # Poll the Minecraft server in the background; /server/status serves the latest snapshot
+    status_task = asyncio.create_task(server_status_poller.run())
+    # Push channel: one producer per source fans changes out to /events subscribers
+    events_task = asyncio.create_task(event_broker.run())
+    
     print("✓ All systems ready!")
     yield
     print("👋 Shutting down...")
+    awards_task.cancel()
+    stats_index_task.cancel()
+    rollups_task.cancel()
+    index_task.cancel()
+    snapshot_task.cancel()
+    status_task.cancel()
+    events_task.cancel()
+    sessions_task.cancel()
+    outbox_task.cancel()
+    await kofi_webhooks.stop()
+    await file_watcher.stop()
+    await http_client.close()
+    await website_writer.stop()  # Writes out buffered session activity
 
 app = FastAPI(
     title="Peaceful Haven API",
@@ -45,6 +111,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],  # Leaderboard pagination
 )
 
 # Root endpoints
@@ -59,7 +126,8 @@ async def root():
             "shops": "/shops",
             "trades": "/trades",
             "players": "/players",
-            "server": "/server"
+            "server": "/server",
+            "events": "/events"
         }
     }
 
@@ -67,6 +135,20 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+async def require_metrics_access(request: Request):
+    """Dependency: `Authorization: Bearer <METRICS_TOKEN>` (for scrapers) or an admin session."""
+    authorization = request.headers.get("authorization", "")
+    if settings.METRICS_TOKEN and authorization.startswith("Bearer "):
+        if hmac.compare_digest(authorization[len("Bearer "):].encode(), settings.METRICS_TOKEN.encode()):
+            return
+        raise HTTPException(status_code=401, detail="Invalid metrics token.")
+    await get_admin_user(request)
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """Outbound HTTP stats per upstream, and Ko-fi webhook queue depth, counters and latencies (admins/scrapers only)."""
+    return {"http": http_client.metrics(), "webhooks": kofi_webhooks.metrics()}
+
 # Include routers
 app.include_router(shops.router, prefix="/shops", tags=["Shops"])
 app.include_router(trades.router, prefix="/trades", tags=["Trades"])
@@ -75,3 +157,4 @@ app.include_router(server.router, prefix="/server", tags=["Server"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(stats.router, prefix="/stats", tags=["Statistics"])
 app.include_router(webhooks.router, prefix="/webhooks", tags=["Webhooks"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
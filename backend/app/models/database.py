@@ -9,6 +9,7 @@ from datetime import datetime
 import uuid
 
 Base = declarative_base()
+TradeIndexBase = declarative_base()  # Sidecar DB, see TRADE_INDEX_DB
 
 # ============================================
 # Website Database (Read/Write)
@@ -70,6 +71,54 @@ class UserPreference(Base):
     user = relationship("User", back_populates="preferences")
 
 
+class KofiOrder(Base):
+    """Ko-fi webhook outbox: one row per transaction, so retried webhooks are answered from here"""
+    __tablename__ = "kofi_orders"
+    
+    transaction_id = Column(String(64), primary_key=True)  # kofi_transaction_id
+    type = Column(String(32))
+    from_name = Column(String(255))
+    payload = Column(Text, nullable=False)  # Raw webhook data (JSON)
+    message = Column(Text)  # Response sent to Ko-fi (repeated for duplicates)
+    
+    received_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime)  # Set once every command is in the plugin's journal
+    
+    commands = relationship("KofiCommand", back_populates="order", cascade="all, delete-orphan", order_by="KofiCommand.position")
+
+
+class KofiWebhook(Base):
+    """Ko-fi webhook inbox: payloads persisted before acknowledging, processed by background workers"""
+    __tablename__ = "kofi_webhooks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_id = Column(String(64), index=True)
+    payload = Column(Text, nullable=False)  # Verified webhook data (JSON)
+    
+    status = Column(String(16), nullable=False, default="pending", index=True)  # pending, done, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text)
+    
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+
+
+class KofiCommand(Base):
+    """A server command generated for a Ko-fi order, and whether it reached the plugin's journal"""
+    __tablename__ = "kofi_commands"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_id = Column(String(64), ForeignKey("kofi_orders.transaction_id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    command = Column(Text, nullable=False)
+    
+    journal_seq = Column(Integer, index=True)  # NULL until appended to the command journal
+    queued_at = Column(DateTime)
+    
+    order = relationship("KofiOrder", back_populates="commands")
+
+
 # ============================================
 # JetsAntiAFKPro Database (Read-Only)
 # ============================================
@@ -143,3 +192,15 @@ class ShopkeeperTrade(Base):
     
     # Trade count (how many times this trade was executed)
     trade_count = Column(SmallInteger, nullable=False)
+
+
+# ============================================
+# Trade Index Sidecar Database (Read/Write)
+# ============================================
+
+class TradeEpoch(TradeIndexBase):
+    """Parsed epoch seconds for each trade-log rowid (the trade log stores timestamps as text)"""
+    __tablename__ = "trade_epoch"
+    
+    trade_rowid = Column(Integer, primary_key=True, autoincrement=False)
+    epoch = Column(Integer, index=True)  # NULL if the timestamp could not be parsed
@@ -1,6 +1,6 @@
 # backend/app/routers/auth.py
 from fastapi import APIRouter, HTTPException, Depends, Request
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response
 from ..config import get_settings
 from ..services.auth import (
     trade_code_for_token, 
@@ -10,8 +10,11 @@ from ..services.auth import (
     get_mojang_access_token,
     AuthException
 )
-from ..services.security import create_access_token, set_auth_cookie 
-from ..services.player_status import check_player_status
+from ..services.security import set_auth_cookie, clear_auth_cookie, get_client_ip
+from ..services.player_status import check_player_status, is_ip_banned
+from ..services.sessions import session_store, get_current_user, get_optional_user
+from ..services.name_resolver import resolve_name
+from ..schemas.auth import TokenData
 
 router = APIRouter()
 settings = get_settings()
@@ -41,6 +44,15 @@ async def microsoft_login():
     
     return RedirectResponse(full_url)
 
+@router.get("/ip-status", summary="Checks whether the caller's IP address is banned")
+async def ip_status(request: Request):
+    """Lets the login page warn IP-banned visitors before they start the Microsoft flow."""
+    client_ip = get_client_ip(request)
+    return {
+        "ip": client_ip,
+        "is_banned": bool(client_ip) and is_ip_banned(client_ip)
+    }
+
 @router.get("/callback", summary="Handles the redirect from Microsoft after login")
 async def microsoft_callback(request: Request, code: str = None, state: str = None, error: str = None):
     """
@@ -53,6 +65,11 @@ async def microsoft_callback(request: Request, code: str = None, state: str = No
         
     # TODO: Implement state validation for CSRF protection
     
+    # IP bans are checked first: it's a single lookup and saves the whole token chain
+    client_ip = get_client_ip(request)
+    if client_ip and is_ip_banned(client_ip):
+        return RedirectResponse(url=f"{settings.FRONTEND_URL}/login?error=banned", status_code=302)
+    
     try:
         ms_tokens = await trade_code_for_token(code)
         xbl_token_data = await get_xbox_token(ms_tokens['access_token'])
@@ -74,8 +91,14 @@ async def microsoft_callback(request: Request, code: str = None, state: str = No
             # We require the player to have logged in once to the MC server
             return RedirectResponse(url=f"{settings.FRONTEND_URL}/login?error=not_logged_in", status_code=302)
 
-        # 6. Success: Create JWT and set cookie
-        jwt_token = create_access_token(data={"sub": minecraft_uuid})
+        # 6. Success: record the user and session, then issue the JWT (its `sid` names the session)
+        jwt_token = await session_store.open(
+            minecraft_uuid,
+            resolve_name(minecraft_uuid) or minecraft_uuid[:16],
+            ms_tokens.get('user_id') or f"mc:{minecraft_uuid}",
+            client_ip,
+            request.headers.get("user-agent"),
+        )
         
         # Redirect back to the frontend's main page
         response = RedirectResponse(url=settings.FRONTEND_URL, status_code=302)
@@ -90,3 +113,20 @@ async def microsoft_callback(request: Request, code: str = None, state: str = No
     except Exception as e:
         print(f"Unhandled Auth Error: {e}")
         return RedirectResponse(url=f"{settings.FRONTEND_URL}/login?error=server_error", status_code=302)
+
+@router.get("/me", summary="Returns the logged-in user")
+async def me(user: TokenData = Depends(get_current_user)):
+    """The current user's Minecraft UUID and name (401 when not logged in)."""
+    return {
+        "minecraft_uuid": user.minecraft_uuid,
+        "username": resolve_name(user.minecraft_uuid),
+        "user_id": user.user_id,
+    }
+
+@router.post("/logout", summary="Ends the current session")
+async def logout(response: Response, user: TokenData = Depends(get_optional_user)):
+    """Revokes the session behind the auth cookie (effective immediately) and clears the cookie."""
+    if user is not None and user.session_id:
+        session_store.revoke(user.session_id)
+    clear_auth_cookie(response)
+    return {"logged_out": True}
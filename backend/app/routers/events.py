@@ -0,0 +1,31 @@
+# backend/app/routers/events.py
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from ..services.events import event_broker, EVENT_TOPICS
+
+router = APIRouter()
+
+@router.get("", summary="Stream live status, trade, stock and catalog changes (server-sent events)")
+async def stream_events(
+    topics: Optional[str] = Query(None, description=f"Comma-separated topics to receive: {', '.join(EVENT_TOPICS)} (default: all)")
+):
+    """
+    Server-sent events stream. Event types:
+    - `status`: the new server status snapshot (only when something visible changed)
+    - `trades`: `{"trades": [...]}` new trade-log rows
+    - `stock`: `{"shops": [...]}` shops whose stock changed
+    - `catalog`: `{"version": ...}` new Shopkeepers catalog version
+
+    The latest `status` and `catalog` events are sent on connect.
+    """
+    requested = [topic.strip() for topic in topics.split(",") if topic.strip()] if topics else list(EVENT_TOPICS)
+    unknown = [topic for topic in requested if topic not in EVENT_TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topic(s): {', '.join(unknown)}. Use: {', '.join(EVENT_TOPICS)}")
+
+    return StreamingResponse(
+        event_broker.stream(requested),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # no proxy buffering
+    )
@@ -1,70 +1,32 @@
 """Players router - Player profiles and stats"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..database import get_playtime_db, get_shopkeepers_db
-from ..models.database import PlayerPlaytime, ShopkeeperTrade
-from ..services.yaml_parser import get_shops_by_owner
-from ..schemas.player import PlayerPlaytimeInfo, PlayerProfile
-from ..services.player_status import is_player_banned_by_uuid, has_player_logged_in, get_player_name_by_uuid
+from typing import Optional, List
+from ..database import get_playtime_db
+from ..models.database import PlayerPlaytime
+from ..services.player_profile import get_player_profile_data, parse_includes
+from ..schemas.player import PlayerPlaytimeInfo, PlayerProfile, PlayerStatusRequest, PlayerStatus
+from ..services.player_status import is_player_banned_by_uuid, has_player_logged_in, get_player_name_by_uuid, get_player_statuses
+from ..services.name_resolver import resolve_names
 
 router = APIRouter()
 
 @router.get("/{player_uuid}")
 async def get_player_profile(
     player_uuid: str,
-    playtime_db: Session = Depends(get_playtime_db),
-    trades_db: Session = Depends(get_shopkeepers_db)
+    include: Optional[str] = Query(None, description="Comma-separated extras: trade_stats, shops, ranks")
 ):
     """Get complete player profile with stats"""
+    try:
+        includes = parse_includes(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Get playtime (UUID without dashes in database)
-    uuid_no_dashes = player_uuid.replace("-", "")
-    playtime_record = playtime_db.query(PlayerPlaytime)\
-        .filter(PlayerPlaytime.uuid == uuid_no_dashes)\
-        .first()
-    
-    if not playtime_record:
+    profile = await get_player_profile_data(player_uuid, includes)
+    if profile is None:
         raise HTTPException(status_code=404, detail="Player not found")
     
-    # Get player name from trades database
-    trade_with_name = trades_db.query(ShopkeeperTrade)\
-        .filter(
-            (ShopkeeperTrade.player_uuid == player_uuid) |
-            (ShopkeeperTrade.shop_owner_uuid == player_uuid)
-        )\
-        .first()
-    
-    username = trade_with_name.player_name if trade_with_name else "Unknown"
-    
-    # Get shop count
-    shops = get_shops_by_owner(player_uuid)
-    
-    # Get basic trade stats
-    total_sales = trades_db.query(func.count(ShopkeeperTrade.rowid))\
-        .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
-        .scalar() or 0
-    
-    total_purchases = trades_db.query(func.count(ShopkeeperTrade.rowid))\
-        .filter(ShopkeeperTrade.player_uuid == player_uuid)\
-        .scalar() or 0
-    
-    return {
-        "uuid": player_uuid,
-        "username": username,
-        "playtime": {
-            "uuid": player_uuid,
-            "username": username,
-            "playtime_ticks": playtime_record.playtime,
-            "playtime_hours": playtime_record.playtime_hours,
-            "playtime_formatted": playtime_record.playtime_formatted
-        },
-        "total_shops": len(shops),
-        "trade_stats": {
-            "total_sales": total_sales,
-            "total_purchases": total_purchases
-        }
-    }
+    return profile
 
 @router.get("/playtime/top")
 async def get_top_playtime(
@@ -76,10 +38,12 @@ async def get_top_playtime(
         .order_by(PlayerPlaytime.playtime.desc())\
         .limit(limit)\
         .all()
+    names = resolve_names(p.uuid for p in players)
     
     return [
         {
             "uuid": p.uuid,
+            "username": names.get(p.uuid),
             "playtime_ticks": p.playtime,
             "playtime_hours": p.playtime_hours,
             "playtime_formatted": p.playtime_formatted
@@ -87,6 +51,11 @@ async def get_top_playtime(
         for p in players
     ]
 
+@router.post("/status", response_model=List[PlayerStatus])
+async def get_player_statuses_bulk(body: PlayerStatusRequest):
+    """Get name, login and ban status for up to 5000 players in one request."""
+    return get_player_statuses(body.uuids)
+
 @router.get("/{player_uuid}/status")
 async def get_player_status(player_uuid: str):
     """Get the login and ban status for a player by UUID."""
@@ -106,7 +75,7 @@ async def get_player_status(player_uuid: str):
             "message": "Player has not logged in to the server yet or cache has expired."
         }
         
-    is_banned = is_player_banned_by_uuid,(player_uuid)
+    is_banned = is_player_banned_by_uuid(player_uuid)
 
     return {
         "uuid": player_uuid,
@@ -1,16 +1,49 @@
 # backend/app/routers/server.py (Update /status endpoint)
-from fastapi import APIRouter
-from ..services.server_status import get_minecraft_server_status # <-- NEW IMPORT
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+from ..services.server_status import get_minecraft_server_status
+from ..services.status_history import status_history, RESOLUTION_NAMES
 
 router = APIRouter()
 
 @router.get("/status", summary="Get the current live status of the Minecraft server")
-async def get_server_status():
-    """Returns live status, player count, and MOTD."""
-    # The existing code now uses the new service
-    status_data = await get_minecraft_server_status()
+async def get_server_status(
+    refresh: bool = Query(False, description="Query the server now instead of using the latest snapshot")
+):
+    """
+    Returns status, player count, and MOTD from the background poller's latest
+    snapshot; `age` is how many seconds old it is.
+    """
+    status_data = await get_minecraft_server_status(refresh)
     return status_data
 
+@router.get("/history", summary="Get player count and uptime history for a time range")
+async def get_server_history(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    resolution: Optional[str] = Query(None, description="raw, 1m, 1h or 1d (default: picked from the range)")
+):
+    """
+    Returns uptime, average/max players and latency over [since, until) (default:
+    the last 24 hours). Times without an offset are UTC. Without `resolution`, the finest one that keeps the
+    response to a few hundred points is used.
+    """
+    if resolution is not None and resolution not in RESOLUTION_NAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution '{resolution}'. Use one of: {', '.join(RESOLUTION_NAMES)}")
+    until = _as_utc(until) if until else datetime.now(timezone.utc)
+    since = _as_utc(since) if since else until - timedelta(days=1)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be before 'until'.")
+    return await asyncio.to_thread(status_history.query, since.timestamp(), until.timestamp(), resolution)
+
+def _as_utc(value: datetime) -> datetime:
+    """Timestamps without an offset are taken as UTC (not the server's local time)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 @router.get("/info", summary="Get server configuration and contact info")
 async def get_server_info():
     """Returns static server information (e.g., rules, contact)."""
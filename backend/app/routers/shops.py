@@ -2,6 +2,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from ..services.yaml_parser import load_shops, get_shop_by_uuid, get_shops_by_owner
+from ..services.stock import get_shop_stock
 
 router = APIRouter()
 
@@ -25,6 +26,14 @@ async def get_shop(shop_uuid: str):
         raise HTTPException(status_code=404, detail="Shop not found")
     return shop
 
+@router.get("/{shop_uuid}/stock")
+async def get_shop_stock_counts(shop_uuid: str):
+    """
+    Get the stock of each offer of a player shop, keyed by trade id.
+    `stock` is null when the plugin has no stock for the shop (admin shop, no container, or not scanned yet).
+    """
+    return {"shop_uuid": shop_uuid, "stock": get_shop_stock(shop_uuid)}
+
 @router.get("/owner/{owner_uuid}")
 async def get_owner_shops(owner_uuid: str):
     """Get all shops owned by a player"""
@@ -1,33 +1,102 @@
 # backend/app/routers/stats.py
-from fastapi import APIRouter, Query, HTTPException
-from typing import List, Dict, Any
-from ..services.stats import get_leaderboard, load_all_leaderboards, get_stats_dashboard
+from fastapi import APIRouter, Query, HTTPException, Response
+from typing import List, Dict, Any, Optional
+from ..services.stats import get_available_stats, get_leaderboard_page, get_player_stats_card, StatsNotFound, InvalidCursor
+from ..services.stats_awards import awards_engine, get_stats_dashboard
+from ..services.stats_history import get_stat_gains, get_stat_movers, SNAPSHOT_WINDOWS, MOVER_DIRECTIONS
 
 router = APIRouter()
 
 @router.get("/", summary="Get a list of all available statistics")
 async def list_available_stats():
     """Returns a list of all available leaderboard IDs (stat file names)."""
-    boards = load_all_leaderboards()
-    return {"available_stats": list(boards.keys()), "count": len(boards)}
+    stat_names = get_available_stats()
+    return {"available_stats": stat_names, "count": len(stat_names)}
 
 @router.get("/leaderboard/{stat_name}", summary="Get the leaderboard for a specific statistic")
 async def get_stats_leaderboard(
     stat_name: str,
-    limit: int = Query(20, gt=0, le=100)
+    response: Response,
+    limit: int = Query(20, gt=0, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    around: Optional[str] = Query(None, description="Player UUID to centre the page on"),
+    radius: int = Query(5, ge=0, le=50)
 ) -> List[Dict[str, Any]]:
-    """Returns the top players for a given statistic (e.g., 'kill_zombie', 'mine_diamond_ore')."""
+    """
+    Returns players for a given statistic (e.g., 'kill_zombie', 'mine_diamond_ore').
     
-    leaderboard = get_leaderboard(stat_name, limit)
+    Pages start at `offset` or after `cursor`; with `around` the page holds `radius`
+    players above and below that player. The total row count and the cursor for the
+    next page are returned in the X-Total-Count and X-Next-Cursor headers.
+    """
+    try:
+        page = get_leaderboard_page(stat_name, limit, offset, cursor, around, radius)
+    except StatsNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    
+    if page is None:
+        raise HTTPException(status_code=404, detail=f"Statistic '{stat_name}' not found.")
     
-    if not leaderboard:
-        # Check if the stat name is valid but the board is empty
-        if stat_name in load_all_leaderboards():
-             return []
-        # Or if the stat name is invalid
+    response.headers["X-Total-Count"] = str(page["total"])
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["rows"]
+
+
+def _check_window(window: str):
+    if window not in SNAPSHOT_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unknown window '{window}'. Use one of: {', '.join(SNAPSHOT_WINDOWS)}")
+
+
+@router.get("/gains/{stat_name}", summary="Get the biggest value gains for a statistic over a time window")
+async def get_stats_gains(
+    stat_name: str,
+    window: str = Query("7d", description="One of: 24h, 7d, 30d"),
+    limit: int = Query(20, gt=0, le=100)
+) -> Dict[str, Any]:
+    """
+    Players whose value grew the most since the history snapshot at the start of `window`.
+    `since` is the time of that snapshot (later than the window start while history is short).
+    """
+    _check_window(window)
+    try:
+        gains = get_stat_gains(stat_name, window, limit)
+    except StatsNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if gains is None:
+        raise HTTPException(status_code=404, detail=f"Statistic '{stat_name}' not found.")
+    return gains
+
+
+@router.get("/movers/{stat_name}", summary="Get the biggest rank changes for a statistic over a time window")
+async def get_stats_movers(
+    stat_name: str,
+    window: str = Query("7d", description="One of: 24h, 7d, 30d"),
+    direction: str = Query("up", description="'up' for climbers, 'down' for fallers"),
+    limit: int = Query(20, gt=0, le=100)
+) -> Dict[str, Any]:
+    """Players whose rank moved the most since the history snapshot at the start of `window`."""
+    _check_window(window)
+    if direction not in MOVER_DIRECTIONS:
+        raise HTTPException(status_code=400, detail="direction must be 'up' or 'down'.")
+    try:
+        movers = get_stat_movers(stat_name, window, limit, direction)
+    except StatsNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if movers is None:
         raise HTTPException(status_code=404, detail=f"Statistic '{stat_name}' not found.")
-        
-    return leaderboard
+    return movers
+
+
+@router.get("/player/{player_uuid}", summary="Get a player's ranks across all statistics")
+async def get_player_stats(player_uuid: str) -> Dict[str, Any]:
+    """Returns every stat the player is ranked in, with their rank and value, plus their awards."""
+    card = get_player_stats_card(player_uuid)
+    card["awards"] = awards_engine.player_awards(player_uuid)
+    return card
 
 
 @router.get("/dashboard", summary="Get aggregated stats for the main dashboard and awards overview")
@@ -35,4 +104,4 @@ async def get_dashboard_stats() -> Dict[str, Any]:
     """
     Returns a single payload containing essential leaderboards and data needed for the Stats Home Page.
     """
-    return await get_stats_dashboard() # <-- Call the new service function
+    return await get_stats_dashboard() # Precomputed by the awards engine
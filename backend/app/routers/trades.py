@@ -1,31 +1,44 @@
 """Trades router - View trade history and analytics"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import List, Optional
+from datetime import datetime
 from ..database import get_shopkeepers_db
 from ..models.database import ShopkeeperTrade
 from ..schemas.trade import TradeRecord, TradeStats, PlayerTradeHistory, TopSeller
-from ..services.yaml_parser import extract_all_available_trades 
-from ..services.item_mapping import enrich_item_data 
-from ..services.stock import get_stock_count, clear_stock_cache
+from ..services.catalog import catalog_snapshot, with_stock
+from ..services.trade_rollups import get_trade_leaderboard, BOARDS, WINDOWS, METRICS
+from ..services.trade_index import apply_time_range
+from ..services.trade_stats import compute_player_trade_stats
+from ..services.trade_export import build_export_query, stream_trade_export, EXPORT_FORMATS
+from ..services.trade_records import select_trade_records, rows_to_records
+from ..services.name_resolver import fill_names
 import logging
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/recent", response_model=List[TradeRecord])
+@router.get(
+    "/recent",
+    response_class=ORJSONResponse,
+    # Documented only: records are built as plain dicts and serialized by orjson (see trade_records.py)
+    responses={200: {"model": List[TradeRecord], "description": "Trades, newest first"}},
+)
 async def get_recent_trades(
     limit: int = 50,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_shopkeepers_db)
 ):
-    """Get recent trades across all shops"""
-    trades = db.query(ShopkeeperTrade)\
+    """Get recent trades across all shops, optionally within [since, until)"""
+    stmt = apply_time_range(select_trade_records(), since, until)\
         .order_by(desc(ShopkeeperTrade.timestamp))\
-        .limit(limit)\
-        .all()
-    return trades
+        .limit(limit)
+    rows = db.execute(stmt).all()
+    return ORJSONResponse(await rows_to_records(rows))
 
 @router.get("/player/{player_uuid}")
 async def get_player_trades(
@@ -33,134 +46,130 @@ async def get_player_trades(
     as_buyer: bool = True,
     as_seller: bool = True,
     limit: int = 100,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_shopkeepers_db)
 ):
-    """Get trades for a specific player (as buyer or seller)"""
-    trades = []
+    """Get trades for a specific player (as buyer or seller), optionally within [since, until)"""
+    rows = []
     
     if as_buyer:
-        buyer_trades = db.query(ShopkeeperTrade)\
-            .filter(ShopkeeperTrade.player_uuid == player_uuid)\
+        stmt = apply_time_range(select_trade_records(full_rows=True), since, until)\
+            .where(ShopkeeperTrade.player_uuid == player_uuid)\
             .order_by(desc(ShopkeeperTrade.timestamp))\
-            .limit(limit)\
-            .all()
-        trades.extend(buyer_trades)
+            .limit(limit)
+        rows.extend(db.execute(stmt).all())
     
     if as_seller:
-        seller_trades = db.query(ShopkeeperTrade)\
-            .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
+        stmt = apply_time_range(select_trade_records(full_rows=True), since, until)\
+            .where(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
             .order_by(desc(ShopkeeperTrade.timestamp))\
-            .limit(limit)\
-            .all()
-        trades.extend(seller_trades)
+            .limit(limit)
+        rows.extend(db.execute(stmt).all())
     
-    # Sort combined results by timestamp
-    trades.sort(key=lambda x: x.timestamp, reverse=True)
+    # Sort combined results by timestamp (first column)
+    rows.sort(key=lambda row: row[0], reverse=True)
     
-    return {
+    return ORJSONResponse({
         "player_uuid": player_uuid,
-        "trades": trades[:limit],
-        "total": len(trades)
-    }
+        "trades": await rows_to_records(rows[:limit]),
+        "total": len(rows)
+    })
+
+def _export_response(stmt, fmt: str, filename: str) -> StreamingResponse:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    return StreamingResponse(
+        stream_trade_export(stmt, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+@router.get("/export", summary="Stream the whole trade log as CSV or NDJSON")
+async def export_all_trades(
+    format: str = "csv",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Export every trade (optionally within [since, until)), oldest first"""
+    return _export_response(build_export_query(since=since, until=until), format, "trades")
+
+@router.get("/player/{player_uuid}/export", summary="Stream a player's trade history as CSV or NDJSON")
+async def export_player_trades(
+    player_uuid: str,
+    format: str = "csv",
+    as_buyer: bool = True,
+    as_seller: bool = True,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Export a player's trades (as buyer and/or seller), oldest first"""
+    stmt = build_export_query(player_uuid=player_uuid, as_buyer=as_buyer, as_seller=as_seller, since=since, until=until)
+    return _export_response(stmt, format, f"trades-{player_uuid}")
+
+@router.get("/shop/{shop_uuid}/export", summary="Stream a shop's trade history as CSV or NDJSON")
+async def export_shop_trades(
+    shop_uuid: str,
+    format: str = "csv",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Export all trades of a shop, oldest first"""
+    stmt = build_export_query(shop_uuid=shop_uuid, since=since, until=until)
+    return _export_response(stmt, format, f"trades-shop-{shop_uuid}")
 
 @router.get("/stats/{player_uuid}")
 async def get_player_trade_stats(
     player_uuid: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_shopkeepers_db)
 ):
-    """Get trade statistics for a player"""
-    
-    # Sales (player is shop owner)
-    sales = db.query(ShopkeeperTrade)\
-        .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
-        .all()
-    
-    # Purchases (player is buyer)
-    purchases = db.query(ShopkeeperTrade)\
-        .filter(ShopkeeperTrade.player_uuid == player_uuid)\
-        .all()
-    
-    # Calculate total items sold
-    total_items_sold = sum(trade.result_item_amount * trade.trade_count for trade in sales)
-    
-    # Calculate total items bought
-    total_items_bought = sum(trade.result_item_amount * trade.trade_count for trade in purchases)
-    
-    # Find most sold item
-    item_counts = {}
-    for trade in sales:
-        item = trade.result_item_type
-        count = trade.result_item_amount * trade.trade_count
-        item_counts[item] = item_counts.get(item, 0) + count
-    
-    most_sold_item = None
-    most_sold_count = 0
-    if item_counts:
-        most_sold_item = max(item_counts, key=item_counts.get)
-        most_sold_count = item_counts[most_sold_item]
-    
-    # Unique customers
-    unique_customers = db.query(func.count(func.distinct(ShopkeeperTrade.player_uuid)))\
-        .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
-        .scalar() or 0
-    
-    return {
-        "total_trades": len(sales) + len(purchases),
-        "total_items_sold": total_items_sold,
-        "total_items_bought": total_items_bought,
-        "most_sold_item": most_sold_item,
-        "most_sold_count": most_sold_count,
-        "unique_customers": unique_customers
-    }
+    """Get trade statistics for a player, optionally within [since, until)"""
+    return compute_player_trade_stats(db, player_uuid, since, until)
 
-@router.get("/leaderboard/sellers")
-async def get_top_sellers(
-    limit: int = 10,
-    db: Session = Depends(get_shopkeepers_db)
+@router.get("/leaderboard/{board}")
+async def get_trade_leaderboard_for_board(
+    board: str,
+    window: str = Query("all", description="One of: 24h, 7d, 30d, all"),
+    metric: str = Query("trades", description="Rank by 'trades' or 'items' (items moved)"),
+    limit: int = Query(10, gt=0, le=100)
 ):
-    """Get top sellers by total sales"""
-    
-    # Group by shop owner and count total sales
-    top_sellers = db.query(
-        ShopkeeperTrade.shop_owner_uuid,
-        ShopkeeperTrade.shop_owner_name,
-        func.count(ShopkeeperTrade.rowid).label('total_sales'),
-        func.count(func.distinct(ShopkeeperTrade.result_item_type)).label('unique_items')
-    )\
-    .filter(ShopkeeperTrade.shop_owner_uuid.isnot(None))\
-    .group_by(ShopkeeperTrade.shop_owner_uuid, ShopkeeperTrade.shop_owner_name)\
-    .order_by(desc('total_sales'))\
-    .limit(limit)\
-    .all()
-    
-    return [
-        {
-            "player_uuid": seller[0],
-            "player_name": seller[1],
-            "total_sales": seller[2],
-            "unique_items": seller[3]
-        }
-        for seller in top_sellers
-    ]
+    """Get top sellers, buyers, items or shops over a time window"""
+    if board not in BOARDS:
+        raise HTTPException(status_code=404, detail=f"Leaderboard '{board}' not found.")
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unknown window '{window}'. Use one of: {', '.join(WINDOWS)}")
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'. Use one of: {', '.join(METRICS)}")
+    
+    entries = get_trade_leaderboard(board, window, metric, limit)
+    if board in ("sellers", "buyers"):
+        fill_names(entries, "player_uuid", "player_name")
+    elif board == "shops":
+        fill_names(entries, "owner_uuid", "owner_name")
+    return entries
 
 @router.get("/shop/{shop_uuid}")
 async def get_shop_trades(
     shop_uuid: str,
     limit: int = 100,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_shopkeepers_db)
 ):
-    """Get all trades for a specific shop"""
-    trades = db.query(ShopkeeperTrade)\
-        .filter(ShopkeeperTrade.shop_uuid == shop_uuid)\
+    """Get all trades for a specific shop, optionally within [since, until)"""
+    stmt = apply_time_range(select_trade_records(full_rows=True), since, until)\
+        .where(ShopkeeperTrade.shop_uuid == shop_uuid)\
         .order_by(desc(ShopkeeperTrade.timestamp))\
-        .limit(limit)\
-        .all()
+        .limit(limit)
+    rows = db.execute(stmt).all()
     
-    return {
+    return ORJSONResponse({
         "shop_uuid": shop_uuid,
-        "trades": trades,
-        "total": len(trades)
-    }
+        "trades": await rows_to_records(rows),
+        "total": len(rows)
+    })
 
 @router.get("/available", summary="Get all currently available trades from active shops")
 async def get_available_trades(skip: int = 0, limit: int = 100):
@@ -172,56 +181,16 @@ async def get_available_trades(skip: int = 0, limit: int = 100):
     - Player shops with stock data: actual count (int)
     - Player shops without stock data: null (shop has no container or plugin didn't scan it)
     """
-    logger.info("🔄 [GET /available] Starting to fetch available trades...")
-    
-    # Clear the cache to get fresh stock data
-    clear_stock_cache()
-    
-    all_trades = extract_all_available_trades()
-    logger.info(f"📦 [GET /available] Extracted {len(all_trades)} trades from YAML")
+    # Enriched trades are cached per save.yml version; only the returned page gets stock overlaid
+    all_trades = await catalog_snapshot.trades()
     total = len(all_trades)
+    page = [with_stock(trade) for trade in all_trades[skip:skip+limit]]
     
-    # Enrich each trade with stock and item data
-    for idx, trade in enumerate(all_trades):
-        logger.debug(f"[Trade {idx+1}/{len(all_trades)}] Processing trade: {trade.get('id')}")
-        
-        is_admin_shop = trade.get('shop_type') == 'admin'
-        shop_uuid = trade.get('shop_uuid')
-        trade_id = trade.get('id')
-        
-        # Determine stock_remaining
-        if is_admin_shop:
-            # Admin shops have unlimited stock
-            stock_remaining = "UNLIMITED"
-            logger.debug(f"[Trade {idx+1}] Admin shop detected - setting UNLIMITED stock")
-        else:
-            # Player shops: try to get stock by looking up the result item type
-            result_item_type = trade.get('result', {}).get('type')
-            stock_remaining = get_stock_count(shop_uuid, result_item_type)
-            logger.debug(f"[Trade {idx+1}] Player shop - stock_remaining: {stock_remaining}")
-        
-        trade['stock_remaining'] = stock_remaining
-        
-        # Enrich item data - IMPORTANT: These are async, so await them
-        logger.debug(f"[Trade {idx+1}] Enriching result item: {trade.get('result', {}).get('type')}")
-        trade['result'] = await enrich_item_data(trade.get('result'))
-        
-        logger.debug(f"[Trade {idx+1}] Enriching cost1 item: {trade.get('cost1', {}).get('type')}")
-        trade['cost1'] = await enrich_item_data(trade.get('cost1'))
-        
-        if trade.get('cost2'):
-            logger.debug(f"[Trade {idx+1}] Enriching cost2 item: {trade.get('cost2', {}).get('type')}")
-            trade['cost2'] = await enrich_item_data(trade.get('cost2'))
-        
-        # Log the enriched result
-        result_item = trade.get('result', {})
-        logger.debug(f"[Trade {idx+1}] ✓ Enriched result: display_name={result_item.get('display_name')}, is_custom={result_item.get('is_custom')}, icon_url={result_item.get('icon_url')}")
-    
-    logger.info(f"✓ [GET /available] Enrichment complete. Returning {len(all_trades[skip:skip+limit])} trades")
+    logger.info(f"✓ [GET /available] Returning {len(page)} of {total} trades")
     
     # Return paginated results
     return {
-        "trades": all_trades[skip:skip+limit],
+        "trades": page,
         "total": total,
         "page": skip // limit + 1 if limit > 0 else 1,
         "page_size": limit
@@ -6,7 +6,7 @@ from typing import Dict, Any
 import json
 import urllib.parse # Used for decoding form data
 from ..config import get_settings
-from ..services.automation import process_kofi_webhook_payload
+from ..services.webhook_queue import kofi_webhooks
 
 router = APIRouter()
 settings = get_settings()
@@ -14,7 +14,8 @@ settings = get_settings()
 @router.post("/kofi", status_code=200, summary="Ko-fi Webhook Handler (Donations/Shop)")
 async def handle_kofi_webhook(request: Request):
     """
-    Receives and validates the Ko-fi webhook, handling different Content-Types.
+    Receives and validates the Ko-fi webhook, handling different Content-Types,
+    then persists it and acknowledges right away; processing happens in the background.
     """
     content_type = request.headers.get('content-type', '').split(';')[0].strip()
     raw_body = None
@@ -58,22 +59,13 @@ async def handle_kofi_webhook(request: Request):
         print(f"SECURITY ALERT: Invalid Ko-fi token received: {verification_token}")
         raise HTTPException(status_code=401, detail="Unauthorized: Invalid verification token.")
 
+    # 3. PERSIST AND ACKNOWLEDGE (processed by the background workers, see webhook_queue.py)
     try:
-        # 3. PROCESS DONATION
-        result = await process_kofi_webhook_payload(raw_body)
-        
-        print(f"SUCCESS: Received Ko-fi {raw_body.get('type')} from {raw_body.get('from_name')}")
-        
-        return {"status": "success", "message": result["message"]}
-    
+        webhook_id = await kofi_webhooks.accept(raw_body)
     except Exception as e:
-        # *** FIX: Print the full traceback before returning a 500 ***
-        import traceback
-        print("="*60)
-        print("CRITICAL WEBHOOK PROCESSING ERROR")
-        print(f"PAYLOAD TYPE: {raw_body.get('type')}")
-        print(f"ERROR: {e}")
-        print(traceback.format_exc())
-        print("="*60)
-        
-        raise HTTPException(status_code=500, detail=f"Internal server error during processing: {e}")
+        # Not persisted: let Ko-fi retry the delivery
+        print(f"CRITICAL: Could not persist Ko-fi webhook: {e}")
+        raise HTTPException(status_code=500, detail="Could not store webhook; please retry.")
+    
+    print(f"ACCEPTED: Ko-fi {raw_body.get('type')} from {raw_body.get('from_name')} (inbox #{webhook_id})")
+    return {"status": "accepted", "id": webhook_id}
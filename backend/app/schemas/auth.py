@@ -12,6 +12,8 @@ class TokenData(BaseModel):
     """Data stored in JWT token"""
     user_id: str
     minecraft_uuid: str
+    session_id: Optional[str] = None
+    is_admin: bool = False
 
 class MicrosoftAuthCallback(BaseModel):
     """Microsoft OAuth callback data"""
@@ -1,6 +1,6 @@
 """Player-related Pydantic schemas"""
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 
 class PlayerPlaytimeInfo(BaseModel):
     """Player playtime information"""
@@ -17,3 +17,14 @@ class PlayerProfile(BaseModel):
     playtime: Optional[PlayerPlaytimeInfo] = None
     total_shops: int = 0
     trade_stats: Optional[dict] = None
+
+class PlayerStatusRequest(BaseModel):
+    """Bulk status lookup body"""
+    uuids: List[str] = Field(..., min_length=1, max_length=5000)
+
+class PlayerStatus(BaseModel):
+    """Login and ban status for one player"""
+    uuid: str
+    name: Optional[str] = None
+    has_logged_in: bool
+    is_banned: bool
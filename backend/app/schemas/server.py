@@ -16,3 +16,5 @@ class ServerStatus(BaseModel):
     motd: Optional[str] = None
     latency: Optional[float] = None
     error: Optional[str] = None
+    updated_at: Optional[str] = None
+    age: Optional[float] = None
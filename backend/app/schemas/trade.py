@@ -1,6 +1,6 @@
 """Trade-related Pydantic schemas"""
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 
 class TradeRecord(BaseModel):
     timestamp: str
@@ -16,6 +16,10 @@ class TradeRecord(BaseModel):
     result_item_type: str
     result_item_amount: int
     trade_count: int
+    # Parsed and enriched from the *_metadata columns (same shape as shop offer items)
+    item_1: Optional[Dict[str, Any]] = None
+    item_2: Optional[Dict[str, Any]] = None
+    result_item: Optional[Dict[str, Any]] = None
     
     class Config:
         from_attributes = True
@@ -1,8 +1,8 @@
 # backend/app/services/auth.py
-import httpx
 import json
 from typing import Dict, Any, Optional
 from ..config import get_settings
+from .http_client import http_client
 
 settings = get_settings()
 
@@ -26,14 +26,14 @@ async def trade_code_for_token(code: str) -> Dict[str, Any]:
         "redirect_uri": settings.MICROSOFT_REDIRECT_URI,
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(MS_TOKEN_URL, data=data)
-        
-        if response.status_code != 200:
-            print(f"Token Exchange Failed: {response.text}")
-            raise AuthException("Failed to exchange code for token.")
-        
-        return response.json()
+    # Not retried after it may have reached Microsoft: authorization codes are single-use
+    response = await http_client.post(MS_TOKEN_URL, data=data)
+    
+    if response.status_code != 200:
+        print(f"Token Exchange Failed: {response.text}")
+        raise AuthException("Failed to exchange code for token.")
+    
+    return response.json()
 
 async def get_xbox_token(access_token: str) -> Dict[str, Any]:
     """Uses the Microsoft Access Token to get an Xbox Live token (XBL token)."""
@@ -51,14 +51,13 @@ async def get_xbox_token(access_token: str) -> Dict[str, Any]:
     }
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(XBOX_AUTH_URL, headers=headers, content=json.dumps(data))
+    response = await http_client.post(XBOX_AUTH_URL, headers=headers, content=json.dumps(data), idempotent=True)
+    
+    if response.status_code != 200:
+        print(f"XBL Auth Failed: {response.text}")
+        raise AuthException("Failed to get Xbox Live token.")
         
-        if response.status_code != 200:
-            print(f"XBL Auth Failed: {response.text}")
-            raise AuthException("Failed to get Xbox Live token.")
-            
-        return response.json()
+    return response.json()
 
 async def get_xsts_token(xbl_token_data: Dict[str, Any]) -> Dict[str, Any]:
     """Uses the XBL token to get the XSTS token (required for Minecraft API access)."""
@@ -75,15 +74,14 @@ async def get_xsts_token(xbl_token_data: Dict[str, Any]) -> Dict[str, Any]:
     }
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(XBOX_XSTS_URL, headers=headers, content=json.dumps(data))
+    response = await http_client.post(XBOX_XSTS_URL, headers=headers, content=json.dumps(data), idempotent=True)
 
-        if response.status_code != 200:
-            print(f"XSTS Auth Failed: {response.text}")
-            # A common error here is 401/403: "User not an owner of Minecraft" (requires purchase)
-            raise AuthException("Failed XSTS authorization. User may not own Minecraft.")
-        
-        return response.json()
+    if response.status_code != 200:
+        print(f"XSTS Auth Failed: {response.text}")
+        # A common error here is 401/403: "User not an owner of Minecraft" (requires purchase)
+        raise AuthException("Failed XSTS authorization. User may not own Minecraft.")
+    
+    return response.json()
 
 async def get_minecraft_uuid(mojang_access_token: str) -> str:
     """Uses the Mojang Access Token to get the Minecraft profile (UUID)."""
@@ -91,20 +89,19 @@ async def get_minecraft_uuid(mojang_access_token: str) -> str:
     # Use the standard Bearer token header format
     headers = {"Authorization": f"Bearer {mojang_access_token}"}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(MOJANG_PROFILE_URL, headers=headers)
+    response = await http_client.get(MOJANG_PROFILE_URL, headers=headers)
+    
+    if response.status_code != 200:
+        print(f"Minecraft Profile Failed: {response.text}")
+        raise AuthException("Failed to get Minecraft profile (UUID).")
+        
+    profile = response.json()
+    # The 'id' field is the Minecraft UUID
+    if not profile.get('id'):
+        # This is a critical check for users who own the account but haven't set up the profile
+         raise AuthException("Minecraft profile exists, but no UUID found. Does the user own a Java profile?")
         
-        if response.status_code != 200:
-            print(f"Minecraft Profile Failed: {response.text}")
-            raise AuthException("Failed to get Minecraft profile (UUID).")
-            
-        profile = response.json()
-        # The 'id' field is the Minecraft UUID
-        if not profile.get('id'):
-            # This is a critical check for users who own the account but haven't set up the profile
-             raise AuthException("Minecraft profile exists, but no UUID found. Does the user own a Java profile?")
-            
-        return profile.get('id')
+    return profile.get('id')
 
 
 async def get_mojang_access_token(xsts_token_data: Dict[str, Any]) -> str:
@@ -119,11 +116,10 @@ async def get_mojang_access_token(xsts_token_data: Dict[str, Any]) -> str:
     }
     headers = {"Content-Type": "application/json"}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(MOJANG_LOGIN_URL, headers=headers, content=json.dumps(data))
-        
-        if response.status_code != 200:
-            print(f"Mojang Token Exchange Failed: {response.text}")
-            raise AuthException("Failed to get Mojang Access Token. User may not own Minecraft.")
-        
-        return response.json()['access_token']
+    response = await http_client.post(MOJANG_LOGIN_URL, headers=headers, content=json.dumps(data), idempotent=True)
+    
+    if response.status_code != 200:
+        print(f"Mojang Token Exchange Failed: {response.text}")
+        raise AuthException("Failed to get Mojang Access Token. User may not own Minecraft.")
+    
+    return response.json()['access_token']
@@ -1,12 +1,12 @@
 # backend/app/services/automation.py (FINAL COMPLETE VERSION)
 
-import json
-import os
-from pathlib import Path
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 from ..config import get_settings
+from .command_journal import command_journal
+from .kofi_outbox import kofi_outbox
 
 settings = get_settings()
 
@@ -51,6 +51,8 @@ class ProcessedDonation(BaseModel):
     is_permanent: bool = False
 
 class QueuedCommand(BaseModel):
+    """One record of the command journal (one NDJSON line)."""
+    seq: int
     id: str
     command: str
     timestamp: str
@@ -100,47 +102,20 @@ def generate_server_command(ign: str, action: str, details: Dict[str, Any]) -> s
     return "" 
 
 
-def get_command_queue_path() -> Path:
-    """Returns the pathlib Path object for the command queue file."""
-    return Path(settings.COMMAND_QUEUE_PATH)
+def queue_server_commands(commands: List[str]) -> List[Dict[str, Any]]:
+    """
+    Appends commands to the plugin's command journal (see command_journal.py).
+    Returns their journal records once they are durable on disk.
+    """
+    return command_journal.append(commands)
 
 
 def queue_server_command(command: str):
-    """
-    Appends a new command to the central JSON queue file.
-    Uses file locking or thread-safe write for data integrity.
-    """
-    queue_path = get_command_queue_path()
-    
-    new_command = QueuedCommand(
-        id=os.urandom(8).hex(), # Simple unique ID
-        command=command,
-        timestamp=datetime.now(timezone.utc).isoformat()
-    ).model_dump()
-    
-    # 1. Ensure the directory exists
-    queue_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # 2. Safely read, append, and write back (using a temporary file write for safety)
+    """Appends a single command to the plugin's command journal."""
     try:
-        # Read existing commands (or initialize empty list)
-        if queue_path.exists() and queue_path.stat().st_size > 0:
-            with open(queue_path, 'r') as f:
-                commands = json.load(f)
-        else:
-            commands = []
-            
-        commands.append(new_command)
-        
-        # Write to a temporary file first, then rename (atomic write for integrity)
-        temp_path = queue_path.with_suffix('.tmp')
-        with open(temp_path, 'w') as f:
-            json.dump(commands, f, indent=2)
-            
-        os.rename(temp_path, queue_path)
-        
+        queue_server_commands([command])
     except Exception as e:
-        print(f"CRITICAL: Failed to write command to queue file {queue_path}: {e}")
+        print(f"CRITICAL: Failed to write command to journal {command_journal.directory}: {e}")
         # Log error but do not crash the webhook
 
 
@@ -233,8 +208,8 @@ def parse_donation_data(data: Dict[str, Any]) -> Optional[ProcessedDonation]:
 
 # --- Final Webhook Payload Processor ---
 
-async def process_kofi_webhook_payload(data: Dict[str, Any]):
-    """Main function to process any Ko-fi webhook type."""
+async def generate_order_commands(data: Dict[str, Any]) -> List[str]:
+    """Server commands for a Ko-fi webhook payload (raises ValueError for unsupported payloads)."""
     
     webhook_type = data.get('type')
     commands = []
@@ -261,10 +236,30 @@ async def process_kofi_webhook_payload(data: Dict[str, Any]):
     else:
         raise ValueError(f"Webhook type '{webhook_type}' not supported for command generation.")
 
-    # Execute all generated commands
-    for cmd in commands:
-        queue_server_command(cmd)
+    return commands
 
-    return {
-        "message": f"Successfully processed {len(commands)} command(s) for {parse_player_ign(data) or 'unknown player'}."
-    }
+async def process_kofi_webhook_payload(data: Dict[str, Any]):
+    """
+    Main function to process any Ko-fi webhook type.
+    Orders are recorded in the outbox by transaction id; a retried webhook gets
+    the original response back and nothing is queued again.
+    """
+    transaction_id = data.get('kofi_transaction_id') or data.get('message_id')
+    
+    if transaction_id:
+        stored = kofi_outbox.lookup_cached(transaction_id) or await asyncio.to_thread(kofi_outbox.lookup, transaction_id)
+        if stored is not None:
+            return {"message": stored, "duplicate": True}
+    
+    commands = await generate_order_commands(data)
+    message = f"Successfully processed {len(commands)} command(s) for {parse_player_ign(data) or 'unknown player'}."
+    
+    if not transaction_id:
+        # Nothing to deduplicate on; queue directly (one durable journal append)
+        print("WARN: Ko-fi payload has no transaction id; queuing without deduplication.")
+        if commands:
+            await asyncio.to_thread(queue_server_commands, commands)
+        return {"message": message, "duplicate": False}
+    
+    message, duplicate = await kofi_outbox.record(transaction_id, data, commands, message)
+    return {"message": message, "duplicate": duplicate}
@@ -0,0 +1,68 @@
+# backend/app/services/catalog.py
+"""
+Snapshot of the live shop catalog (every offer in save.yml, with item data
+enriched), used by GET /trades/available.
+
+Parsing save.yml and enriching every item is the expensive part, so it is
+done once per save.yml version (see yaml_parser.get_catalog_version) and
+shared by all requests. Stock is not part of the snapshot: it changes far
+more often than the catalog, so it is overlaid from the stock index on the
+page being returned, and a stock update never triggers a rebuild.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from .item_mapping import enrich_item_data
+from .stock import get_stock_count
+from .yaml_parser import extract_all_available_trades, get_catalog_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot:
+    """Enriched available trades, rebuilt only when save.yml changes."""
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+        self._version: Optional[Tuple[int, int]] = None
+        self._trades: Optional[List[Dict[str, Any]]] = None
+
+    async def _build(self) -> List[Dict[str, Any]]:
+        trades = await asyncio.to_thread(extract_all_available_trades)
+        for trade in trades:
+            trade['result'] = await enrich_item_data(trade.get('result'))
+            trade['cost1'] = await enrich_item_data(trade.get('cost1'))
+            if trade.get('cost2'):
+                trade['cost2'] = await enrich_item_data(trade.get('cost2'))
+        return trades
+
+    async def trades(self) -> List[Dict[str, Any]]:
+        """The current snapshot (without stock); rebuilt first if save.yml changed."""
+        version = get_catalog_version()
+        if self._trades is not None and version == self._version:
+            return self._trades
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            version = get_catalog_version()
+            if self._trades is None or version != self._version:
+                trades = await self._build()
+                self._trades, self._version = trades, version
+                logger.info(f"Built catalog snapshot: {len(trades)} trades (save.yml version {version})")
+        return self._trades
+
+
+def with_stock(trade: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A copy of a snapshot trade with `stock_remaining` from the stock index:
+    "UNLIMITED" for admin shops, the offer's count for player shops, or None
+    if the plugin has no stock for it (no container, or not scanned yet).
+    """
+    if trade.get('shop_type') == 'admin':
+        stock = "UNLIMITED"
+    else:
+        stock = get_stock_count(trade.get('shop_uuid'), trade.get('id'))
+    return {**trade, 'stock_remaining': stock}
+
+
+catalog_snapshot = CatalogSnapshot()
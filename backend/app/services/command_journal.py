@@ -0,0 +1,317 @@
+# backend/app/services/command_journal.py
+"""
+Append-only journal of server commands for the WebPerks plugin.
+
+Commands are appended as NDJSON records ({"seq", "id", "command",
+"timestamp"}) to segment files named after their first sequence number
+(commands-<seq>.ndjson). Appends are group-committed: whichever thread
+finds no flush in progress writes everything queued so far and fsyncs once,
+and every caller returns only after its own records are durable.
+
+The consumer (the plugin's CommandQueueReader, or JournalReader below)
+tracks its position in an ack file holding the last sequence number it has
+executed; segments it has fully consumed are deleted when the writer rolls
+over to a new one. Records are never rewritten, so a reader can't lose a
+command the way the old read-and-delete JSON queue could.
+
+The journal assumes a single writing process (the API runs one worker).
+Commands still waiting in the legacy JSON queue (COMMAND_QUEUE_PATH) are
+moved into the journal on startup by migrate_legacy_queue().
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..config import get_settings
+
+settings = get_settings()
+
+SEGMENT_PREFIX = "commands-"
+SEGMENT_SUFFIX = ".ndjson"
+ACK_FILE = "commands.ack"
+SEGMENT_MAX_BYTES = 1024 * 1024
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: Path) -> List[Tuple[int, Path]]:
+    """(first seq, path) of every segment, oldest first."""
+    segments = []
+    if directory.is_dir():
+        for path in directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            stamp = path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if stamp.isdigit():
+                segments.append((int(stamp), path))
+    return sorted(segments)
+
+
+def read_ack(directory: Path) -> int:
+    """Last sequence number the consumer has executed (0 if none)."""
+    try:
+        return int((directory / ACK_FILE).read_text().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_ack(directory: Path, seq: int):
+    """Atomically records `seq` as the last executed sequence number."""
+    path = directory / ACK_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(f"{seq}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_directory(directory: Path):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CommandJournal:
+    """Group-committed appends to the segmented command journal."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = Path(directory) if directory else None
+        self._cond = threading.Condition()
+        self._file = None
+        self._segment_bytes = 0
+        self._next_seq: Optional[int] = None
+        self._pending: List[bytes] = []
+        self._queued_batch = 0   # batch the next appended records will be flushed with
+        self._durable_batch = -1  # last batch known to be on disk
+        self._flushing = False
+        self._failed: Optional[Tuple[int, int, Exception]] = None  # (first, last failed batch, error)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory or Path(settings.COMMAND_JOURNAL_DIR)
+
+    def _open(self):
+        """Opens the newest segment for appending, dropping a torn last line left by a crash."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = list_segments(self.directory)
+        if not segments:
+            self._next_seq = read_ack(self.directory) + 1
+            self._roll(self._next_seq)
+            return
+
+        first_seq, path = segments[-1]
+        data = path.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            print(f"WARN: Dropping {len(data) - end} bytes of incomplete record at the end of {path.name}")
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        last_seq = first_seq - 1
+        if end:
+            last_seq = json.loads(data[:end - 1].rsplit(b"\n", 1)[-1])["seq"]
+        self._next_seq = last_seq + 1
+        self._file = open(path, "ab")
+        self._segment_bytes = end
+
+    def _roll(self, first_seq: int):
+        """Starts a new segment at `first_seq` and deletes the ones the consumer is done with."""
+        if self._file:
+            self._file.close()
+        self._file = open(self.directory / _segment_name(first_seq), "ab")
+        self._segment_bytes = 0
+        _fsync_directory(self.directory)
+        self._prune()
+
+    def _prune(self):
+        """Deletes segments whose every record is at or below the consumer's ack."""
+        acked = read_ack(self.directory)
+        segments = list_segments(self.directory)
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= acked:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"WARN: Could not delete journal segment {path.name}: {e}")
+
+    def append(self, commands: Iterable[str], ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Appends commands and returns their records once they are durable on disk.
+        `ids` optionally gives each record a caller-chosen id (random otherwise).
+        """
+        timestamp = datetime.now(timezone.utc).isoformat()
+        commands = list(commands)
+        ids = list(ids) if ids is not None else [os.urandom(8).hex() for _ in commands]
+        with self._cond:
+            if self._next_seq is None:
+                self._open()
+            records = []
+            for command, record_id in zip(commands, ids):
+                record = {"seq": self._next_seq, "id": record_id, "command": command, "timestamp": timestamp}
+                self._next_seq += 1
+                self._pending.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+                records.append(record)
+            batch = self._queued_batch
+
+            while True:
+                if self._failed and self._failed[0] <= batch <= self._failed[1]:
+                    raise OSError(f"Command journal write failed: {self._failed[2]}")
+                if self._durable_batch >= batch:
+                    return records
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+
+                # Become the leader: flush everything queued so far with one write + fsync
+                self._flushing = True
+                lines, self._pending = self._pending, []
+                flushing_batch = self._queued_batch
+                self._queued_batch += 1
+                try:
+                    self._cond.release()
+                    try:
+                        self._write(lines)
+                    finally:
+                        self._cond.acquire()
+                    self._durable_batch = flushing_batch
+                except Exception as e:
+                    # Records queued behind a torn write can't be trusted either: fail them all
+                    # and reopen (truncating the torn line) on the next append
+                    self._failed = (flushing_batch, self._queued_batch, e)
+                    self._durable_batch = self._queued_batch
+                    self._queued_batch += 1
+                    self._pending = []
+                    self._reset()
+                finally:
+                    self._flushing = False
+                    self._cond.notify_all()
+
+    def _write(self, lines: List[bytes]):
+        """Writes a batch of lines, rolling segments at SEGMENT_MAX_BYTES. Called by one leader at a time."""
+        data = b"".join(lines)
+        if lines and self._segment_bytes and self._segment_bytes + len(data) > SEGMENT_MAX_BYTES:
+            self._roll(json.loads(lines[0])["seq"])
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._segment_bytes += len(data)
+
+    def _reset(self):
+        if self._file:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        self._next_seq = None
+
+    def record_ids(self) -> Dict[str, int]:
+        """{record id: seq} for every record still in the journal (segments not yet pruned)."""
+        found = {}
+        for _, path in list_segments(self.directory):
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            for line in data[:data.rfind(b"\n") + 1].splitlines():
+                record = json.loads(line)
+                found[record["id"]] = record["seq"]
+        return found
+
+    def close(self):
+        with self._cond:
+            self._reset()
+
+
+def migrate_legacy_queue(journal: CommandJournal, queue_path: Optional[str] = None) -> int:
+    """
+    Moves commands left in the old JSON queue file ([{"id", "command",
+    "timestamp"}, ...]) into the journal, keeping their ids, then renames the
+    file to *.migrated so the plugin can't run them a second time. Commands
+    whose id is already in the journal (a previous run crashed before the
+    rename) are skipped. Returns the number of commands appended.
+    """
+    path = Path(queue_path or settings.COMMAND_QUEUE_PATH)
+    if not path.exists():
+        return 0
+    try:
+        with open(path, "r") as f:
+            queued = json.load(f) if path.stat().st_size > 0 else []
+    except (OSError, ValueError) as e:
+        # Leave the file alone so the commands can be recovered by hand
+        print(f"ERROR: Could not read legacy command queue {path}: {e}")
+        return 0
+
+    existing = journal.record_ids()
+    commands, ids = [], []
+    for entry in queued:
+        command = entry.get("command") if isinstance(entry, dict) else None
+        if not command:
+            continue
+        record_id = entry.get("id") or os.urandom(8).hex()
+        if record_id in existing:
+            continue
+        commands.append(command)
+        ids.append(record_id)
+    if commands:
+        journal.append(commands, ids)
+    os.replace(path, path.with_name(path.name + ".migrated"))
+    print(f"Migrated {len(commands)} commands from legacy queue {path} into the command journal")
+    return len(commands)
+
+
+class JournalReader:
+    """
+    Python stand-in for the plugin's CommandQueueReader: reads records after
+    the acked sequence number, in order, and acks what it has executed.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or settings.COMMAND_JOURNAL_DIR)
+        self.position = read_ack(self.directory)  # last seq handed out
+        self._segment: Optional[Path] = None
+        self._offset = 0
+
+    def read(self, max_records: int = 1000) -> List[Dict[str, Any]]:
+        """Up to `max_records` complete records after the current position."""
+        records: List[Dict[str, Any]] = []
+        segments = list_segments(self.directory)
+        for index, (first_seq, path) in enumerate(segments):
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first is not None and next_first - 1 <= self.position:
+                continue  # Fully consumed
+            if path != self._segment:
+                self._segment, self._offset = path, 0
+            try:
+                with open(path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            end = data.rfind(b"\n") + 1  # Ignore a line still being written
+            consumed = 0
+            for line in data[:end].splitlines(keepends=True):
+                consumed += len(line)
+                record = json.loads(line)
+                if record["seq"] <= self.position:
+                    continue
+                records.append(record)
+                self.position = record["seq"]
+                if len(records) >= max_records:
+                    self._offset += consumed
+                    return records
+            self._offset += consumed
+            if next_first is None:
+                break
+        return records
+
+    def ack(self, seq: Optional[int] = None):
+        """Records everything up to `seq` (default: all records read so far) as executed."""
+        write_ack(self.directory, self.position if seq is None else seq)
+
+
+command_journal = CommandJournal()
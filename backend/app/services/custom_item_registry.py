@@ -1,5 +1,5 @@
 # backend/app/services/custom_item_registry.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
 import json 
 
@@ -13,6 +13,7 @@ CUSTOM_ITEM_REGISTRY = {
         "display_name": "Echo Shard",
         # Lore from YAML - we'll do a flexible match
         "lore_fragment": '[{color:"gold",italic:0b,text:"Official Minted Currency of Peaceful Haven"}]',
+        "lore_text": "Official Minted Currency of Peaceful Haven",
         
         # 2. Web/Display Data
         "web_name": "Haven Crest",
@@ -21,6 +22,21 @@ CUSTOM_ITEM_REGISTRY = {
     },
 }
 
+def _lore_lines(lore: Any) -> List[str]:
+    """
+    Normalizes lore to a list of strings. Lore arrives as one SNBT/JSON string
+    (save.yml components, legacy metadata), or as a list of strings or text
+    component dicts.
+    """
+    if not lore:
+        return []
+    if isinstance(lore, str):
+        return [lore]
+    if isinstance(lore, (list, tuple)):
+        return [line if isinstance(line, str) else json.dumps(line) for line in lore]
+    return [str(lore)]
+
+
 def lookup_custom_item(item_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Looks up an item in the custom registry based on its type and NBT data.
@@ -29,41 +45,23 @@ def lookup_custom_item(item_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
     
     item_type = item_data.get('type', '').lower()
-    item_lore = item_data.get('lore')
-    
-   
-    
     if not item_type:
         return None
 
+    lore_lines = _lore_lines(item_data.get('lore'))
+
     for key, registry_item in CUSTOM_ITEM_REGISTRY.items():
-        registry_type = registry_item["type"].lower()
         registry_lore = registry_item.get("lore_fragment", "")
+        registry_text = registry_item.get("lore_text", "")
         
-        # 2. Lore Match (The SOLE NBT Validator)
-        if registry_lore:
-            if not item_lore:
-                continue
-            
-            # The item_lore is the string from the JSON: "[{color:"gold",italic:0b,text:"..."}]"
-            # We simply check if the registry fragment is a substring of the single item_lore string.
-            if isinstance(item_lore, str): # <-- Ensure we check a string against a string
-                if registry_lore in item_lore:
-                    return registry_item
-                
-                # Check 1: Simple text fragment
-                if registry_lore in line_str: 
-                    is_lore_match = True
-                    break
-                
-                # Check 2 (Fallback if simple text fails): check for single-quoted version
-                # The text may be double-quoted in the log but single-quoted in str(dict)
-                if f"'{registry_lore}'" in line_str:
-                    is_lore_match = True
-                    break
-                
+        # Lore Match (The SOLE NBT Validator)
+        if registry_lore or registry_text:
+            # Check 1: the exact SNBT fragment; Check 2: just the lore text, whatever the encoding
+            is_lore_match = any(
+                (registry_lore and registry_lore in line) or (registry_text and registry_text in line)
+                for line in lore_lines
+            )
             if not is_lore_match:
-                # Your log shows this is the path being taken!
                 continue
         
         # All checks passed: Success
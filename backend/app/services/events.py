@@ -0,0 +1,184 @@
+# backend/app/services/events.py
+"""
+Live change events for the frontend (served as server-sent events).
+
+Each source has exactly one producer, whatever the number of connected
+clients:
+  - status:  the server status poller's listener, published only when the
+             online flag, player list, version or MOTD actually change
+  - trades:  one tail of the trade log from its rowid watermark
+  - stock:   the stock index's reload listener (shops whose stock changed)
+  - catalog: the file watcher on save.yml (new catalog version)
+
+An event is serialized once and the same frame is put on every subscribed
+client's queue. Queues are bounded; a client that falls behind loses its
+oldest events rather than holding memory or slowing the others down.
+"""
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from ..config import get_settings
+from ..database import get_shopkeepers_session
+from .file_watcher import file_watcher
+from .server_status import server_status_poller
+from .stock import stock_index, StockIndex
+from .trade_log import get_trade_log_watermark, fetch_trades_after
+from .yaml_parser import get_catalog_version
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EVENT_TOPICS = ("status", "trades", "stock", "catalog")
+CLIENT_QUEUE_SIZE = 64
+HEARTBEAT_SECONDS = 15
+TRADE_TAIL_INTERVAL_SECONDS = 2
+TRADE_TAIL_BATCH = 500
+
+
+def _frame(topic: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One SSE frame."""
+    lines = [f"event: {topic}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscriber:
+    """One connected client: its topics and a bounded queue of pending frames."""
+
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, frame: str):
+        if self.queue.full():
+            # Slow client: drop its oldest event instead of blocking the producer
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class EventBroker:
+    """Fans events from the per-source producers out to subscribers."""
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_id = 0
+        # Latest frame per topic, sent to new subscribers so they start in sync
+        self._latest: Dict[str, str] = {}
+        self._status_key: Optional[Tuple] = None
+        self._trade_watermark: Optional[int] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return any(topic in subscriber.topics for subscriber in self._subscribers)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(set(topics))
+        for topic in EVENT_TOPICS:
+            if topic in subscriber.topics and topic in self._latest:
+                subscriber.offer(self._latest[topic])
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, topic: str, data: Any, retain: bool = False):
+        """Queues an event for every subscriber of `topic`. Safe to call from any thread."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._publish, topic, data, retain)
+        except RuntimeError:
+            pass  # Loop closed during shutdown
+
+    def _publish(self, topic: str, data: Any, retain: bool):
+        self._next_id += 1
+        frame = _frame(topic, data, self._next_id)
+        if retain:
+            self._latest[topic] = frame
+        for subscriber in self._subscribers:
+            if topic in subscriber.topics:
+                subscriber.offer(frame)
+
+    # --- producers ---
+
+    def on_status(self, snapshot: Dict[str, Any], epoch: float):
+        players = snapshot.get("players") or {}
+        key = (
+            snapshot.get("online"),
+            players.get("online"),
+            players.get("max"),
+            tuple(players.get("sample") or ()),
+            snapshot.get("version"),
+            str(snapshot.get("motd")),
+        )
+        if key == self._status_key:
+            return
+        self._status_key = key
+        self.publish("status", snapshot, retain=True)
+
+    def on_stock_change(self, old: StockIndex, new: StockIndex):
+        changed = new.changed_shops(old)
+        if changed:
+            self.publish("stock", {"shops": sorted(changed)})
+
+    def on_catalog_change(self):
+        version = get_catalog_version()
+        self.publish("catalog", {"version": list(version) if version else None}, retain=True)
+
+    def _tail_trades(self, listening: bool) -> List[Dict[str, Any]]:
+        """New trade-log rows since the last call (just advances the watermark when nobody listens)."""
+        with get_shopkeepers_session() as db:
+            if self._trade_watermark is None or not listening:
+                self._trade_watermark = get_trade_log_watermark(db)
+                return []
+            rows = fetch_trades_after(db, self._trade_watermark, limit=TRADE_TAIL_BATCH)
+            if rows:
+                self._trade_watermark = rows[-1].rowid
+            return [dict(row._mapping) for row in rows]
+
+    async def run(self):
+        """Background job: binds to the running loop, then tails the trade log."""
+        self._loop = asyncio.get_running_loop()
+        version = get_catalog_version()
+        self._latest["catalog"] = _frame("catalog", {"version": list(version) if version else None})
+        while True:
+            try:
+                trades = await asyncio.to_thread(self._tail_trades, self.has_subscribers("trades"))
+                if trades:
+                    self.publish("trades", {"trades": trades})
+                    if len(trades) == TRADE_TAIL_BATCH:
+                        continue  # More waiting; catch up without sleeping
+            except Exception as e:
+                print(f"ERROR tailing trade log for events: {e}")
+            await asyncio.sleep(TRADE_TAIL_INTERVAL_SECONDS)
+
+    async def stream(self, topics: Iterable[str]):
+        """SSE body for one client: its events, with a comment heartbeat to keep proxies from timing out."""
+        subscriber = self.subscribe(topics)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+
+event_broker = EventBroker()
+server_status_poller.add_listener(event_broker.on_status)
+stock_index.add_listener(event_broker.on_stock_change)
+file_watcher.watch(settings.SHOPKEEPERS_SAVE, event_broker.on_catalog_change)
@@ -0,0 +1,337 @@
+# backend/app/services/file_watcher.py
+"""
+Shared watcher for the server's data files (bans, usercache, stock, save.yml,
+stats rankings).
+
+Modules register a path and a reload callback at import time; once started
+(in the app lifespan) the watcher uses inotify where available and falls
+back to stat polling otherwise. A file is watched both through its directory
+(creates and atomic replaces) and through its own inode (in-place writes,
+which are the only events a bind-mounted single file produces); the inode
+watch is re-added whenever the file is replaced. A path that doesn't exist
+yet is watched through its parent until it appears. Because inotify can
+still miss changes (e.g. on some network or overlay mounts), every path is
+also stat-polled at a slow interval as a backstop. Bursts of events are
+debounced, and callbacks run in a worker thread, one at a time per path.
+
+WatchedValue wraps the common case: an in-memory structure loaded from one
+file, built off to the side on reload and swapped in with a single
+assignment, so readers always see either the old or the new structure.
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+POLL_INTERVAL_SECONDS = 2.0
+# How often paths covered by inotify are also stat-checked, in case an event was missed
+BACKSTOP_POLL_SECONDS = 30.0
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                 | IN_DELETE_SELF | IN_MOVE_SELF)
+# The watched inode itself went away (deleted, replaced or unmounted): its watch has to be re-added
+IN_SELF_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+IN_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+T = TypeVar("T")
+
+
+class Watch:
+    """One registered path and its reload callback."""
+
+    def __init__(self, path: Path, callback: Callable[[], None], debounce: float):
+        self.path = path
+        self.callback = callback
+        self.debounce = debounce
+        self.is_dir = False
+        self.signature: Optional[Tuple[int, int, int, int]] = None
+        self.wds: List[int] = []
+        self.polled = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.running = False
+        self.pending = False
+
+    def stat_signature(self) -> Optional[Tuple[int, int, int, int]]:
+        """(inode, count, newest mtime_ns, total size) of the file, or of a directory's entries."""
+        try:
+            stat = os.stat(self.path)
+            if not self.path.is_dir():
+                return stat.st_ino, 1, stat.st_mtime_ns, stat.st_size
+            count = newest = total = 0
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    stat = entry.stat()
+                    count += 1
+                    newest = max(newest, stat.st_mtime_ns)
+                    total += stat.st_size
+            return stat.st_ino, count, newest, total
+        except OSError:
+            return None
+
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), IN_WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Drains pending events as (wd, mask, file name) tuples."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset + IN_EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_length = IN_EVENT_HEADER.unpack_from(data, offset)
+                offset += IN_EVENT_HEADER.size
+                name = data[offset:offset + name_length].rstrip(b"\0")
+                offset += name_length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Debounced change notifications for registered files and directories."""
+
+    def __init__(self):
+        self._watches: List[Watch] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inotify: Optional[Inotify] = None
+        # inotify watch descriptor -> [(watch, file name in the directory, or None for the watched path itself)]
+        self._by_wd: Dict[int, List[Tuple[Watch, Optional[str]]]] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def watch(self, path: str, callback: Callable[[], None], debounce: float = DEFAULT_DEBOUNCE_SECONDS) -> Watch:
+        """Registers `callback` to run (in a worker thread) after `path` changes."""
+        watch = Watch(Path(path), callback, debounce)
+        self._watches.append(watch)
+        if self._loop is not None:
+            self._attach(watch)
+        return watch
+
+    def watched(self, path: str, loader: Callable[[Path], T], default: T, debounce: float = DEFAULT_DEBOUNCE_SECONDS) -> "WatchedValue[T]":
+        """A WatchedValue for `path`, reloaded whenever the file changes."""
+        value = WatchedValue(Path(path), loader, default)
+        self.watch(path, value.reload, debounce)
+        return value
+
+    async def start(self):
+        """Starts watching every registered path (inotify plus a slow backstop poll, or polling only)."""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._inotify = Inotify()
+            self._loop.add_reader(self._inotify.fd, self._on_inotify)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}); polling data files every {POLL_INTERVAL_SECONDS}s")
+            self._inotify = None
+        for watch in self._watches:
+            self._attach(watch)
+        self._poll_task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._inotify:
+            self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        for watch in self._watches:
+            if watch.timer:
+                watch.timer.cancel()
+            watch.wds.clear()
+        self._by_wd.clear()
+        self._loop = None
+
+    def _attach(self, watch: Watch):
+        """(Re)adds the inotify watches for a path, or marks it for polling if that isn't possible."""
+        self._detach(watch)
+        was_polled = watch.polled
+        watch.is_dir = watch.path.is_dir()
+        watch.signature = watch.stat_signature()
+        watch.polled = True
+        if not self._inotify:
+            return
+        try:
+            if not watch.is_dir:
+                # Creates, deletes and atomic replaces of the file show up on its directory
+                self._add_wd(watch, watch.path.parent, watch.path.name)
+            if watch.path.exists():
+                # In-place writes to the file itself, or entry changes of a watched directory
+                self._add_wd(watch, watch.path, None)
+            watch.polled = False
+        except OSError as e:
+            self._detach(watch)
+            if not was_polled:
+                logger.warning(f"Falling back to polling for {watch.path}: {e}")
+
+    def _add_wd(self, watch: Watch, path: Path, file_name: Optional[str]):
+        wd = self._inotify.add_watch(path)
+        self._by_wd.setdefault(wd, []).append((watch, file_name))
+        watch.wds.append(wd)
+
+    def _detach(self, watch: Watch):
+        for wd in watch.wds:
+            remaining = [entry for entry in self._by_wd.get(wd, ()) if entry[0] is not watch]
+            if remaining:
+                self._by_wd[wd] = remaining
+            else:
+                self._by_wd.pop(wd, None)
+        watch.wds.clear()
+
+    def _on_inotify(self):
+        reattach: List[Watch] = []
+        for wd, mask, name in self._inotify.read_events():
+            for watch, file_name in self._by_wd.get(wd, ()):
+                if mask & IN_SELF_GONE:
+                    # The watched inode is gone (the file was replaced or removed): watch whatever is there now
+                    reattach.append(watch)
+                elif file_name is None or file_name == name:
+                    if file_name is not None and mask & (IN_CREATE | IN_MOVED_TO):
+                        # A new inode at the path (atomic replace, or a path that didn't exist before)
+                        reattach.append(watch)
+                else:
+                    continue
+                self._schedule(watch)
+        for watch in dict.fromkeys(reattach):
+            self._attach(watch)
+
+    async def _poll(self):
+        """Stat-polls paths inotify can't cover every tick, and all other paths every BACKSTOP_POLL_SECONDS."""
+        backstop_every = max(1, round(BACKSTOP_POLL_SECONDS / POLL_INTERVAL_SECONDS))
+        tick = 0
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            tick += 1
+            backstop = tick % backstop_every == 0
+            for watch in self._watches:
+                if not (watch.polled or backstop):
+                    continue
+                signature = await asyncio.to_thread(watch.stat_signature)
+                if signature != watch.signature:
+                    if not watch.polled:
+                        logger.info(f"Change to {watch.path} was missed by inotify; re-watching it")
+                    # Picks up a replaced inode or a path that now exists (and upgrades polling to inotify)
+                    self._attach(watch)
+                    self._schedule(watch)
+
+    def _schedule(self, watch: Watch):
+        """Debounce: (re)start the watch's timer; the callback runs once events go quiet."""
+        if watch.timer:
+            watch.timer.cancel()
+        watch.timer = self._loop.call_later(watch.debounce, lambda: asyncio.ensure_future(self._fire(watch)))
+
+    async def _fire(self, watch: Watch):
+        watch.timer = None
+        if watch.running:
+            watch.pending = True
+            return
+        watch.running = True
+        try:
+            while True:
+                watch.pending = False
+                # Record what this reload sees, so the backstop poll doesn't report the same change again
+                watch.signature = await asyncio.to_thread(watch.stat_signature)
+                try:
+                    await asyncio.to_thread(watch.callback)
+                except Exception as e:
+                    logger.error(f"Reload after change to {watch.path} failed: {e}", exc_info=True)
+                if not watch.pending:
+                    break
+        finally:
+            watch.running = False
+
+
+class WatchedValue(Generic[T]):
+    """An in-memory structure loaded from one file; loaded on first use, swapped on change."""
+
+    def __init__(self, path: Path, loader: Callable[[Path], T], default: T):
+        self.path = path
+        self._loader = loader
+        self._default = default
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._listeners: List[Callable[[T, T], None]] = []
+
+    def add_listener(self, listener: Callable[[T, T], None]):
+        """Registers a callback invoked as (old, new) after each reload that swapped in a new structure."""
+        self._listeners.append(listener)
+
+    def get(self) -> T:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._swap()
+        return self._value
+
+    def reload(self):
+        with self._lock:
+            old, loaded = self._value, self._loaded
+            if not self._swap() or not loaded:
+                return
+            new = self._value
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.error(f"Listener for {self.path} failed: {e}", exc_info=True)
+
+    def _swap(self) -> bool:
+        """Builds the new structure, then replaces the old one in a single assignment. False if kept the old one."""
+        try:
+            if self.path.exists():
+                value = self._loader(self.path)
+            else:
+                logger.warning(f"Watched file not found at {self.path}")
+                # Briefly missing (e.g. between delete and create of a rewrite): keep serving the last structure
+                if self._loaded:
+                    return False
+                value = self._default
+        except Exception as e:
+            # Keep serving the previous structure if the new file can't be read (e.g. mid-write)
+            logger.error(f"Failed to load {self.path}: {e}")
+            if self._loaded:
+                return False
+            value = self._default
+        self._value = value
+        self._loaded = True
+        return True
+
+
+file_watcher = FileWatcher()
@@ -0,0 +1,178 @@
+# backend/app/services/http_client.py
+"""
+Application-wide outbound HTTP client (Microsoft/Xbox/Mojang login chain,
+item data API).
+
+One pooled httpx.AsyncClient is created in the app lifespan and shared, so
+connections (and their TLS sessions) are kept alive between calls and, where
+the `h2` package is installed, multiplexed over HTTP/2. Every call gets the
+timeout configured for its host, transient failures are retried a bounded
+number of times with jittered exponential backoff, and per-upstream latency
+is recorded for /metrics. Requests that never reached the upstream
+(connection failures) are retried for any method; dropped connections and
+429/5xx responses only for idempotent requests (GET etc., or a POST that
+passes idempotent=True), since the upstream may already have acted on them.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)  # Login chain (Microsoft, Xbox, Mojang): small, fast responses
+# Per-host overrides of DEFAULT_TIMEOUT; the item list is a large download
+HOST_TIMEOUTS: Dict[str, httpx.Timeout] = {
+    "minecraft-api.vercel.app": httpx.Timeout(30.0, connect=5.0),
+}
+POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0)
+
+MAX_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 4.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Failures where the request never reached the upstream, so any method is safe to resend
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Failures after the request may have been sent (e.g. the connection dropped mid-response)
+IDEMPOTENT_RETRY_EXCEPTIONS = RETRY_EXCEPTIONS + (httpx.RemoteProtocolError,)
+LATENCY_SAMPLES = 256  # Recent latencies kept per upstream for percentiles
+
+
+class UpstreamMetrics:
+    """Counters and recent latencies for one upstream host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses: Dict[int, int] = {}
+        self.total_seconds = 0.0
+        self.recent: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def observe(self, seconds: float, status: Optional[int]):
+        self.requests += 1
+        self.total_seconds += seconds
+        self.recent.append(seconds)
+        if status is None:
+            self.errors += 1
+        else:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1) if recent else None
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "latency_ms": {
+                "avg": round(self.total_seconds / self.requests * 1000, 1) if self.requests else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(recent[-1] * 1000, 1) if recent else None,
+            },
+        }
+
+
+class HttpClient:
+    """Shared pooled client with per-host timeouts, retries and latency metrics."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._metrics: Dict[str, UpstreamMetrics] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+            if not HTTP2_AVAILABLE:
+                logger.info("h2 not installed; outbound HTTP uses HTTP/1.1 keep-alive only")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Used outside the app lifespan (e.g. a script); create the pool on first use
+            self._client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+        return self._client
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def request(self, method: str, url: str, retries: int = MAX_RETRIES,
+                      idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the shared pool. Connection failures are retried
+        up to `retries` times; if the request is idempotent (by default: by
+        method), so are dropped connections and 429/5xx responses. The last
+        response is returned (or the last exception raised) once retries run out.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_exceptions = IDEMPOTENT_RETRY_EXCEPTIONS if idempotent else RETRY_EXCEPTIONS
+        host = urlsplit(url).hostname or ""
+        metrics = self._metrics.setdefault(host, UpstreamMetrics())
+        kwargs.setdefault("timeout", HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT))
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except retry_exceptions as e:
+                metrics.observe(time.perf_counter() - started, None)
+                if attempt >= retries:
+                    raise
+                logger.warning(f"{method} {host} failed ({type(e).__name__}); retrying")
+            except httpx.HTTPError:
+                metrics.observe(time.perf_counter() - started, None)
+                raise
+            else:
+                metrics.observe(time.perf_counter() - started, response.status_code)
+                if not idempotent or response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                logger.warning(f"{method} {host} returned {response.status_code}; retrying")
+
+            metrics.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-upstream request counts, retries, status codes and latency percentiles."""
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "upstreams": {host: metrics.summary() for host, metrics in sorted(self._metrics.items())},
+        }
+
+
+http_client = HttpClient()
@@ -1,8 +1,9 @@
 import httpx
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..config import get_settings
+from .http_client import http_client
 from .custom_item_registry import lookup_custom_item
 
 settings = get_settings()
@@ -12,36 +13,39 @@ MINECRAFT_API_URL = "https://minecraft-api.vercel.app/api/items"
 
 ITEM_MAP_CACHE: Dict[str, Any] = {}
 
-def sync_fetch_item_data() -> Dict[str, Any]:
-    """Synchronous function to fetch the item data and map it to Minecraft IDs."""
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(MINECRAFT_API_URL)
-            response.raise_for_status()
-            items_list = response.json()
-            
-            item_map = {}
-            for item in items_list:
-                namespaced_id = item.get('namespacedId', '').lower() # e.g., 'acacia_boat'
-                if not namespaced_id:
-                    continue
+def build_item_map(items_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Maps the item API's list to Minecraft IDs (both 'minecraft:acacia_boat' and 'acacia_boat')."""
+    item_map = {}
+    for item in items_list:
+        namespaced_id = item.get('namespacedId', '').lower() # e.g., 'acacia_boat'
+        if not namespaced_id:
+            continue
 
-                # The full Minecraft ID (e.g., 'minecraft:acacia_boat')
-                full_id = f"minecraft:{namespaced_id}" 
-                
-                # We need to map the ID to a standardized object containing the name and image URL.
-                standard_item_data = {
-                    "name": item.get('name'), 
-                    "icon_url": item.get('image'), # The full URL, e.g., .../acacia_boat.png
-                }
+        # The full Minecraft ID (e.g., 'minecraft:acacia_boat')
+        full_id = f"minecraft:{namespaced_id}" 
+        
+        # We need to map the ID to a standardized object containing the name and image URL.
+        standard_item_data = {
+            "name": item.get('name'), 
+            "icon_url": item.get('image'), # The full URL, e.g., .../acacia_boat.png
+        }
 
-                # 1. Store by FULL ID (what comes from the YAML): 'minecraft:acacia_boat'
-                item_map[full_id] = standard_item_data
-                
-                # 2. Store by SHORT ID (the namespacedId): 'acacia_boat'
-                item_map[namespaced_id] = standard_item_data
-            
-            return item_map
+        # 1. Store by FULL ID (what comes from the YAML): 'minecraft:acacia_boat'
+        item_map[full_id] = standard_item_data
+        
+        # 2. Store by SHORT ID (the namespacedId): 'acacia_boat'
+        item_map[namespaced_id] = standard_item_data
+    
+    return item_map
+
+async def fetch_item_data() -> Dict[str, Any]:
+    """Fetches the item data through the shared HTTP client and maps it to Minecraft IDs."""
+    try:
+        response = await http_client.get(MINECRAFT_API_URL)
+        response.raise_for_status()
+        items_list = response.json()
+        # Mapping a few thousand entries is quick, but keep it off the event loop anyway
+        return await asyncio.to_thread(build_item_map, items_list)
             
     except httpx.HTTPStatusError as e:
         print(f"ERROR: Failed to fetch item data: HTTP Status {e.response.status_code}")
@@ -51,10 +55,10 @@ def sync_fetch_item_data() -> Dict[str, Any]:
     return {}
 
 async def load_item_map_cache():
-    """Populates the global cache using a separate thread."""
+    """Populates the global cache from the item data API."""
     global ITEM_MAP_CACHE
     print("Pre-loading Minecraft item data from external API...")
-    ITEM_MAP_CACHE = await asyncio.to_thread(sync_fetch_item_data)
+    ITEM_MAP_CACHE = await fetch_item_data()
     print(f"✓ Loaded {len(ITEM_MAP_CACHE)} item definitions.")
 
 def get_item_info(item_id: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,188 @@
+# backend/app/services/kofi_outbox.py
+"""
+Durable, idempotent outbox for Ko-fi orders.
+
+Each webhook is recorded once, keyed by its Ko-fi transaction id, together
+with the commands generated for it. Ko-fi retries deliveries, so a repeated
+transaction id is answered with the stored response: the commands are not
+regenerated or queued again. Known ids are kept in memory, so a duplicate
+costs a dict lookup.
+
+Recording goes through the website writer (see website_writer.py), which
+applies writes one batch at a time, so two concurrent deliveries of the
+same transaction can't both be recorded. A drain task then appends pending
+commands to the plugin's command journal in batches (one fsync per batch)
+and marks them with their journal sequence numbers.
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from ..database import get_website_session
+from ..models.database import KofiOrder, KofiCommand
+from .command_journal import command_journal
+from .website_writer import website_writer
+
+DRAIN_BATCH = 500
+DRAIN_INTERVAL_SECONDS = 30  # Fallback sweep; new orders trigger a drain right away
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def journal_id(transaction_id: str, position: int) -> str:
+    """Journal record id of an order's command; lets a drain interrupted by a crash skip what made it in."""
+    return f"kofi:{transaction_id}:{position}"
+
+
+class KofiOutbox:
+    """Ko-fi orders and their commands in the website DB, drained into the command journal."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known: Dict[str, str] = {}  # transaction id -> response message
+        self._wakeup: Optional[asyncio.Event] = None
+        self._recovered = False
+
+    def lookup_cached(self, transaction_id: str) -> Optional[str]:
+        """The stored response for a transaction seen by this process, without touching the DB."""
+        return self._known.get(transaction_id)
+
+    def lookup(self, transaction_id: str) -> Optional[str]:
+        """The stored response for an already recorded transaction, or None."""
+        message = self._known.get(transaction_id)
+        if message is not None:
+            return message
+        with get_website_session() as db:
+            message = db.execute(
+                select(KofiOrder.message).where(KofiOrder.transaction_id == transaction_id)
+            ).scalar_one_or_none()
+        if message is not None:
+            with self._lock:
+                self._known[transaction_id] = message
+        return message
+
+    async def record(self, transaction_id: str, data: Dict[str, Any], commands: List[str], message: str) -> Tuple[str, bool]:
+        """
+        Records an order and its commands unless the transaction is already known.
+        Returns (response message, whether it was a duplicate).
+        """
+        def write(db: Session) -> Tuple[str, bool]:
+            existing = db.get(KofiOrder, transaction_id)
+            if existing is not None:
+                return existing.message, True
+            order = KofiOrder(
+                transaction_id=transaction_id,
+                type=data.get('type'),
+                from_name=data.get('from_name'),
+                payload=json.dumps(data),
+                message=message,
+                received_at=_utcnow(),
+                delivered_at=None if commands else _utcnow(),
+            )
+            order.commands = [KofiCommand(position=i, command=command) for i, command in enumerate(commands)]
+            db.add(order)
+            return message, False
+
+        stored, duplicate = await website_writer.submit(write)
+        with self._lock:
+            self._known[transaction_id] = stored
+        if not duplicate:
+            self.notify()
+        return stored, duplicate
+
+    def notify(self):
+        """Wakes the drain task."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pending(self) -> List[Tuple[int, str, int, str]]:
+        """(command id, transaction id, position, command) of the oldest undelivered commands."""
+        with get_website_session() as db:
+            return [tuple(row) for row in db.execute(
+                select(KofiCommand.id, KofiCommand.transaction_id, KofiCommand.position, KofiCommand.command)
+                .where(KofiCommand.journal_seq.is_(None))
+                .order_by(KofiCommand.id)
+                .limit(DRAIN_BATCH)
+            ).all()]
+
+    @staticmethod
+    def _mark_queued(queued: Dict[int, int], transaction_ids: List[str]):
+        """Writer operation: store journal seqs, then stamp orders whose commands are all queued."""
+        def write(db: Session):
+            now = _utcnow()
+            db.execute(update(KofiCommand), [
+                {"id": command_id, "journal_seq": seq, "queued_at": now} for command_id, seq in queued.items()
+            ])
+            for transaction_id in transaction_ids:
+                remaining = db.execute(
+                    select(KofiCommand.id)
+                    .where(KofiCommand.transaction_id == transaction_id, KofiCommand.journal_seq.is_(None))
+                    .limit(1)
+                ).first()
+                if remaining is None:
+                    db.execute(update(KofiOrder).where(KofiOrder.transaction_id == transaction_id).values(delivered_at=now))
+        return write
+
+    async def drain(self) -> int:
+        """Appends pending commands to the command journal in batches; returns how many were queued."""
+        total = 0
+        while True:
+            pending = await asyncio.to_thread(self._pending)
+            if not pending:
+                return total
+
+            already: Dict[str, int] = {}
+            if not self._recovered:
+                # A previous drain may have reached the journal but not the DB before a restart
+                already = await asyncio.to_thread(command_journal.record_ids)
+                self._recovered = True
+
+            queued: Dict[int, int] = {}
+            to_append = []
+            for command_id, transaction_id, position, command in pending:
+                record_id = journal_id(transaction_id, position)
+                if record_id in already:
+                    queued[command_id] = already[record_id]
+                else:
+                    to_append.append((command_id, record_id, command))
+            transaction_ids = sorted({transaction_id for _, transaction_id, _, _ in pending})
+            try:
+                if to_append:
+                    records = await asyncio.to_thread(
+                        command_journal.append,
+                        [command for _, _, command in to_append],
+                        [record_id for _, record_id, _ in to_append],
+                    )
+                    for (command_id, _, _), record in zip(to_append, records):
+                        queued[command_id] = record["seq"]
+                await website_writer.submit(self._mark_queued(queued, transaction_ids))
+            except Exception:
+                # The commands may be in the journal without the DB knowing: the next drain
+                # has to check the journal again instead of appending them a second time
+                self._recovered = False
+                raise
+            total += len(queued)
+            if len(pending) < DRAIN_BATCH:
+                return total
+
+    async def run(self):
+        """Background job: drain whenever an order is recorded, and every DRAIN_INTERVAL_SECONDS."""
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"ERROR draining Ko-fi outbox: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=DRAIN_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+kofi_outbox = KofiOutbox()
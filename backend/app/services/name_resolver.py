@@ -0,0 +1,133 @@
+# backend/app/services/name_resolver.py
+"""
+One place to turn player UUIDs into names.
+
+Sources, in order of preference:
+  1. usercache.json (the server's current name for a player)
+  2. names seen in the trade log (buyer and shop owner columns, latest wins)
+  3. owner names stored with Shopkeepers shops in save.yml
+
+Both files are reloaded by the file watcher when they change.
+
+UUIDs are normalized (no dashes, lowercase), so dashed and undashed forms of
+the same player resolve alike. Use resolve_names() to resolve a whole
+response in one call.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from ..config import get_settings
+from .trade_rollups import trade_rollups
+from .yaml_parser import load_shops
+from .file_watcher import file_watcher
+
+settings = get_settings()
+
+
+def uuid_key(uuid: str) -> str:
+    """Normalized form of a UUID: no dashes, lowercase."""
+    return uuid.replace('-', '').lower()
+
+
+def dashed_uuid(key: str) -> str:
+    """Dashed form of a normalized (32 hex digit) UUID."""
+    return f"{key[:8]}-{key[8:12]}-{key[12:16]}-{key[16:20]}-{key[20:]}"
+
+
+def _read_usercache(path: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """usercache.json as ({lowercase uuid: name}, {uuid key: name})."""
+    by_uuid, by_key = {}, {}
+    with open(path, 'r', encoding='utf-8') as f:
+        # usercache is a list of dicts: {'name', 'uuid', 'expiresOn'}
+        for item in json.load(f):
+            uuid = item.get('uuid', '').lower()
+            name = item.get('name')
+            if uuid and name:
+                by_uuid[uuid] = name
+                by_key[uuid_key(uuid)] = name
+    return by_uuid, by_key
+
+
+def _read_shop_owners(path: Path) -> Dict[str, str]:
+    """{uuid key: owner name} from the Shopkeepers save file."""
+    return {
+        uuid_key(shop["owner_uuid"]): shop["owner_name"]
+        for shop in load_shops()
+        if shop.get("owner_uuid") and shop.get("owner_name")
+    }
+
+
+class NameResolver:
+    """Merged UUID -> name lookups over usercache, the trade log and Shopkeepers owners."""
+
+    def __init__(self):
+        # Reloaded by the file watcher whenever usercache.json / save.yml change
+        self._usercache = file_watcher.watched(settings.USERCACHE_JSON, _read_usercache, ({}, {}))
+        self._shop_owners = file_watcher.watched(settings.SHOPKEEPERS_SAVE, _read_shop_owners, {})
+
+    def usercache(self) -> Dict[str, str]:
+        """usercache.json as {lowercase uuid: name}."""
+        return self._usercache.get()[0]
+
+    def usercache_by_key(self) -> Dict[str, str]:
+        """usercache.json as {uuid key: name}, for dashed/undashed-agnostic lookups."""
+        return self._usercache.get()[1]
+
+    def resolve(self, uuids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolves a batch of UUIDs (dashed or not) in one pass.
+        Returns {uuid as given: name or None}.
+        """
+        names: Dict[str, Optional[str]] = {}
+        missing: List[Tuple[str, str]] = []
+        _, by_key = self._usercache.get()
+        for uuid in uuids:
+            if not uuid or uuid in names:
+                continue
+            key = uuid_key(uuid)
+            names[uuid] = by_key.get(key)
+            if names[uuid] is None:
+                missing.append((uuid, key))
+
+        if missing:
+            # Names the rollups have seen so far (they are kept current by the trade endpoints
+            # and warmed at startup); never trigger a log scan from a name lookup
+            trade_names = trade_rollups.player_names
+            still_missing = []
+            for uuid, key in missing:
+                name = trade_names.get(uuid) or trade_names.get(dashed_uuid(key))
+                if name:
+                    names[uuid] = name
+                else:
+                    still_missing.append((uuid, key))
+
+            if still_missing:
+                owners = self._shop_owners.get()
+                for uuid, key in still_missing:
+                    names[uuid] = owners.get(key)
+        return names
+
+    def resolve_one(self, uuid: str) -> Optional[str]:
+        return self.resolve([uuid]).get(uuid)
+
+
+name_resolver = NameResolver()
+
+
+def resolve_names(uuids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Batch UUID -> name lookup (None for unknown players)."""
+    return name_resolver.resolve(uuids)
+
+
+def resolve_name(uuid: str) -> Optional[str]:
+    """Single UUID -> name lookup (None for an unknown player)."""
+    return name_resolver.resolve_one(uuid)
+
+
+def fill_names(entries: List[Dict[str, Any]], uuid_field: str, name_field: str) -> List[Dict[str, Any]]:
+    """Sets entry[name_field] for every entry from entry[uuid_field], resolved in one batch."""
+    names = resolve_names(entry[uuid_field] for entry in entries if entry.get(uuid_field))
+    for entry in entries:
+        uuid = entry.get(uuid_field)
+        entry[name_field] = names.get(uuid) if uuid else None
+    return entries
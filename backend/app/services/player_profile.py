@@ -0,0 +1,201 @@
+# backend/app/services/player_profile.py
+"""
+Composite player profile.
+
+A profile is assembled from independent parts (playtime, trade counts, shops,
+and optionally detailed trade stats and leaderboard ranks). Parts are loaded
+concurrently in worker threads and cached per player, each tagged with the
+version of the source it came from:
+
+- trade parts   -> trade-log watermark (highest rowid)
+- ranks         -> trade rollups generation (new rankings are published as
+                   trades arrive and as the 24h/7d/30d windows slide)
+- playtime      -> playtime DB file (mtime/size, including its WAL)
+- shops         -> shop catalog version (save.yml mtime/size)
+
+A part is only reloaded when its source version moves.
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable, Tuple, Callable
+from ..config import get_settings
+from ..database import get_playtime_session, get_shopkeepers_session
+from ..models.database import PlayerPlaytime
+from .name_resolver import resolve_name
+from .trade_log import get_trade_log_watermark
+from .trade_rollups import trade_rollups
+from .trade_stats import compute_player_trade_stats, count_player_trades
+from .yaml_parser import get_shops_by_owner, get_catalog_version
+
+settings = get_settings()
+
+PROFILE_CACHE_SIZE = 2048
+PROFILE_INCLUDES = ("trade_stats", "shops", "ranks")
+RANK_WINDOWS = ("30d", "all")
+
+
+def get_playtime_version() -> Optional[Tuple[int, ...]]:
+    """Cheap change marker for the playtime DB (main file plus WAL, if any)."""
+    version = []
+    for path in (settings.PLAYTIME_DB, f"{settings.PLAYTIME_DB}-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        version.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(version) or None
+
+
+def get_rankings_version() -> int:
+    return trade_rollups.generation
+
+
+def get_trade_version() -> int:
+    with get_shopkeepers_session() as db:
+        return get_trade_log_watermark(db)
+
+
+# ============================================
+# Part Loaders (run in worker threads)
+# ============================================
+
+def _load_playtime(player_uuid: str) -> Optional[Dict[str, Any]]:
+    uuid_no_dashes = player_uuid.replace("-", "")
+    with get_playtime_session() as db:
+        record = db.query(PlayerPlaytime)\
+            .filter(PlayerPlaytime.uuid == uuid_no_dashes)\
+            .first()
+        if not record:
+            return None
+        return {
+            "playtime_ticks": record.playtime,
+            "playtime_hours": record.playtime_hours,
+            "playtime_formatted": record.playtime_formatted
+        }
+
+
+def _load_trade_counts(player_uuid: str) -> Dict[str, int]:
+    with get_shopkeepers_session() as db:
+        total_sales, total_purchases = count_player_trades(db, player_uuid)
+    return {"total_sales": total_sales, "total_purchases": total_purchases}
+
+
+def _load_trade_stats(player_uuid: str) -> Dict[str, Any]:
+    with get_shopkeepers_session() as db:
+        return compute_player_trade_stats(db, player_uuid)
+
+
+def _load_ranks(player_uuid: str) -> Dict[str, Dict[str, Optional[int]]]:
+    return {
+        board: {window: trade_rollups.rank_of(board, player_uuid, window) for window in RANK_WINDOWS}
+        for board in ("sellers", "buyers")
+    }
+
+
+# part name -> (source, loader)
+PARTS: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    "playtime": ("playtime", _load_playtime),
+    "trade_counts": ("trades", _load_trade_counts),
+    "shops": ("catalog", get_shops_by_owner),
+    "trade_stats": ("trades", _load_trade_stats),
+    "ranks": ("rankings", _load_ranks),
+}
+BASE_PARTS = ("playtime", "trade_counts", "shops")
+
+
+class ProfileAggregator:
+    """Per-player cache of profile parts, bounded with LRU eviction."""
+
+    def __init__(self, max_players: int = PROFILE_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._max_players = max_players
+        # player_uuid -> part name -> (source version, value)
+        self._cache: "OrderedDict[str, Dict[str, Tuple[Any, Any]]]" = OrderedDict()
+
+    def _cached_parts(self, player_uuid: str) -> Dict[str, Tuple[Any, Any]]:
+        with self._lock:
+            parts = self._cache.get(player_uuid)
+            if parts is None:
+                parts = self._cache[player_uuid] = {}
+                while len(self._cache) > self._max_players:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(player_uuid)
+            return parts
+
+    async def get_parts(self, player_uuid: str, names: Iterable[str]) -> Dict[str, Any]:
+        """Returns the requested parts, reloading stale ones concurrently."""
+        names = list(dict.fromkeys(names))
+        needed_sources = {PARTS[name][0] for name in names}
+
+        version_loaders = {
+            "trades": get_trade_version,
+            "playtime": get_playtime_version,
+            "catalog": get_catalog_version,
+            "rankings": get_rankings_version,
+        }
+        sources = [s for s in version_loaders if s in needed_sources]
+        versions = dict(zip(sources, await asyncio.gather(
+            *(asyncio.to_thread(version_loaders[s]) for s in sources)
+        )))
+
+        cached = self._cached_parts(player_uuid)
+        stale = [
+            name for name in names
+            if name not in cached or cached[name][0] != versions[PARTS[name][0]]
+        ]
+        if stale:
+            values = await asyncio.gather(
+                *(asyncio.to_thread(PARTS[name][1], player_uuid) for name in stale)
+            )
+            with self._lock:
+                for name, value in zip(stale, values):
+                    cached[name] = (versions[PARTS[name][0]], value)
+
+        return {name: cached[name][1] for name in names}
+
+
+profile_aggregator = ProfileAggregator()
+
+
+def parse_includes(include: Optional[str]) -> list:
+    """Parses include=trade_stats,shops,ranks; raises ValueError on unknown names."""
+    if not include:
+        return []
+    names = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PROFILE_INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include(s): {', '.join(unknown)}. Use: {', '.join(PROFILE_INCLUDES)}")
+    return names
+
+
+async def get_player_profile_data(player_uuid: str, include: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """Assembles a player profile, or returns None if the player has no playtime record."""
+    include = list(include)
+    parts = await profile_aggregator.get_parts(player_uuid, [*BASE_PARTS, *include])
+
+    playtime = parts["playtime"]
+    if playtime is None:
+        return None
+
+    username = resolve_name(player_uuid) or "Unknown"
+
+    trade_stats = dict(parts["trade_counts"])
+    if "trade_stats" in include:
+        trade_stats.update(parts["trade_stats"])
+
+    profile = {
+        "uuid": player_uuid,
+        "username": username,
+        "playtime": {"uuid": player_uuid, "username": username, **playtime},
+        "total_shops": len(parts["shops"]),
+        "trade_stats": trade_stats
+    }
+    if "shops" in include:
+        profile["shops"] = parts["shops"]
+    if "ranks" in include:
+        profile["leaderboard_ranks"] = parts["ranks"]
+
+    return profile
@@ -1,9 +1,12 @@
 # backend/app/services/player_status.py (FINAL COMPLETE VERSION)
+import ipaddress
 import json
+from bisect import bisect_right
 from pathlib import Path
-from typing import Set, Dict, Any, Optional, Tuple
-from functools import lru_cache
+from typing import Set, Dict, Any, Optional, Tuple, Iterable, List
 from ..config import get_settings
+from .name_resolver import name_resolver, uuid_key
+from .file_watcher import file_watcher
 
 settings = get_settings()
 
@@ -11,73 +14,133 @@ settings = get_settings()
 # Ban List Functions
 # ============================================
 
-@lru_cache(maxsize=1) 
+def _read_banned_uuids(path: Path) -> Set[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # The JSON is a list of objects, each with a 'uuid' field; stored as uuid keys (no dashes)
+    return {uuid_key(item['uuid']) for item in data if item.get('uuid')}
+
+class IpBanList:
+    """
+    Banned IPv4/IPv6 addresses and CIDR ranges, as merged and sorted
+    [start, end] integer intervals per address family. A lookup is one
+    bisect, so its cost barely grows with the size of the ban list.
+    """
+    __slots__ = ("_starts", "_ends")
+    
+    def __init__(self, entries: Iterable[str]):
+        spans: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = ipaddress.ip_network(entry.strip(), strict=False)
+            except ValueError:
+                print(f"WARN: Ignoring invalid banned IP entry: {entry!r}")
+                continue
+            spans[network.version].append((int(network.network_address), int(network.broadcast_address)))
+        
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, ranges in spans.items():
+            merged: List[List[int]] = []
+            for start, end in sorted(ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+    
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+    
+    def __contains__(self, ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        value = int(address)
+        index = bisect_right(self._starts[address.version], value) - 1
+        return index >= 0 and value <= self._ends[address.version][index]
+
+def _read_banned_ips(path: Path) -> IpBanList:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # The JSON is a list of objects, each with an 'ip' field (an address or a CIDR range)
+    return IpBanList(item['ip'] for item in data if item.get('ip'))
+
+# Reloaded by the file watcher whenever the server rewrites the ban lists
+banned_uuids = file_watcher.watched(settings.BANNED_PLAYERS_JSON, _read_banned_uuids, set())
+banned_ips = file_watcher.watched(settings.BANNED_IPS_JSON, _read_banned_ips, IpBanList(()))
+
 def load_banned_uuids() -> Set[str]:
-    """Loads a set of banned UUIDs from the JSON file."""
-    path = Path(settings.BANNED_PLAYERS_JSON)
-    if not path.exists():
-        print(f"WARN: Banned players file not found at {path}")
-        return set()
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Assuming the JSON is a list of objects, each with a 'uuid' field
-            return {item.get('uuid', '').lower() for item in data if item.get('uuid')}
-    except Exception as e:
-        print(f"ERROR reading banned players JSON: {e}")
-        return set()
+    """The set of banned UUIDs (as uuid keys) from banned-players.json."""
+    return banned_uuids.get()
+
+def load_banned_ips() -> IpBanList:
+    """Banned addresses and ranges from banned-ips.json."""
+    return banned_ips.get()
 
 def is_player_banned_by_uuid(uuid: str) -> bool:
     """Checks if a given UUID is in the banned list."""
-    # We will assume a cache refresh only happens on app restart for performance
-    return uuid.lower() in load_banned_uuids()
+    return uuid_key(uuid) in load_banned_uuids()
+
+def is_ip_banned(ip: str) -> bool:
+    """Checks if an address is banned directly or falls in a banned range."""
+    return ip in load_banned_ips()
 
 # ============================================
 # UUID/Name Lookup Functions (for name/login check)
 # ============================================
 
-@lru_cache(maxsize=1) 
 def load_user_cache() -> Dict[str, Any]:
     """
-    Loads usercache.json into a map of UUID -> Name for quick lookup.
+    usercache.json as a map of UUID -> Name (reloaded by the file watcher).
     Returns: Dict[UUID: str, Name: str]
     """
-    path = Path(settings.USERCACHE_JSON)
-    uuid_to_name = {}
-    if not path.exists():
-        print(f"WARN: User cache file not found at {path}")
-        return {}
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # usercache is a list of dicts: {'name', 'uuid', 'expiresOn'}
-            for item in data:
-                uuid = item.get('uuid', '').lower()
-                name = item.get('name')
-                if uuid and name:
-                    uuid_to_name[uuid] = name
-    except Exception as e:
-        print(f"ERROR loading user cache: {e}")
-    
-    return uuid_to_name
+    return name_resolver.usercache()
 
 def get_player_name_by_uuid(uuid: str) -> Optional[str]:
     """
-    Retrieves a player's name from the user cache by their UUID.
+    Retrieves a player's name from the user cache by their UUID (dashed or undashed).
     This is used by the /players/{uuid}/status endpoint.
     """
-    cache = load_user_cache()
-    return cache.get(uuid.lower())
+    return name_resolver.usercache_by_key().get(uuid_key(uuid))
 
 
 def has_player_logged_in(uuid: str) -> bool:
     """
-    Checks if a player's UUID is in the user cache, meaning they have logged in before.
+    Checks if a player's UUID (dashed or undashed) is in the user cache, meaning
+    they have logged in before. The login flow passes Mojang's undashed profile id.
     """
-    cache = load_user_cache()
     # Check both the cache and the playtime DB for a more definitive check
     # For now, we rely only on usercache.
-    return uuid.lower() in cache
+    return uuid_key(uuid) in name_resolver.usercache_by_key()
+
+def get_player_statuses(uuids: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Name, login and ban status for many players in one pass over the in-memory
+    ban set and usercache index. Dashed and undashed UUIDs both work; results
+    follow the request order with duplicates dropped.
+    """
+    banned = load_banned_uuids()
+    names = name_resolver.usercache_by_key()
+    statuses = []
+    seen = set()
+    for uuid in uuids:
+        key = uuid_key(uuid)
+        if key in seen:
+            continue
+        seen.add(key)
+        name = names.get(key)
+        statuses.append({
+            "uuid": uuid,
+            "name": name,
+            "has_logged_in": name is not None,
+            "is_banned": key in banned
+        })
+    return statuses
 
 # ============================================
 # Core Status Check
@@ -1,12 +1,22 @@
 # backend/app/services/security.py
+import hashlib
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Dict, List, Tuple, Union, Optional
 from jose import jwt, JWTError
+from starlette.requests import Request
 from starlette.responses import Response
 from ..config import get_settings
 
 settings = get_settings()
 
+AUTH_COOKIE_NAME = "access_token"
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL_SECONDS = 300
+
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     """Creates a JWT access token."""
     to_encode = data.copy()
@@ -23,7 +33,7 @@ def set_auth_cookie(response: Response, token: str):
     """Sets the HTTP-only, Secure, SameSite=Lax cookie for the JWT."""
     # Note: domain is often required for subdomains to share cookies (not needed here)
     response.set_cookie(
-        key="access_token",
+        key=AUTH_COOKIE_NAME,
         value=token,
         httponly=True,
         secure=settings.ENVIRONMENT == "production", # Only send over HTTPS in production
@@ -31,3 +41,111 @@ def set_auth_cookie(response: Response, token: str):
         expires=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
     )
+
+def clear_auth_cookie(response: Response):
+    response.delete_cookie(
+        key=AUTH_COOKIE_NAME,
+        httponly=True,
+        secure=settings.ENVIRONMENT == "production",
+        samesite="Lax",
+    )
+
+def token_digest(token: str) -> str:
+    """sha256 of a JWT: the verification cache key, and what the sessions table stores instead of the token."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenCache:
+    """
+    Bounded LRU of verified JWT claims keyed by token digest. Entries live for
+    TOKEN_CACHE_TTL_SECONDS and never past the token's own expiry, so a hit
+    skips the signature check and claim parsing.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL_SECONDS):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            claims, valid_until = entry
+            if valid_until <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def put(self, digest: str, claims: Dict[str, Any]):
+        valid_until = min(time.time() + self._ttl, float(claims.get("exp", 0)))
+        with self._lock:
+            self._entries[digest] = (claims, valid_until)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+token_cache = TokenCache()
+
+def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Claims of a valid, unexpired access token (cached by digest), or None. Revocation is checked by the caller."""
+    digest = token_digest(token)
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    if not claims.get("sub") or not claims.get("uid") or not claims.get("sid"):
+        return None  # Issued before sessions were recorded; the user has to log in again
+    token_cache.put(digest, claims)
+    return claims
+
+def _parse_trusted_proxies(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    networks = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            print(f"WARN Ignoring invalid TRUSTED_PROXIES entry: {entry!r}")
+    return networks
+
+TRUSTED_PROXY_NETWORKS = _parse_trusted_proxies(settings.TRUSTED_PROXIES)
+
+def _is_trusted_proxy(host: Optional[str]) -> bool:
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host.strip())
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXY_NETWORKS)
+
+def get_client_ip(request: Request) -> Optional[str]:
+    """
+    The client's IP address. Proxy headers are only honoured when TRUST_PROXY_HEADERS
+    is set and the connection comes from one of TRUSTED_PROXIES; then X-Real-IP is
+    used, or else the last X-Forwarded-For hop that isn't itself a trusted proxy.
+    Anyone else could simply send the headers to pick the IP that gets checked
+    against the ban list.
+    """
+    peer = request.client.host if request.client else None
+    if settings.TRUST_PROXY_HEADERS and _is_trusted_proxy(peer):
+        real_ip = request.headers.get("x-real-ip")
+        if real_ip:
+            return real_ip.strip()
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+            for hop in reversed(hops):
+                if not _is_trusted_proxy(hop):
+                    return hop
+            if hops:
+                return hops[0]
+    return peer
@@ -1,58 +1,145 @@
 # backend/app/services/server_status.py
+"""
+Minecraft server status, polled in the background.
+
+A single poller queries the server every SERVER_STATUS_POLL_SECONDS and keeps
+the latest snapshot; requests are answered from it along with its `age`. The
+SRV/DNS lookup is done once and its result cached for ADDRESS_TTL_SECONDS (or
+until a query fails). Refreshes are single-flight: concurrent callers that
+need fresh data all await the same in-flight query.
+"""
 import asyncio
-from typing import Dict, Any
-from mcstatus.server import JavaServer as AsyncJavaServer 
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Callable
+from mcstatus.server import JavaServer as AsyncJavaServer
 from ..config import get_settings
 
 settings = get_settings()
 
-async def get_minecraft_server_status() -> Dict[str, Any]:
-    """Queries the Minecraft server directly for live status and player count."""
-    
-    # Use the mcstatus library to query the host and port from config
-    host = settings.MC_SERVER_HOST
-    port = settings.MC_SERVER_PORT
-    
-    try:
-        # FIX 2: Use the ASYNC JavaServer object creation
-        server = AsyncJavaServer.lookup(f"{host}:{port}")
-        
-        # FIX 3: Ping and Status calls are now correct with 'await'
-        latency = await asyncio.wait_for(server.async_ping(), timeout=3.0) # Use async_ping()
-        status = await asyncio.wait_for(server.async_status(), timeout=3.0) # Use async_status()
-        
-        # Build the structured response
-        players_list = [player.name for player in status.players.sample] if status.players.sample else []
-        
-        return {
-            "online": True,
-            "players": {
-                "online": status.players.online,
-                "max": status.players.max,
-                "sample": players_list
-            },
-            "version": status.version.name,
-            "motd": status.description,
-            "latency": round(latency, 2),
-            "error": None
-        }
-
-    except TimeoutError:
-        return {
-            "online": False,
-            "players": None,
-            "version": None,
-            "motd": "Server query timed out.",
-            "latency": None,
-            "error": "Timeout"
-        }
-    except Exception as e:
-        # Catch connection errors (e.g., ConnectionRefusedError)
-        return {
-            "online": False,
-            "players": None,
-            "version": None,
-            "motd": "Server is offline or unreachable.",
-            "latency": None,
-            "error": str(e)
-        }
+SERVER_STATUS_POLL_SECONDS = 15
+SERVER_STATUS_STALE_SECONDS = 60   # Older snapshots are refreshed on demand (e.g. poller not running)
+SERVER_STATUS_MIN_REFRESH_SECONDS = 5  # Explicit refreshes within this age reuse the snapshot
+ADDRESS_TTL_SECONDS = 300
+QUERY_TIMEOUT_SECONDS = 3.0
+
+
+class ServerStatusPoller:
+    """Latest server status snapshot plus the coalesced query that refreshes it."""
+
+    def __init__(self):
+        self._server: Optional[AsyncJavaServer] = None
+        self._resolved_at = 0.0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = 0.0  # monotonic
+        self._inflight: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str, Any], float], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any], float], None]):
+        """Registers a callback invoked as (snapshot, epoch) after every query, in a worker thread."""
+        self._listeners.append(listener)
+
+    async def _resolve(self) -> AsyncJavaServer:
+        """SRV + DNS lookup of the configured address, cached for ADDRESS_TTL_SECONDS."""
+        if self._server is None or time.monotonic() - self._resolved_at > ADDRESS_TTL_SECONDS:
+            server = await AsyncJavaServer.async_lookup(
+                f"{settings.MC_SERVER_HOST}:{settings.MC_SERVER_PORT}", timeout=QUERY_TIMEOUT_SECONDS
+            )
+            host, port = server.address.host, server.address.port
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            self._server = AsyncJavaServer(infos[0][4][0], port, timeout=QUERY_TIMEOUT_SECONDS)
+            self._resolved_at = time.monotonic()
+        return self._server
+
+    async def _query(self) -> Dict[str, Any]:
+        """Queries the Minecraft server directly for live status and player count."""
+        try:
+            server = await self._resolve()
+            # The status exchange measures latency itself, so no separate ping connection
+            status = await asyncio.wait_for(server.async_status(), timeout=QUERY_TIMEOUT_SECONDS)
+
+            # Build the structured response
+            players_list = [player.name for player in status.players.sample] if status.players.sample else []
+
+            snapshot = {
+                "online": True,
+                "players": {
+                    "online": status.players.online,
+                    "max": status.players.max,
+                    "sample": players_list
+                },
+                "version": status.version.name,
+                "motd": status.description,
+                "latency": round(status.latency, 2),
+                "error": None
+            }
+
+        except (TimeoutError, asyncio.TimeoutError):
+            self._server = None  # Re-resolve next time in case the address moved
+            snapshot = {
+                "online": False,
+                "players": None,
+                "version": None,
+                "motd": "Server query timed out.",
+                "latency": None,
+                "error": "Timeout"
+            }
+        except Exception as e:
+            # Catch connection errors (e.g., ConnectionRefusedError)
+            self._server = None
+            snapshot = {
+                "online": False,
+                "players": None,
+                "version": None,
+                "motd": "Server is offline or unreachable.",
+                "latency": None,
+                "error": str(e)
+            }
+
+        now = time.time()
+        snapshot["updated_at"] = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        self._snapshot = snapshot
+        self._snapshot_at = time.monotonic()
+        for listener in self._listeners:
+            try:
+                # Listeners may do file I/O (status history), which must stay off the event loop
+                await asyncio.to_thread(listener, snapshot, now)
+            except Exception as e:
+                print(f"ERROR in server status listener: {e}")
+        return snapshot
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Runs one status query, or joins the one already in flight."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._query())
+        # shield: a cancelled caller must not cancel the query other callers are awaiting
+        return await asyncio.shield(self._inflight)
+
+    @property
+    def age(self) -> Optional[float]:
+        return time.monotonic() - self._snapshot_at if self._snapshot is not None else None
+
+    async def get_status(self, refresh: bool = False) -> Dict[str, Any]:
+        """The latest snapshot with its `age` in seconds, refreshed first if missing, stale or requested."""
+        age = self.age
+        if age is None or age > SERVER_STATUS_STALE_SECONDS or (refresh and age > SERVER_STATUS_MIN_REFRESH_SECONDS):
+            await self.refresh()
+        return {**self._snapshot, "age": round(self.age, 1)}
+
+    async def run(self, interval: float = SERVER_STATUS_POLL_SECONDS):
+        """Background job: refresh the snapshot every `interval` seconds."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"ERROR polling server status: {e}")
+            await asyncio.sleep(interval)
+
+
+server_status_poller = ServerStatusPoller()
+
+
+async def get_minecraft_server_status(refresh: bool = False) -> Dict[str, Any]:
+    """Current server status from the poller's latest snapshot (see ServerStatusPoller)."""
+    return await server_status_poller.get_status(refresh)
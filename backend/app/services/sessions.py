@@ -0,0 +1,244 @@
+# backend/app/services/sessions.py
+"""
+Website login sessions and the `get_current_user` / `get_admin_user` dependencies.
+
+Every issued JWT carries a `sid` claim naming a row in the `sessions` table.
+Unexpired sessions (joined with their user) are kept in memory, so a request
+is authenticated with a cached claims lookup (see
+security.verify_access_token) plus a dict lookup: no HMAC check and no DB
+round trip on the common path.
+
+Writes are behind: `last_activity` is updated in memory on each request and
+written for all touched sessions in one statement whenever the website
+writer flushes (see website_writer.py); logins and logouts go through the
+same writer. The in-memory copy is reloaded from the table every
+SESSION_SYNC_SECONDS to pick up rows changed by other workers or by hand.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+from fastapi import HTTPException, Request
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+from ..config import get_settings
+from ..database import get_website_session
+from ..models.database import User, Session as LoginSession
+from ..schemas.auth import TokenData
+from .security import create_access_token, token_digest, verify_access_token, AUTH_COOKIE_NAME
+from .website_writer import website_writer
+
+settings = get_settings()
+
+SESSION_SYNC_SECONDS = 60
+ACTIVITY_RESOLUTION_SECONDS = 60  # Activity is only re-marked dirty once per minute per session
+
+
+def _utcnow() -> datetime:
+    # The website DB stores naive UTC datetimes (models use datetime.utcnow)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+@dataclass
+class SessionRecord:
+    """Hot copy of a session row and the fields of its user that requests need."""
+    session_id: str
+    user_id: str
+    minecraft_uuid: str
+    username: str
+    is_admin: bool
+    expires_at: float  # epoch seconds
+    last_activity: float  # epoch seconds
+
+
+class SessionStore:
+    """Unexpired sessions kept in memory, with activity written behind in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._loaded = False
+        self._dirty: Set[str] = set()  # sessions whose last_activity isn't written yet
+        # Changes made while a reload is reading the table, re-applied on top of its result
+        self._opened: Dict[str, SessionRecord] = {}
+        self._revoked: Set[str] = set()
+        website_writer.add_flusher(self.flush_activity)
+
+    def load(self):
+        """Replaces the in-memory sessions with the unexpired rows of the sessions table."""
+        with self._lock:
+            self._opened.clear()
+            self._revoked.clear()
+        with get_website_session() as db:
+            rows = db.execute(
+                select(
+                    LoginSession.id, LoginSession.user_id, LoginSession.expires_at, LoginSession.last_activity,
+                    User.minecraft_uuid, User.minecraft_username, User.is_admin
+                )
+                .join(User, User.id == LoginSession.user_id)
+                .where(LoginSession.expires_at > _utcnow(), User.is_active.is_(True))
+            ).all()
+        sessions = {
+            row.id: SessionRecord(
+                session_id=row.id,
+                user_id=row.user_id,
+                minecraft_uuid=row.minecraft_uuid,
+                username=row.minecraft_username,
+                is_admin=bool(row.is_admin),
+                expires_at=_epoch(row.expires_at),
+                last_activity=_epoch(row.last_activity) if row.last_activity else 0.0,
+            )
+            for row in rows
+        }
+        with self._lock:
+            # Keep activity not yet written; it's newer than what the table has
+            for session_id in self._dirty:
+                if session_id in sessions and session_id in self._sessions:
+                    sessions[session_id].last_activity = self._sessions[session_id].last_activity
+            sessions.update(self._opened)
+            for session_id in self._revoked:
+                sessions.pop(session_id, None)
+            self._sessions = sessions
+            self._loaded = True
+
+    def get(self, session_id: Optional[str]) -> Optional[SessionRecord]:
+        """The active session with this id, or None (unknown, expired or revoked)."""
+        if not session_id:
+            return None
+        if not self._loaded:
+            self.load()
+        record = self._sessions.get(session_id)
+        if record is None or record.expires_at <= time.time():
+            return None
+        return record
+
+    def touch(self, record: SessionRecord):
+        """Notes activity on a session; written at the next flush."""
+        now = time.time()
+        if now - record.last_activity >= ACTIVITY_RESOLUTION_SECONDS:
+            record.last_activity = now
+            with self._lock:
+                self._dirty.add(record.session_id)
+
+    def flush_activity(self, db: Session):
+        """Writes last_activity for every touched session in one statement (website writer flusher)."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            updates = [
+                {"id": session_id, "last_activity": datetime.fromtimestamp(self._sessions[session_id].last_activity, tz=timezone.utc).replace(tzinfo=None)}
+                for session_id in dirty
+                if session_id in self._sessions
+            ]
+        if updates:
+            db.execute(update(LoginSession), updates)
+
+    async def open(self, minecraft_uuid: str, username: str, microsoft_id: str,
+                   ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> str:
+        """Upserts the user, records a new session for them and returns its JWT."""
+        now = _utcnow()
+        session_id = str(uuid.uuid4())
+        expires_at = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+        def write(db: Session) -> Tuple[SessionRecord, str]:
+            user = db.execute(select(User).where(User.minecraft_uuid == minecraft_uuid)).scalar_one_or_none()
+            if user is None:
+                user = User(minecraft_uuid=minecraft_uuid, minecraft_username=username, microsoft_id=microsoft_id)
+                db.add(user)
+                db.flush()
+            else:
+                user.minecraft_username = username
+                user.last_login = now
+            token = create_access_token(
+                data={"sub": minecraft_uuid, "uid": user.id, "sid": session_id},
+                expires_delta=expires_at - now
+            )
+            db.add(LoginSession(
+                id=session_id,
+                user_id=user.id,
+                token=token_digest(token),
+                created_at=now,
+                expires_at=expires_at,
+                last_activity=now,
+                ip_address=ip_address,
+                user_agent=user_agent,
+            ))
+            record = SessionRecord(
+                session_id=session_id,
+                user_id=user.id,
+                minecraft_uuid=minecraft_uuid,
+                username=username,
+                is_admin=bool(user.is_admin),
+                expires_at=_epoch(expires_at),
+                last_activity=_epoch(now),
+            )
+            return record, token
+
+        record, token = await website_writer.submit(write)
+
+        with self._lock:
+            self._sessions[session_id] = self._opened[session_id] = record
+        return token
+
+    def revoke(self, session_id: str):
+        """Ends a session now (logout); the row is deleted by the writer."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._opened.pop(session_id, None)
+            self._dirty.discard(session_id)
+            self._revoked.add(session_id)
+        website_writer.submit_nowait(lambda db: db.execute(delete(LoginSession).where(LoginSession.id == session_id)))
+
+    async def run(self):
+        """Background job: resync the in-memory sessions with the sessions table."""
+        while True:
+            await asyncio.sleep(SESSION_SYNC_SECONDS)
+            try:
+                await asyncio.to_thread(self.load)
+            except Exception as e:
+                print(f"ERROR syncing login sessions: {e}")
+
+
+session_store = SessionStore()
+
+
+def _authenticate(request: Request) -> Optional[TokenData]:
+    token = request.cookies.get(AUTH_COOKIE_NAME)
+    if not token:
+        return None
+    claims = verify_access_token(token)
+    if claims is None:
+        return None
+    record = session_store.get(claims.get("sid"))
+    if record is None or record.minecraft_uuid != claims["sub"]:
+        return None
+    session_store.touch(record)
+    return TokenData(user_id=record.user_id, minecraft_uuid=record.minecraft_uuid,
+                     session_id=record.session_id, is_admin=record.is_admin)
+
+
+async def get_current_user(request: Request) -> TokenData:
+    """Dependency: the logged-in user from the access_token cookie (401 if missing, invalid or revoked)."""
+    user = _authenticate(request)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+    return user
+
+
+async def get_admin_user(request: Request) -> TokenData:
+    """Dependency: like get_current_user, but 403 unless the user is an admin."""
+    user = await get_current_user(request)
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Admins only.")
+    return user
+
+
+async def get_optional_user(request: Request) -> Optional[TokenData]:
+    """Dependency: like get_current_user, but None for anonymous visitors."""
+    return _authenticate(request)
@@ -1,61 +1,387 @@
 # backend/app/services/stats.py
+import asyncio
 import json
+import os
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from ..config import get_settings
-from .player_status import load_user_cache # To resolve names
+from .name_resolver import uuid_key, resolve_names, resolve_name
 
 settings = get_settings()
 
-@lru_cache(maxsize=1)
-def load_all_leaderboards() -> Dict[str, List[Dict[str, Any]]]:
-    """Reads all individual ranking JSON files into a single dictionary."""
-    rankings_dir = Path(settings.MINECRAFT_STATS_DIR) / "data" / "rankings"
+STAT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.\-]+$")
+
+RANKINGS_CACHE_SIZE = 64  # Max leaderboards kept in memory (least recently viewed are evicted)
+INDEX_REFRESH_INTERVAL_SECONDS = 10
+
+
+class StatsNotFound(Exception):
+    """A player isn't on a leaderboard, or a stat has no history yet (the API answers 404)."""
+
+
+class InvalidCursor(Exception):
+    """A leaderboard cursor that can't be parsed (the API answers 400)."""
+
+
+def _parse_rank(rank: Any, default: int) -> Optional[int]:
+    """A ranking row's rank as an int: `default` if missing, None if it isn't a whole number."""
+    if rank is None:
+        return default
+    if isinstance(rank, bool):
+        return None
+    try:
+        value = float(rank)
+    except (TypeError, ValueError):
+        return None
+    return int(value) if value.is_integer() else None
+
+
+class Leaderboard:
+    """
+    One stat's ranking in compact, rank-sorted parallel arrays.
+    
+    `position` maps a player (uuid_key) to their index, so locating a player
+    is O(1); rank-based cursors are resolved with bisect on `ranks`.
+    """
+    __slots__ = ("uuids", "ranks", "values", "last_seen", "position")
+    
+    def __init__(self, entries: List[Dict[str, Any]]):
+        # Rows without a usable rank take their file position; unparseable ranks are skipped
+        ranked = []
+        skipped = 0
+        for original_index, rank_data in enumerate(entries):
+            rank = _parse_rank(rank_data.get('rank'), original_index + 1)
+            if rank is None:
+                skipped += 1
+                continue
+            ranked.append((rank, original_index, rank_data))
+        if skipped:
+            print(f"WARN: Skipped {skipped} ranking rows with a non-integer rank")
+        ranked.sort(key=lambda item: (item[0], item[1]))
+        
+        self.uuids: List[str] = []
+        self.ranks = array('q')
+        self.values: List[Any] = []
+        self.last_seen: List[Any] = []
+        self.position: Dict[str, int] = {}
+        for index, (rank, _, rank_data) in enumerate(ranked):
+            uuid = rank_data.get('uuid', '').lower()
+            self.uuids.append(uuid)
+            self.ranks.append(rank)
+            self.values.append(rank_data.get('value'))
+            self.last_seen.append(rank_data.get('last_seen'))
+            self.position.setdefault(uuid_key(uuid), index)
+    
+    @classmethod
+    def from_file(cls, file_path: Path) -> "Leaderboard":
+        """Parses one MinecraftStats ranking file."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def __len__(self) -> int:
+        return len(self.uuids)
+    
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Materializes rows [start, stop) as API dicts, resolving player names."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = max(start, 0)
+        player_names = resolve_names(self.uuids[start:stop]) # Ranking files mix dashed and undashed UUIDs
+        return [
+            {
+                "rank": self.ranks[i],
+                "uuid": self.uuids[i],
+                "player_name": player_names.get(self.uuids[i]) or 'Unknown Player',
+                "value": self.values[i],
+                "last_seen": self.last_seen[i]
+            }
+            for i in range(start, stop)
+        ]
     
-    if not rankings_dir.exists():
-        print(f"WARN: Minecraft Stats directory not found at {rankings_dir}")
-        return {}
+    def index_of(self, uuid: str) -> Optional[int]:
+        return self.position.get(uuid_key(uuid))
+    
+    def cursor_at(self, index: int) -> str:
+        """Opaque cursor pointing just after row `index`."""
+        return f"{self.ranks[index]}:{self.uuids[index]}"
+    
+    def index_after_cursor(self, cursor: str) -> int:
+        """
+        Index of the first row after `cursor`. If the player is still at the
+        cursor's rank this is an O(1) lookup; if the board changed since the
+        cursor was issued, resume after the cursor's rank via bisect.
+        """
+        rank_text, _, uuid = cursor.partition(':')
+        try:
+            rank = int(rank_text)
+        except ValueError:
+            raise InvalidCursor(f"Invalid cursor '{cursor}'.") from None
+        index = self.index_of(uuid)
+        if index is not None and self.ranks[index] == rank:
+            return index + 1
+        return bisect_right(self.ranks, rank)
+
 
-    all_leaderboards = {}
-    player_name_map = load_user_cache() # Get cached UUID->Name map
+class LeaderboardStore:
+    """
+    Per-stat leaderboard cache over MINECRAFT_STATS_DIR/data/rankings.
+    
+    Each ranking file is parsed on first access and re-parsed only when its
+    mtime changes. At most `max_boards` leaderboards are kept; the least
+    recently viewed are evicted. The list of stats comes from a directory
+    scan that is redone only when the directory's mtime changes.
+    """
+    
+    def __init__(self, max_boards: int = RANKINGS_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._max_boards = max_boards
+        # stat name -> (file mtime_ns, leaderboard)
+        self._boards: "OrderedDict[str, Tuple[int, Leaderboard]]" = OrderedDict()
+        self._stat_names: Tuple[Optional[int], List[str]] = (None, [])
+        self._listeners: List[Callable[[str, int, "Leaderboard"], None]] = []
+    
+    def add_listener(self, listener: Callable[[str, int, "Leaderboard"], None]):
+        """Registers a callback invoked as (stat_name, mtime_ns, leaderboard) whenever a file is (re)parsed."""
+        self._listeners.append(listener)
+    
+    @property
+    def rankings_dir(self) -> Path:
+        return Path(settings.MINECRAFT_STATS_DIR) / "data" / "rankings"
+    
+    def available_stats(self) -> List[str]:
+        """Sorted list of stat names (ranking file stems)."""
+        rankings_dir = self.rankings_dir
+        try:
+            dir_mtime = os.stat(rankings_dir).st_mtime_ns
+        except OSError:
+            print(f"WARN: Minecraft Stats directory not found at {rankings_dir}")
+            return []
+        
+        cached_mtime, names = self._stat_names
+        if cached_mtime != dir_mtime:
+            with os.scandir(rankings_dir) as entries:
+                names = sorted(
+                    entry.name[:-len(".json")] for entry in entries
+                    if entry.name.endswith(".json") and entry.is_file()
+                )
+            self._stat_names = (dir_mtime, names)
+        return names
+    
+    def signature(self) -> Tuple[Tuple[str, int], ...]:
+        """(stat, file mtime) for every ranking file; changes whenever any file does."""
+        return tuple(
+            (stat_name, mtime)
+            for stat_name in self.available_stats()
+            if (mtime := self.file_mtime(stat_name)) is not None
+        )
+    
+    def has_stat(self, stat_name: str) -> bool:
+        return stat_name in self.available_stats()
+    
+    def file_mtime(self, stat_name: str) -> Optional[int]:
+        """mtime_ns of a stat's ranking file, or None if it doesn't exist."""
+        if not STAT_NAME_PATTERN.match(stat_name):
+            return None
+        try:
+            return os.stat(self.rankings_dir / f"{stat_name}.json").st_mtime_ns
+        except OSError:
+            return None
     
-    for file_path in rankings_dir.glob("*.json"):
+    def get(self, stat_name: str, keep: bool = True) -> Optional[Leaderboard]:
+        """
+        Returns the leaderboard for a stat, loading or reloading its file if needed.
+        With keep=False a freshly parsed board is not cached (used for bulk scans
+        that shouldn't evict the boards people are viewing).
+        """
+        mtime = self.file_mtime(stat_name)
+        if mtime is None:
+            return None
+        file_path = self.rankings_dir / f"{stat_name}.json"
+        
+        with self._lock:
+            cached = self._boards.get(stat_name)
+            if cached and cached[0] == mtime:
+                self._boards.move_to_end(stat_name)
+                return cached[1]
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # Each file name is the stat name (e.g., 'aviate', 'kill_zombie')
-                stat_name = file_path.stem 
-                leaderboard = []
-                
-                for rank_data in data:
-                    uuid = rank_data.get('uuid', '').lower()
-                    
-                    leaderboard.append({
-                        "rank": rank_data.get('rank'),
-                        "uuid": uuid,
-                        "player_name": player_name_map.get(uuid, 'Unknown Player'), # Resolve name
-                        "value": rank_data.get('value'),
-                        "last_seen": rank_data.get('last_seen')
-                    })
-
-                all_leaderboards[stat_name] = leaderboard
-                
+            board = Leaderboard.from_file(file_path)
         except Exception as e:
             print(f"ERROR reading stats file {file_path.name}: {e}")
-            continue
-            
-    return all_leaderboards
+            return None
+        
+        if keep:
+            with self._lock:
+                self._boards[stat_name] = (mtime, board)
+                self._boards.move_to_end(stat_name)
+                while len(self._boards) > self._max_boards:
+                    self._boards.popitem(last=False)
+        
+        for listener in self._listeners:
+            listener(stat_name, mtime, board)
+        return board
+
+
+def _compact(values: List[Any]):
+    """Values of one stat in a typed array when they are all ints (the usual case), else a list."""
+    if all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            pass
+    return list(values)
+
+
+class PlayerStatsIndex:
+    """
+    Inverted index: player -> where they appear in each stat's ranking.
+    
+    Per stat it keeps only the ranks and values, in compact arrays (ints in
+    array('q')); per player, a packed array of (stat number, row) pointers
+    into them. It doesn't hold Leaderboard objects, so the LeaderboardStore
+    LRU still bounds how many full boards are in memory.
+    
+    The index is built and refreshed in a worker thread by run(), and is
+    also updated whenever the LeaderboardStore parses a file; lookups never
+    read ranking files.
+    """
+    
+    def __init__(self, store: LeaderboardStore):
+        self._store = store
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # stat number -> (stat name, file mtime_ns, ranks, values, player keys in row order)
+        self._stats: Dict[int, Tuple[str, int, array, Any, List[str]]] = {}
+        self._stat_numbers: Dict[str, int] = {}
+        self._next_stat = 0
+        # player key -> packed pointers (stat number << 32 | row)
+        self._by_player: Dict[str, array] = {}
+        store.add_listener(self.update_stat)
+    
+    def _drop_stat(self, stat_name: str):
+        number = self._stat_numbers.pop(stat_name, None)
+        if number is None:
+            return
+        _, _, _, _, keys = self._stats.pop(number)
+        for key in set(keys):
+            pointers = self._by_player.get(key)
+            if pointers is None:
+                continue
+            kept = array('q', (pointer for pointer in pointers if pointer >> 32 != number))
+            if kept:
+                self._by_player[key] = kept
+            else:
+                del self._by_player[key]
+    
+    def update_stat(self, stat_name: str, mtime: int, board: Leaderboard):
+        """Replaces one stat's entries (LeaderboardStore listener)."""
+        keys = [sys.intern(uuid_key(uuid)) for uuid in board.uuids]  # One string per player across all stats
+        values = _compact(board.values)
+        with self._lock:
+            number = self._stat_numbers.get(stat_name)
+            if number is not None and self._stats[number][1] == mtime:
+                return
+            self._drop_stat(stat_name)
+            number = self._next_stat
+            self._next_stat += 1
+            self._stat_numbers[stat_name] = number
+            self._stats[number] = (stat_name, mtime, array('q', board.ranks), values, keys)
+            for row, key in enumerate(keys):
+                pointers = self._by_player.get(key)
+                if pointers is None:
+                    pointers = self._by_player[key] = array('q')
+                pointers.append(number << 32 | row)
+    
+    def refresh(self):
+        """Indexes new or changed ranking files and drops removed ones (runs in a worker thread)."""
+        with self._refresh_lock:
+            stat_names = self._store.available_stats()
+            with self._lock:
+                for stat_name in set(self._stat_numbers) - set(stat_names):
+                    self._drop_stat(stat_name)
+                indexed = {name: self._stats[number][1] for name, number in self._stat_numbers.items()}
+            for stat_name in stat_names:
+                mtime = self._store.file_mtime(stat_name)
+                if mtime is not None and indexed.get(stat_name) != mtime:
+                    # Parsing the file calls update_stat (listener)
+                    self._store.get(stat_name, keep=False)
+    
+    async def run(self):
+        """Background job: build the index, then pick up changed ranking files."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"ERROR refreshing player stats index: {e}")
+            await asyncio.sleep(INDEX_REFRESH_INTERVAL_SECONDS)
+    
+    def standings(self, uuid: str) -> Dict[str, Tuple[Any, Any]]:
+        """Returns {stat: (rank, value)} for one player, as of the last refresh."""
+        with self._lock:
+            standings = {}
+            for pointer in self._by_player.get(uuid_key(uuid), ()):
+                stat_name, _, ranks, values, _ = self._stats[pointer >> 32]
+                row = pointer & 0xFFFFFFFF
+                standings.setdefault(stat_name, (ranks[row], values[row]))
+            return standings
+
+
+leaderboard_store = LeaderboardStore()
+player_stats_index = PlayerStatsIndex(leaderboard_store)
+
+
+def get_available_stats() -> List[str]:
+    """Returns all available leaderboard IDs (stat file names)."""
+    return leaderboard_store.available_stats()
 
 
 def get_leaderboard(stat_name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Retrieves a specific cached leaderboard."""
-    leaderboards = load_all_leaderboards()
+    """Retrieves the top rows of a specific leaderboard (loaded on demand)."""
+    board = leaderboard_store.get(stat_name)
+    if board is None:
+        return []
+    
+    return board.rows(0, limit)
+
+
+def get_leaderboard_page(
+    stat_name: str,
+    limit: int = 20,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    around: Optional[str] = None,
+    radius: int = 5
+) -> Optional[Dict[str, Any]]:
+    """
+    A page of a leaderboard: from `offset`, after `cursor`, or `radius` rows
+    either side of the player `around`. Returns None if the stat doesn't exist.
+    Raises StatsNotFound if `around` is not on the board and InvalidCursor for a bad cursor.
+    """
+    board = leaderboard_store.get(stat_name)
+    if board is None:
+        return None
     
-    board = leaderboards.get(stat_name, [])
+    if around:
+        index = board.index_of(around)
+        if index is None:
+            raise StatsNotFound(f"Player '{around}' is not ranked in '{stat_name}'.")
+        start, stop = index - radius, index + radius + 1
+    else:
+        start = board.index_after_cursor(cursor) if cursor else offset
+        stop = start + limit
     
-    return board[:limit] if limit else board
+    start = max(start, 0)
+    stop = min(stop, len(board))
+    return {
+        "rows": board.rows(start, stop),
+        "total": len(board),
+        "next_cursor": board.cursor_at(stop - 1) if start < stop < len(board) else None
+    }
   
 # Define a set of 'display stats' we want to show on the main page
 TOP_STATS_DISPLAY = [
@@ -63,41 +389,18 @@ TOP_STATS_DISPLAY = [
     # Add more relevant, easy-to-read stats here
 ]
 
-async def get_stats_dashboard() -> Dict[str, Any]:
-    """
-    Aggregates essential leaderboards and summary data for the frontend dashboard.
-    Returns: { "summary": {total_players: ...}, "leaderboards": [ {stat_name: ..., top_players: [...]}, ... ] }
-    """
-    all_boards = load_all_leaderboards()
-    player_name_map = load_user_cache() # Get names for all players
-
-    dashboard_data = {
-        "summary": {
-            "total_stats_available": len(all_boards),
-            "total_players_cached": len(player_name_map)
-        },
-        "leaderboards": [],
-        "awards_overview": []
+def get_player_stats_card(uuid: str) -> Dict[str, Any]:
+    """A player's standings across every stat they are ranked in, best ranks first."""
+    standings = player_stats_index.standings(uuid)
+    return {
+        "uuid": uuid,
+        "player_name": resolve_name(uuid),
+        "standings": sorted(
+            (
+                {"stat_id": stat_name, "rank": rank, "value": value}
+                for stat_name, (rank, value) in standings.items()
+            ),
+            key=lambda entry: (entry["rank"] is None, entry["rank"] or 0, entry["stat_id"])
+        ),
+        "count": len(standings)
     }
-
-    # 1. Get Top N Leaderboards (e.g., Top 5 players for key stats)
-    for stat_name in TOP_STATS_DISPLAY:
-        board = all_boards.get(stat_name)
-        if board:
-            dashboard_data["leaderboards"].append({
-                "stat_id": stat_name,
-                "stat_label": stat_name.replace('_', ' ').title(), # Simple label conversion
-                "top_players": board[:5] # Get top 5 players
-            })
-
-    # 2. Get the Hall of Fame/Awards Overview (We need to process ALL data for this)
-    # This requires looking at every player's rank across all stats.
-    # For now, we'll return the raw awards files and let the frontend render the list of available stats.
-    
-    # We will simply return a list of all available stat IDs for the awards overview
-    dashboard_data["awards_overview"] = [
-        {"id": k, "label": k.replace('_', ' ').title()} for k in all_boards.keys()
-    ]
-
-
-    return dashboard_data
@@ -0,0 +1,219 @@
+# backend/app/services/stats_awards.py
+"""
+Hall of Fame / awards engine.
+
+Every ranking file is folded into flat NumPy arrays (player code, rank, board
+size) and per-player podiums, #1s and a weighted composite score are computed
+with a handful of bincounts. A background job recomputes whenever a ranking
+file changes and swaps in the whole stats dashboard payload, so serving the
+dashboard does no work at request time.
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from .stats import leaderboard_store, uuid_key, TOP_STATS_DISPLAY
+from .player_status import load_user_cache
+from .name_resolver import resolve_names
+from .file_watcher import file_watcher
+
+AWARDS_CHECK_INTERVAL_SECONDS = 300  # Safety net; ranking changes normally arrive via the file watcher
+AWARDS_DEBOUNCE_SECONDS = 5.0  # MinecraftStats rewrites every ranking file in one pass
+AWARDS_TOP_N = 10
+
+# Composite score: podium points by rank (index 1-3) plus 0..1 for the
+# player's percentile on each board they appear in
+PODIUM_POINTS = np.array([0.0, 10.0, 6.0, 3.0, 0.0])
+
+
+def stat_label(stat_name: str) -> str:
+    return stat_name.replace('_', ' ').title()
+
+
+class AwardsEngine:
+    """Holds the latest computed awards and the dashboard payload built from them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Guards the published results
+        # Serializes compute-and-publish: the file watcher and the run loop may both refresh, and a
+        # slower, older computation must not overwrite a newer one
+        self._refresh_lock = threading.Lock()
+        self._signature: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._dashboard: Optional[Dict[str, Any]] = None
+        # uuid_key -> (overall rank, golds, podiums, score, stats ranked)
+        self._players: Dict[str, Tuple[int, int, int, float, int]] = {}
+
+    def compute(self, signature: Tuple[Tuple[str, int], ...]):
+        """Recomputes awards over every ranking file and swaps in the new payload."""
+        codes: Dict[str, int] = {}
+        display_uuids: List[str] = []
+        code_chunks, rank_chunks, size_chunks = [], [], []
+        champions = []
+        display_boards = {}
+
+        for stat_name, _ in signature:
+            board = leaderboard_store.get(stat_name, keep=False)
+            if board is None or not len(board):
+                continue
+            # board.position already holds each player's key; duplicate rows stay -1 and are dropped
+            board_codes = np.full(len(board), -1, dtype=np.int64)
+            for key, index in board.position.items():
+                code = codes.get(key)
+                if code is None:
+                    code = codes[key] = len(display_uuids)
+                    display_uuids.append(board.uuids[index])
+                board_codes[index] = code
+            listed = board_codes >= 0
+            code_chunks.append(board_codes[listed])
+            rank_chunks.append(np.frombuffer(board.ranks, dtype=np.int64)[listed])
+            size_chunks.append(np.full(int(listed.sum()), len(board), dtype=np.int64))
+            champions.append((stat_name, board.uuids[0], board.values[0]))
+            if stat_name in TOP_STATS_DISPLAY:
+                display_boards[stat_name] = board
+
+        player_count = len(display_uuids)
+        if player_count:
+            player_codes = np.concatenate(code_chunks)
+            ranks = np.concatenate(rank_chunks)
+            sizes = np.concatenate(size_chunks)
+
+            golds = np.bincount(player_codes, weights=ranks == 1, minlength=player_count).astype(np.int64)
+            podiums = np.bincount(player_codes, weights=(ranks >= 1) & (ranks <= 3), minlength=player_count).astype(np.int64)
+            stats_ranked = np.bincount(player_codes, minlength=player_count)
+            percentile = np.where(sizes > 1, (sizes - ranks) / np.maximum(sizes - 1, 1), 1.0).clip(0.0, 1.0)
+            points = PODIUM_POINTS[ranks.clip(0, len(PODIUM_POINTS) - 1)] + percentile
+            scores = np.round(np.bincount(player_codes, weights=points, minlength=player_count), 2)
+
+            # Best score first; ties broken by #1s, then podiums
+            order = np.lexsort((-podiums, -golds, -scores))
+            overall = np.empty(player_count, dtype=np.int64)
+            overall[order] = np.arange(1, player_count + 1)
+        else:
+            golds = podiums = stats_ranked = overall = np.zeros(0, dtype=np.int64)
+            scores = np.zeros(0)
+            order = overall
+
+        def top_by(values: np.ndarray) -> List[int]:
+            # Stable sort over the overall order keeps score as the tiebreaker
+            ranked = order[np.argsort(-values[order], kind="stable")[:AWARDS_TOP_N]]
+            return [int(code) for code in ranked if values[code] > 0]
+
+        hall_of_fame = [int(code) for code in order[:AWARDS_TOP_N]]
+        most_golds, most_podiums = top_by(golds), top_by(podiums)
+        player_names = resolve_names(
+            [display_uuids[code] for code in {*hall_of_fame, *most_golds, *most_podiums}]
+            + [uuid for _, uuid, _ in champions]
+        )
+
+        def entry(code: int) -> Dict[str, Any]:
+            uuid = display_uuids[code]
+            return {
+                "rank": int(overall[code]),
+                "uuid": uuid,
+                "player_name": player_names.get(uuid) or 'Unknown Player',
+                "score": float(scores[code]),
+                "golds": int(golds[code]),
+                "podiums": int(podiums[code]),
+                "stats_ranked": int(stats_ranked[code])
+            }
+
+        dashboard = {
+            "summary": {
+                "total_stats_available": len(signature),
+                "total_players_cached": len(load_user_cache()),
+                "total_players_ranked": player_count
+            },
+            "leaderboards": [
+                {
+                    "stat_id": stat_name,
+                    "stat_label": stat_label(stat_name),
+                    "top_players": display_boards[stat_name].rows(0, 5)
+                }
+                for stat_name in TOP_STATS_DISPLAY if stat_name in display_boards
+            ],
+            "awards_overview": [
+                {
+                    "id": stat_name,
+                    "label": stat_label(stat_name),
+                    "champion": {
+                        "uuid": uuid,
+                        "player_name": player_names.get(uuid) or 'Unknown Player',
+                        "value": value
+                    }
+                }
+                for stat_name, uuid, value in champions
+            ],
+            "hall_of_fame": [entry(code) for code in hall_of_fame],
+            "most_golds": [entry(code) for code in most_golds],
+            "most_podiums": [entry(code) for code in most_podiums],
+            "generated_at": datetime.now(timezone.utc).isoformat()
+        }
+        players = {
+            key: (int(overall[code]), int(golds[code]), int(podiums[code]), float(scores[code]), int(stats_ranked[code]))
+            for key, code in codes.items()
+        }
+
+        with self._lock:
+            self._signature = signature
+            self._dashboard = dashboard
+            self._players = players
+
+    def refresh(self) -> bool:
+        """Recomputes if any ranking file changed since the last run. Returns True if it did."""
+        with self._refresh_lock:
+            # Read under the lock, so a refresh that waited sees the files as they are now
+            signature = leaderboard_store.signature()
+            if signature == self._signature:
+                return False
+            self.compute(signature)
+            return True
+
+    @property
+    def ready(self) -> bool:
+        return self._dashboard is not None
+
+    def dashboard(self) -> Dict[str, Any]:
+        """The precomputed dashboard payload (computed on the spot only before the first run)."""
+        if self._dashboard is None:
+            self.refresh()
+        return self._dashboard
+
+    def player_awards(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """A player's overall rank, #1s, podiums and composite score, or None if unranked."""
+        with self._lock:
+            awards = self._players.get(uuid_key(uuid))
+        if awards is None:
+            return None
+        overall_rank, golds, podiums, score, stats_ranked = awards
+        return {
+            "overall_rank": overall_rank,
+            "golds": golds,
+            "podiums": podiums,
+            "score": score,
+            "stats_ranked": stats_ranked
+        }
+
+    async def run(self, interval: float = AWARDS_CHECK_INTERVAL_SECONDS):
+        """Background job: recompute in a worker thread whenever the rankings change."""
+        while True:
+            try:
+                if await asyncio.to_thread(self.refresh):
+                    print(f"✓ Stats awards recomputed ({len(self._players)} players)")
+            except Exception as e:
+                print(f"ERROR computing stats awards: {e}")
+            await asyncio.sleep(interval)
+
+
+awards_engine = AwardsEngine()
+file_watcher.watch(str(leaderboard_store.rankings_dir), awards_engine.refresh, debounce=AWARDS_DEBOUNCE_SECONDS)
+
+
+async def get_stats_dashboard() -> Dict[str, Any]:
+    """
+    Essential leaderboards, summary data and the Hall of Fame for the frontend dashboard.
+    Served from the awards engine's precomputed payload.
+    """
+    if not awards_engine.ready:
+        return await asyncio.to_thread(awards_engine.dashboard)
+    return awards_engine.dashboard()
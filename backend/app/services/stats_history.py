@@ -0,0 +1,289 @@
+# backend/app/services/stats_history.py
+"""
+Ranking history for "gains this week" style views.
+
+MinecraftStats rankings are point-in-time, so a background job periodically
+captures every ranking into one compressed .npz snapshot: a shared array of
+player keys plus, per stat, (player code, rank, value) arrays. Gains and rank
+movement over a window are vectorized joins between a stat's current board
+and the snapshot taken at the start of that window.
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from ..config import get_settings
+from .stats import leaderboard_store, Leaderboard, StatsNotFound, uuid_key
+from .name_resolver import resolve_names
+
+settings = get_settings()
+
+SNAPSHOT_CHECK_INTERVAL_SECONDS = 600
+SNAPSHOT_CACHE_SIZE = 32  # (snapshot, stat) arrays kept decompressed
+SNAPSHOT_PREFIX = "rankings-"
+SNAPSHOT_WINDOWS = {
+    "24h": 24 * 3600,
+    "7d": 7 * 24 * 3600,
+    "30d": 30 * 24 * 3600,
+}
+MOVER_DIRECTIONS = ("up", "down")
+
+# One stat in a snapshot: (player keys, ranks, values)
+StatArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def board_keys(board: Leaderboard) -> np.ndarray:
+    return np.array([uuid_key(uuid) for uuid in board.uuids], dtype="S32")
+
+
+def board_values(board: Leaderboard) -> np.ndarray:
+    """Values as float64; anything non-numeric becomes NaN."""
+    return np.fromiter(
+        (value if isinstance(value, (int, float)) else np.nan for value in board.values),
+        dtype=np.float64,
+        count=len(board)
+    )
+
+
+def _number(value: float) -> Optional[float]:
+    if np.isnan(value):
+        return None
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class SnapshotStore:
+    """Compressed ranking snapshots under STATS_SNAPSHOT_DIR, with retention."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times: Optional[List[int]] = None  # sorted capture times (epoch seconds)
+        self._signature: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._arrays: "OrderedDict[Tuple[int, str], Optional[StatArrays]]" = OrderedDict()
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.STATS_SNAPSHOT_DIR)
+
+    def _path(self, captured_at: int) -> Path:
+        return self.directory / f"{SNAPSHOT_PREFIX}{captured_at}.npz"
+
+    def times(self) -> List[int]:
+        """Capture times of the stored snapshots, oldest first."""
+        with self._lock:
+            if self._times is None:
+                times = []
+                if self.directory.is_dir():
+                    for path in self.directory.glob(f"{SNAPSHOT_PREFIX}*.npz"):
+                        stamp = path.stem[len(SNAPSHOT_PREFIX):]
+                        if stamp.isdigit():
+                            times.append(int(stamp))
+                self._times = sorted(times)
+            return list(self._times)
+
+    def capture(self, now: Optional[float] = None) -> Optional[int]:
+        """Snapshots every ranking file unless nothing changed since the last capture."""
+        signature = leaderboard_store.signature()
+        if not signature or signature == self._signature:
+            return None
+
+        codes: Dict[bytes, int] = {}
+        arrays: Dict[str, np.ndarray] = {}
+        for stat_name, _ in signature:
+            board = leaderboard_store.get(stat_name, keep=False)
+            if board is None:
+                continue
+            keys = board_keys(board)
+            arrays[f"codes_{stat_name}"] = np.fromiter(
+                (codes.setdefault(key, len(codes)) for key in keys.tolist()), dtype=np.int32, count=len(keys)
+            )
+            arrays[f"ranks_{stat_name}"] = np.frombuffer(board.ranks, dtype=np.int64).astype(np.int32)
+            arrays[f"values_{stat_name}"] = board_values(board)
+        arrays["players"] = np.array(list(codes), dtype="S32")
+
+        captured_at = int(time.time() if now is None else now)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(captured_at)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+        times = self.times()
+        with self._lock:
+            self._times = sorted({*times, captured_at})
+            self._signature = signature
+        self.prune(captured_at)
+        return captured_at
+
+    def prune(self, now: Optional[float] = None):
+        """Deletes snapshots past the retention period (the newest one is always kept)."""
+        cutoff = (time.time() if now is None else now) - settings.STATS_SNAPSHOT_RETENTION_DAYS * 24 * 3600
+        times = self.times()
+        expired = [captured_at for captured_at in times[:-1] if captured_at < cutoff]
+        for captured_at in expired:
+            try:
+                self._path(captured_at).unlink()
+            except OSError as e:
+                print(f"WARN: Could not delete stats snapshot {captured_at}: {e}")
+        expired = set(expired)
+        with self._lock:
+            self._times = [captured_at for captured_at in times if captured_at not in expired]
+            for key in [key for key in self._arrays if key[0] in expired]:
+                del self._arrays[key]
+
+    def snapshot_at(self, target: float) -> Optional[int]:
+        """Latest snapshot taken at or before `target` (the oldest one if history is shorter)."""
+        times = self.times()
+        if not times:
+            return None
+        index = bisect_right(times, target)
+        return times[index - 1] if index else times[0]
+
+    def stat_arrays(self, captured_at: int, stat_name: str) -> Optional[StatArrays]:
+        """(player keys, ranks, values) for one stat in one snapshot, or None if it wasn't captured."""
+        cache_key = (captured_at, stat_name)
+        with self._lock:
+            if cache_key in self._arrays:
+                self._arrays.move_to_end(cache_key)
+                return self._arrays[cache_key]
+
+        arrays = None
+        try:
+            with np.load(self._path(captured_at)) as snapshot:
+                if f"codes_{stat_name}" in snapshot.files:
+                    arrays = (
+                        snapshot["players"][snapshot[f"codes_{stat_name}"]],
+                        snapshot[f"ranks_{stat_name}"],
+                        snapshot[f"values_{stat_name}"],
+                    )
+        except (OSError, ValueError) as e:
+            print(f"ERROR reading stats snapshot {captured_at}: {e}")
+            return None
+
+        with self._lock:
+            self._arrays[cache_key] = arrays
+            while len(self._arrays) > SNAPSHOT_CACHE_SIZE:
+                self._arrays.popitem(last=False)
+        return arrays
+
+    async def run(self):
+        """Background job: capture a snapshot every STATS_SNAPSHOT_INTERVAL_HOURS."""
+        interval = settings.STATS_SNAPSHOT_INTERVAL_HOURS * 3600
+        while True:
+            try:
+                times = await asyncio.to_thread(self.times)
+                if not times or time.time() - times[-1] >= interval:
+                    captured_at = await asyncio.to_thread(self.capture)
+                    if captured_at:
+                        print(f"✓ Stats snapshot captured ({captured_at})")
+            except Exception as e:
+                print(f"ERROR capturing stats snapshot: {e}")
+            await asyncio.sleep(SNAPSHOT_CHECK_INTERVAL_SECONDS)
+
+
+snapshot_store = SnapshotStore()
+
+
+def _compare(stat_name: str, window: str) -> Optional[Dict[str, Any]]:
+    """
+    Joins a stat's current board with the snapshot at the start of `window`.
+    Returns None if the stat doesn't exist; raises StatsNotFound if there is no history for it.
+    """
+    board = leaderboard_store.get(stat_name)
+    if board is None:
+        return None
+    captured_at = snapshot_store.snapshot_at(time.time() - SNAPSHOT_WINDOWS[window])
+    previous = snapshot_store.stat_arrays(captured_at, stat_name) if captured_at is not None else None
+    if previous is None:
+        raise StatsNotFound(f"No history recorded for '{stat_name}' yet.")
+    old_keys, old_ranks, old_values = previous
+
+    # Players missing from the snapshot had nothing yet
+    keys = board_keys(board)
+    matched = np.zeros(len(keys), dtype=bool)
+    previous_values = np.zeros(len(keys))
+    previous_ranks = np.zeros(len(keys), dtype=np.int64)
+    if len(old_keys):
+        sorter = np.argsort(old_keys, kind="stable")
+        old_index = sorter[np.searchsorted(old_keys, keys, sorter=sorter).clip(0, len(old_keys) - 1)]
+        matched = old_keys[old_index] == keys
+        previous_values[matched] = old_values[old_index[matched]]
+        previous_ranks[matched] = old_ranks[old_index[matched]]
+
+    return {
+        "board": board,
+        "since": captured_at,
+        "values": board_values(board),
+        "ranks": np.frombuffer(board.ranks, dtype=np.int64),
+        "matched": matched,
+        "previous_values": previous_values,
+        "previous_ranks": previous_ranks,
+    }
+
+
+def _page(comparison: Dict[str, Any], window: str, stat_name: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    names = resolve_names(row["uuid"] for row in rows)
+    for row in rows:
+        row["player_name"] = names.get(row["uuid"]) or 'Unknown Player'
+    return {
+        "stat_id": stat_name,
+        "window": window,
+        "since": datetime.fromtimestamp(comparison["since"], tz=timezone.utc).isoformat(),
+        "rows": rows
+    }
+
+
+def get_stat_gains(stat_name: str, window: str = "7d", limit: int = 20) -> Optional[Dict[str, Any]]:
+    """Players whose value grew the most over `window`, biggest gain first."""
+    comparison = _compare(stat_name, window)
+    if comparison is None:
+        return None
+    board = comparison["board"]
+    gains = comparison["values"] - comparison["previous_values"]
+    candidates = np.flatnonzero(np.nan_to_num(gains) > 0)
+    top = candidates[np.argsort(-gains[candidates], kind="stable")[:limit]]
+
+    rows = [
+        {
+            "position": position,
+            "uuid": board.uuids[i],
+            "rank": board.ranks[i],
+            "value": _number(comparison["values"][i]),
+            "previous_value": _number(comparison["previous_values"][i]),
+            "gain": _number(gains[i])
+        }
+        for position, i in enumerate(top.tolist(), start=1)
+    ]
+    return _page(comparison, window, stat_name, rows)
+
+
+def get_stat_movers(stat_name: str, window: str = "7d", limit: int = 20, direction: str = "up") -> Optional[Dict[str, Any]]:
+    """Players whose rank changed the most over `window` (climbers for 'up', fallers for 'down')."""
+    comparison = _compare(stat_name, window)
+    if comparison is None:
+        return None
+    board = comparison["board"]
+    # Positive change = climbed (rank number went down)
+    change = comparison["previous_ranks"] - comparison["ranks"]
+    sign = 1 if direction == "up" else -1
+    candidates = np.flatnonzero(comparison["matched"] & (change * sign > 0))
+    top = candidates[np.argsort(-change[candidates] * sign, kind="stable")[:limit]]
+
+    rows = [
+        {
+            "position": position,
+            "uuid": board.uuids[i],
+            "rank": board.ranks[i],
+            "previous_rank": int(comparison["previous_ranks"][i]),
+            "change": int(change[i]),
+            "value": _number(comparison["values"][i])
+        }
+        for position, i in enumerate(top.tolist(), start=1)
+    ]
+    return _page(comparison, window, stat_name, rows)
@@ -0,0 +1,223 @@
+# backend/app/services/status_history.py
+"""
+Player-count / uptime history for the Minecraft server.
+
+Every status poll is appended to an in-memory ring buffer of raw samples and
+folded into the open 1-minute bucket. Buckets cascade: a closed minute is
+written to disk and folded into the open hour, a closed hour into the open
+day. Closed buckets are appended as fixed-size records to per-resolution
+segment files, so a time range is answered from the finest resolution that
+fits in HISTORY_MAX_POINTS, reading only the segments that overlap it.
+"""
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from ..config import get_settings
+from .server_status import server_status_poller, SERVER_STATUS_POLL_SECONDS
+
+settings = get_settings()
+
+RAW_SAMPLES = 6 * 3600 // SERVER_STATUS_POLL_SECONDS  # ~6h of raw polls kept in memory
+HISTORY_MAX_POINTS = 720  # Auto resolution picks the finest one with at most this many points
+
+# name, bucket width, segment file span, retention (None = forever)
+RESOLUTIONS: Tuple[Tuple[str, int, int, Optional[int]], ...] = (
+    ("1m", 60, 86400, 14 * 86400),
+    ("1h", 3600, 30 * 86400, 400 * 86400),
+    ("1d", 86400, 365 * 86400, None),
+)
+RESOLUTION_NAMES = ("raw",) + tuple(name for name, *_ in RESOLUTIONS)
+
+# Bucket record: start, samples, online samples, sum of player counts, max players, sum of latency (ms)
+RECORD = struct.Struct("<IIIIHf")
+RECORD_DTYPE = np.dtype([
+    ("start", "<u4"), ("samples", "<u4"), ("online", "<u4"),
+    ("players_sum", "<u4"), ("players_max", "<u2"), ("latency_sum", "<f4"),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+
+def _merge(bucket: List[float], record: Tuple) -> None:
+    _, samples, online, players_sum, players_max, latency_sum = record
+    bucket[1] += samples
+    bucket[2] += online
+    bucket[3] += players_sum
+    bucket[4] = max(bucket[4], players_max)
+    bucket[5] += latency_sum
+
+
+def _point(start: int, samples: int, online: int, players_sum: int, players_max: int, latency_sum: float) -> Dict[str, Any]:
+    return {
+        "time": int(start),
+        "uptime": round(online / samples, 4) if samples else None,
+        "players_avg": round(players_sum / samples, 2) if samples else None,
+        "players_max": int(players_max),
+        "latency_avg": round(latency_sum / online, 2) if online else None,
+    }
+
+
+class StatusHistory:
+    """Raw ring buffer plus cascaded 1m/1h/1d buckets persisted as segment files."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw: deque = deque(maxlen=RAW_SAMPLES)  # (epoch, online, players, latency)
+        # Open (not yet written) bucket per resolution level: [start, samples, online, players_sum, players_max, latency_sum]
+        self._open: List[Optional[List[float]]] = [None] * len(RESOLUTIONS)
+        self._recovered = False
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.STATUS_HISTORY_DIR)
+
+    def _segment_path(self, level: int, start: int) -> Path:
+        name, _, span, _ = RESOLUTIONS[level]
+        return self.directory / f"{name}-{start // span * span}.bin"
+
+    def _segments(self, level: int) -> List[Tuple[int, Path]]:
+        """(segment start, path) for one resolution, oldest first."""
+        name = RESOLUTIONS[level][0]
+        segments = []
+        if self.directory.is_dir():
+            for path in self.directory.glob(f"{name}-*.bin"):
+                stamp = path.stem[len(name) + 1:]
+                if stamp.isdigit():
+                    segments.append((int(stamp), path))
+        return sorted(segments)
+
+    def _read(self, level: int, since: float, until: float) -> np.ndarray:
+        """Written records of one resolution with since <= start < until, reading only overlapping segments."""
+        span = RESOLUTIONS[level][2]
+        chunks = [
+            np.fromfile(path, dtype=RECORD_DTYPE)
+            for segment_start, path in self._segments(level)
+            if segment_start < until and segment_start + span > since
+        ]
+        if not chunks:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        records = np.concatenate(chunks)
+        return records[(records["start"] >= since) & (records["start"] < until)]
+
+    def _write(self, level: int, record: Tuple):
+        path = self._segment_path(level, int(record[0]))
+        is_new = not path.exists()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(RECORD.pack(int(record[0]), int(record[1]), int(record[2]), int(record[3]),
+                                min(int(record[4]), 0xFFFF), float(record[5])))
+        if is_new:
+            self._prune(level)
+
+    def _prune(self, level: int):
+        """Deletes segments of one resolution past its retention."""
+        _, _, span, retention = RESOLUTIONS[level]
+        if retention is None:
+            return
+        cutoff = time.time() - retention
+        for segment_start, path in self._segments(level):
+            if segment_start + span < cutoff:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"WARN: Could not delete status history segment {path.name}: {e}")
+
+    def _fold(self, level: int, record: Tuple):
+        """Adds a record to the open bucket at `level`, closing (writing and cascading) it first if it's over."""
+        width = RESOLUTIONS[level][1]
+        start = int(record[0]) // width * width
+        bucket = self._open[level]
+        if bucket is not None and bucket[0] != start:
+            self._close(level)
+            bucket = None
+        if bucket is None:
+            bucket = self._open[level] = [start, 0, 0, 0, 0, 0.0]
+        _merge(bucket, record)
+
+    def _close(self, level: int):
+        bucket = self._open[level]
+        self._open[level] = None
+        self._write(level, tuple(bucket))
+        if level + 1 < len(RESOLUTIONS):
+            self._fold(level + 1, tuple(bucket))
+
+    def _last_written(self, level: int) -> Optional[int]:
+        """Start of the newest record written at `level`, or None."""
+        for _, path in reversed(self._segments(level)):
+            records = np.fromfile(path, dtype=RECORD_DTYPE)
+            if len(records):
+                return int(records["start"][-1])
+        return None
+
+    def _recover(self):
+        """
+        Rebuilds the open buckets after a restart from what is on disk: hours not
+        yet rolled into a day are re-folded first, then minutes not yet rolled
+        into an hour (closing any hours that finished while the app was down).
+        """
+        for level in range(len(RESOLUTIONS) - 1, 0, -1):
+            last = self._last_written(level)
+            since = last + RESOLUTIONS[level][1] if last is not None else 0
+            for record in self._read(level - 1, since, float("inf")).tolist():
+                self._fold(level, record)
+        self._recovered = True
+
+    def record(self, snapshot: Dict[str, Any], epoch: float):
+        """Adds one status poll (ServerStatusPoller listener)."""
+        online = bool(snapshot.get("online"))
+        players = (snapshot.get("players") or {}).get("online") or 0
+        latency = snapshot.get("latency") if online else None
+        with self._lock:
+            if not self._recovered:
+                self._recover()
+            self._raw.append((epoch, online, players, latency))
+            self._fold(0, (int(epoch), 1, int(online), players, players, latency or 0.0))
+
+    @staticmethod
+    def pick_resolution(since: float, until: float, oldest_raw: Optional[float]) -> str:
+        """Finest resolution with at most HISTORY_MAX_POINTS points over the range (raw only while in memory)."""
+        span = until - since
+        if oldest_raw is not None and since >= oldest_raw and span / SERVER_STATUS_POLL_SECONDS <= HISTORY_MAX_POINTS:
+            return "raw"
+        now = time.time()
+        for name, width, _, retention in RESOLUTIONS:
+            if span / width <= HISTORY_MAX_POINTS and (retention is None or since >= now - retention):
+                return name
+        return RESOLUTIONS[-1][0]
+
+    def query(self, since: float, until: float, resolution: Optional[str] = None) -> Dict[str, Any]:
+        """Points over [since, until) at `resolution` (picked automatically if None)."""
+        with self._lock:
+            if not self._recovered:
+                self._recover()
+            oldest_raw = self._raw[0][0] if self._raw else None
+            resolution = resolution or self.pick_resolution(since, until, oldest_raw)
+
+            if resolution == "raw":
+                points = [
+                    {
+                        "time": int(epoch),
+                        "uptime": 1.0 if online else 0.0,
+                        "players_avg": players,
+                        "players_max": players,
+                        "latency_avg": latency,
+                    }
+                    for epoch, online, players, latency in self._raw
+                    if since <= epoch < until
+                ]
+            else:
+                level = RESOLUTION_NAMES.index(resolution) - 1
+                records = self._read(level, since, until)
+                points = [_point(*record) for record in records.tolist()]
+                bucket = self._open[level]
+                if bucket is not None and since <= bucket[0] < until:
+                    points.append(_point(*bucket))
+
+        return {"resolution": resolution, "since": int(since), "until": int(until), "points": points}
+
+
+status_history = StatusHistory()
+server_status_poller.add_listener(status_history.record)
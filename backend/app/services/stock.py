@@ -1,73 +1,93 @@
 # backend/app/services/stock.py
+"""
+Player shop stock, as written by the WebPerks plugin's StockUpdater.
+
+The stock file lists one record per shop offer:
+    [{"shop_uuid": "...", "trade_id": "1", "stock_remaining": 34}, ...]
+`trade_id` is the offer's key in save.yml, so every offer has its own count
+even when a shop sells the same item twice. The file is parsed into a
+StockIndex once per change (via the file watcher); lookups are dict reads.
+"""
 import json
 from pathlib import Path
-from typing import Dict, Optional
-from functools import lru_cache
+from typing import Dict, Optional, Set, Tuple
 from ..config import get_settings
+from .file_watcher import file_watcher
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-@lru_cache(maxsize=1)
-def load_stock_map() -> Dict[str, int]:
-    """
-    Loads stock data from the JSON file and creates a map for fast lookup.
-    
-    File format: [{"shop_uuid": "...", "item_type": "minecraft:elytra", "stock_remaining": 34}, ...]
-    Map format: { 'shop_uuid-item_type': stock_remaining, ... }
-    
-    Returns: Dictionary mapping shop_uuid-item_type to stock count
-    """
-    path = Path(settings.STOCK_FILE_PATH)
-    stock_map = {}
-    
-    if not path.exists():
-        logger.warning(f"Stock file not found at {path}")
-        return stock_map
-    
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            for item in data:
-                shop_uuid = item.get('shop_uuid')
-                item_type = item.get('item_type')
-                stock = item.get('stock_remaining')
-                
-                # Only add valid entries
-                if shop_uuid and item_type and stock is not None:
-                    key = f"{shop_uuid}-{item_type}"
-                    stock_map[key] = stock
-            
-            logger.info(f"Loaded {len(stock_map)} stock entries from {path}")
-            return stock_map
-        
-    except Exception as e:
-        logger.error(f"Failed to load stock file: {e}", exc_info=True)
-        return {}
-
-
-def get_stock_count(shop_uuid: str, result_item_type: str) -> Optional[int]:
+StockKey = Tuple[str, str]  # (shop uuid, trade id)
+
+
+class StockIndex:
+    """Stock per (shop uuid, trade id), also grouped by shop for per-shop queries."""
+
+    def __init__(self, entries: Optional[Dict[StockKey, int]] = None):
+        self.entries: Dict[StockKey, int] = entries or {}
+        self.by_shop: Dict[str, Dict[str, int]] = {}
+        for (shop_uuid, trade_id), stock in self.entries.items():
+            self.by_shop.setdefault(shop_uuid, {})[trade_id] = stock
+
+    def get(self, shop_uuid: str, trade_id: str) -> Optional[int]:
+        return self.entries.get((shop_uuid, trade_id))
+
+    def shop(self, shop_uuid: str) -> Optional[Dict[str, int]]:
+        """{trade id: stock} for one shop, or None if the plugin has no stock for it."""
+        return self.by_shop.get(shop_uuid)
+
+    def changed_shops(self, other: "StockIndex") -> Set[str]:
+        """Shops whose stock differs between this index and `other`."""
+        return {
+            shop_uuid for shop_uuid in self.by_shop.keys() | other.by_shop.keys()
+            if self.by_shop.get(shop_uuid) != other.by_shop.get(shop_uuid)
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def _read_stock_index(path: Path) -> StockIndex:
+    """Parses the stock file into a StockIndex, skipping malformed records."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    entries: Dict[StockKey, int] = {}
+    skipped = 0
+    for item in data:
+        shop_uuid = item.get('shop_uuid')
+        trade_id = item.get('trade_id')
+        stock = item.get('stock_remaining')
+
+        if not shop_uuid or trade_id is None or stock is None:
+            skipped += 1
+            continue
+        # save.yml offer keys are strings ('1', '2', ...); accept numeric ids too
+        entries[(shop_uuid, str(trade_id))] = stock
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} stock records without shop_uuid/trade_id/stock_remaining in {path}")
+    logger.info(f"Loaded {len(entries)} stock entries from {path}")
+    return StockIndex(entries)
+
+
+# Reloaded by the file watcher whenever the plugin rewrites the stock file
+stock_index = file_watcher.watched(settings.STOCK_FILE_PATH, _read_stock_index, StockIndex())
+
+
+def get_stock_count(shop_uuid: Optional[str], trade_id: Optional[str]) -> Optional[int]:
     """
-    Looks up stock for a specific item in a shop.
-    
-    Args:
-        shop_uuid: UUID of the shop
-        result_item_type: Item type from the trade (e.g., "minecraft:elytra")
-    
+    Looks up stock for one offer of a shop.
+
     Returns:
         Stock count (int) if found, None if not in stock file
     """
-    if not shop_uuid or not result_item_type:
+    if not shop_uuid or trade_id is None:
         return None
-    
-    stock_map = load_stock_map()
-    key = f"{shop_uuid}-{result_item_type}"
-    return stock_map.get(key)  # Returns None if key not found
+    return stock_index.get().get(shop_uuid, str(trade_id))
 
 
-def clear_stock_cache():
-    """Clear the cached stock map (call when file is updated)."""
-    load_stock_map.cache_clear()
-    logger.info("Stock cache cleared")
+def get_shop_stock(shop_uuid: str) -> Optional[Dict[str, int]]:
+    """{trade id: stock} for a shop, or None if the stock file has nothing for it."""
+    return stock_index.get().shop(shop_uuid)
@@ -0,0 +1,90 @@
+# backend/app/services/trade_export.py
+"""
+Streaming export of the trade log as CSV or NDJSON.
+
+Rows are fetched with a server-side cursor in fixed-size batches and each
+batch is encoded into one chunk, so memory stays flat however many rows
+the export covers.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional, List, Any
+from sqlalchemy import select, or_, false
+from ..database import get_shopkeepers_session
+from ..models.database import ShopkeeperTrade
+from .trade_index import apply_time_range
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_COLUMNS = (
+    ShopkeeperTrade.timestamp,
+    ShopkeeperTrade.player_uuid,
+    ShopkeeperTrade.player_name,
+    ShopkeeperTrade.shop_uuid,
+    ShopkeeperTrade.shop_type,
+    ShopkeeperTrade.shop_world,
+    ShopkeeperTrade.shop_x,
+    ShopkeeperTrade.shop_y,
+    ShopkeeperTrade.shop_z,
+    ShopkeeperTrade.shop_owner_uuid,
+    ShopkeeperTrade.shop_owner_name,
+    ShopkeeperTrade.item_1_type,
+    ShopkeeperTrade.item_1_amount,
+    ShopkeeperTrade.item_2_type,
+    ShopkeeperTrade.item_2_amount,
+    ShopkeeperTrade.result_item_type,
+    ShopkeeperTrade.result_item_amount,
+    ShopkeeperTrade.trade_count,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def build_export_query(
+    player_uuid: Optional[str] = None,
+    as_buyer: bool = True,
+    as_seller: bool = True,
+    shop_uuid: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Select statement for an export scope (whole server, one player or one shop), oldest first."""
+    stmt = select(*EXPORT_COLUMNS)
+    if player_uuid:
+        roles = []
+        if as_buyer:
+            roles.append(ShopkeeperTrade.player_uuid == player_uuid)
+        if as_seller:
+            roles.append(ShopkeeperTrade.shop_owner_uuid == player_uuid)
+        stmt = stmt.where(or_(*roles)) if roles else stmt.where(false())
+    if shop_uuid:
+        stmt = stmt.where(ShopkeeperTrade.shop_uuid == shop_uuid)
+    return apply_time_range(stmt, since, until).order_by(ShopkeeperTrade.rowid)
+
+
+def _encode_csv(rows: List[Any], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows: List[Any]) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in rows)
+
+
+def stream_trade_export(stmt, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Yields encoded chunks of `stmt` results, one chunk per fetched batch."""
+    with get_shopkeepers_session() as db:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            yield _encode_csv([], header=True)
+        for batch in result.partitions():
+            yield _encode_csv(batch, header=False) if fmt == "csv" else _encode_ndjson(batch)
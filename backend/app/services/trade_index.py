@@ -0,0 +1,107 @@
+# backend/app/services/trade_index.py
+"""
+Time-range filtering for the trade log.
+
+`ShopkeeperTrade.timestamp` is text and the Shopkeepers DB is read-only, so we
+keep a sidecar table (TRADE_INDEX_DB) mapping each trade rowid to its parsed
+epoch seconds, indexed by epoch. A background job extends it incrementally
+from the highest indexed rowid, and trade queries join it through the
+ATTACHed schema; requests never wait for a sync, so time-ranged queries may
+miss trades logged in the last SYNC_INTERVAL_SECONDS.
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import select, func, insert, MetaData
+from ..database import trade_index_engine, get_shopkeepers_session
+from ..models.database import ShopkeeperTrade, TradeEpoch, TradeIndexBase
+from .trade_log import fetch_timestamps_after, parse_trade_timestamp
+import logging
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL_SECONDS = 5
+SYNC_BATCH_SIZE = 10000
+
+# The same table as seen from the Shopkeepers connection (ATTACHed as "trade_index")
+attached_trade_epoch = TradeEpoch.__table__.to_metadata(MetaData(), schema="trade_index")
+
+
+def to_epoch(value: datetime) -> int:
+    """Converts a datetime into epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class TradeIndex:
+    """Keeps the sidecar epoch index in step with the trade log."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def ensure_table(self):
+        """Creates the sidecar table if needed, so queries can join it before the first sync finishes."""
+        if not self._initialized:
+            TradeIndexBase.metadata.create_all(bind=trade_index_engine)
+            self._initialized = True
+
+    def sync(self) -> int:
+        """Indexes trades added since the last sync. Returns the number of rows added."""
+        with self._lock:
+            self.ensure_table()
+
+            added = 0
+            with trade_index_engine.begin() as conn:
+                watermark = conn.execute(select(func.max(TradeEpoch.trade_rowid))).scalar() or 0
+
+            while True:
+                with get_shopkeepers_session() as db:
+                    rows = fetch_timestamps_after(db, watermark, SYNC_BATCH_SIZE)
+                if not rows:
+                    break
+                with trade_index_engine.begin() as conn:
+                    conn.execute(insert(TradeEpoch.__table__), [
+                        {"trade_rowid": rowid, "epoch": parse_trade_timestamp(timestamp)}
+                        for rowid, timestamp in rows
+                    ])
+                watermark = rows[-1][0]
+                added += len(rows)
+                if len(rows) < SYNC_BATCH_SIZE:
+                    break
+
+            if added:
+                logger.info(f"Trade index: indexed {added} new trades (up to rowid {watermark})")
+            return added
+
+    async def run(self):
+        """Background job: catch up with the trade log (the first pass parses the whole log), then follow it."""
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.error(f"Trade index sync failed: {e}", exc_info=True)
+            await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+
+
+trade_index = TradeIndex()
+
+
+def apply_time_range(query, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Restricts a ShopkeeperTrade query to trades in [since, until).
+    Returns the query unchanged when neither bound is given.
+    """
+    if since is None and until is None:
+        return query
+
+    # No sync here: the background job keeps the index within SYNC_INTERVAL_SECONDS of the log
+    trade_index.ensure_table()
+    rowids = select(attached_trade_epoch.c.trade_rowid)
+    if since is not None:
+        rowids = rowids.where(attached_trade_epoch.c.epoch >= to_epoch(since))
+    if until is not None:
+        rowids = rowids.where(attached_trade_epoch.c.epoch < to_epoch(until))
+    return query.filter(ShopkeeperTrade.rowid.in_(rowids))
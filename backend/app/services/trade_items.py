@@ -0,0 +1,165 @@
+# backend/app/services/trade_items.py
+"""
+Parses the item metadata columns of the trade log (`item_1_metadata`,
+`item_2_metadata`, `result_item_metadata`) into the same item structure the
+live shop catalog uses, including enrichment (names, icons, custom items such
+as the Haven Crest).
+
+Most trades repeat the same few items, so parsed + enriched items are cached
+by (item type, metadata hash); only the amount differs per row.
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import yaml
+from .yaml_parser import parse_item_data
+from .item_mapping import enrich_item_data
+import logging
+
+logger = logging.getLogger(__name__)
+
+ITEM_CACHE_SIZE = 4096
+
+# Legacy Bukkit enchantment names -> Minecraft ids (names not listed already match, lowercased)
+LEGACY_ENCHANTMENTS = {
+    "PROTECTION_ENVIRONMENTAL": "protection",
+    "PROTECTION_FIRE": "fire_protection",
+    "PROTECTION_FALL": "feather_falling",
+    "PROTECTION_EXPLOSIONS": "blast_protection",
+    "PROTECTION_PROJECTILE": "projectile_protection",
+    "OXYGEN": "respiration",
+    "WATER_WORKER": "aqua_affinity",
+    "DAMAGE_ALL": "sharpness",
+    "DAMAGE_UNDEAD": "smite",
+    "DAMAGE_ARTHROPODS": "bane_of_arthropods",
+    "LOOT_BONUS_MOBS": "looting",
+    "SWEEPING": "sweeping_edge",
+    "SWEEPING_EDGE": "sweeping_edge",
+    "DIG_SPEED": "efficiency",
+    "DURABILITY": "unbreaking",
+    "LOOT_BONUS_BLOCKS": "fortune",
+    "ARROW_DAMAGE": "power",
+    "ARROW_KNOCKBACK": "punch",
+    "ARROW_FIRE": "flame",
+    "ARROW_INFINITE": "infinity",
+    "LUCK": "luck_of_the_sea",
+}
+
+# Legacy (pre-components) Bukkit item meta keys -> component keys
+LEGACY_META_KEYS = {
+    "display-name": "minecraft:custom_name",
+    "lore": "minecraft:lore",
+    "custom-model-data": "minecraft:custom_model_data",
+}
+
+
+def enchantment_key(name: Any) -> str:
+    """Namespaced enchantment id for a legacy Bukkit enchantment name (e.g. DAMAGE_ALL -> minecraft:sharpness)."""
+    name = str(name)
+    if ":" in name:
+        return name.lower()
+    return f"minecraft:{LEGACY_ENCHANTMENTS.get(name.upper(), name.lower())}"
+
+
+def parse_metadata_components(metadata: Optional[str]) -> Dict[str, Any]:
+    """Extracts an item components map from a serialized trade-log metadata string."""
+    if not metadata or not metadata.strip():
+        return {}
+    try:
+        data = yaml.safe_load(metadata)
+    except yaml.YAMLError as e:
+        logger.warning(f"Failed to parse trade item metadata: {metadata[:50]}... Error: {e}")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    if isinstance(data.get("components"), dict):
+        return data["components"]
+
+    components = {key: value for key, value in data.items() if str(key).startswith("minecraft:")}
+    for legacy_key, component_key in LEGACY_META_KEYS.items():
+        if legacy_key in data:
+            value = data[legacy_key]
+            components[component_key] = json.dumps(value) if isinstance(value, list) else value
+    if isinstance(data.get("enchants"), dict):
+        components["minecraft:enchantments"] = json.dumps({
+            enchantment_key(name): level for name, level in data["enchants"].items()
+        })
+    return components
+
+
+def _copy_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an item dict; nested lists/dicts are deep-copied, scalars shared (most items have none)."""
+    return {key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value for key, value in item.items()}
+
+
+class TradeItemCache:
+    """
+    Bounded LRU of enriched items keyed by (item type, metadata hash).
+    put() and get() copy nested values (enchantments, container contents), so
+    a caller can't alter data shared with other rows or with the cache.
+    """
+
+    def __init__(self, max_size: int = ITEM_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._items: "OrderedDict[Tuple[str, bytes], Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def key(item_type: str, metadata: Optional[str]) -> Tuple[str, bytes]:
+        digest = hashlib.blake2b((metadata or "").encode("utf-8"), digest_size=16).digest()
+        return item_type, digest
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+        return None if item is None else _copy_item(item)
+
+    def put(self, key: Tuple[str, bytes], item: Dict[str, Any]):
+        item = _copy_item(item)
+        with self._lock:
+            self._items[key] = item
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+
+trade_item_cache = TradeItemCache()
+
+
+def cached_trade_item(item_type: str, amount: Optional[int], metadata: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Synchronous cache-only lookup; returns None on a miss (use enrich_trade_item then)."""
+    item = trade_item_cache.get(trade_item_cache.key(item_type, metadata))
+    if item is not None:
+        item["amount"] = amount
+    return item
+
+
+async def enrich_trade_item(item_type: Optional[str], amount: Optional[int], metadata: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Returns the enriched item for one trade-log item slot (None for an empty slot)."""
+    if not item_type:
+        return None
+
+    key = trade_item_cache.key(item_type, metadata)
+    item = trade_item_cache.get(key)
+    if item is None:
+        try:
+            item = parse_item_data({
+                "id": item_type,
+                "count": 1,
+                "components": parse_metadata_components(metadata)
+            })
+            item = await enrich_item_data(item)
+        except Exception as e:
+            # One odd item must not fail a whole page of trades: serve it bare (not cached)
+            logger.warning(f"Failed to enrich trade item {item_type}: {e}")
+            return parse_item_data({"id": item_type, "count": amount})
+        item.pop("amount", None)
+        trade_item_cache.put(key, item)
+
+    item["amount"] = amount
+    return item
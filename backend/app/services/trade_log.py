@@ -0,0 +1,76 @@
+# backend/app/services/trade_log.py
+"""
+Helpers for reading the Shopkeepers trade log (read-only SQLite DB).
+
+The trade table is append-only, so its rowid works as a watermark: anything
+with a rowid above the last one we saw is a new trade.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional, Any
+from dateutil import parser as date_parser
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from ..models.database import ShopkeeperTrade
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns needed to roll a trade row into aggregates (see trade_rollups.py)
+TAIL_COLUMNS = (
+    ShopkeeperTrade.rowid,
+    ShopkeeperTrade.timestamp,
+    ShopkeeperTrade.player_uuid,
+    ShopkeeperTrade.player_name,
+    ShopkeeperTrade.shop_uuid,
+    ShopkeeperTrade.shop_owner_uuid,
+    ShopkeeperTrade.shop_owner_name,
+    ShopkeeperTrade.result_item_type,
+    ShopkeeperTrade.result_item_amount,
+    ShopkeeperTrade.trade_count,
+)
+
+
+def parse_trade_timestamp(value: Optional[str]) -> Optional[int]:
+    """
+    Converts a trade-log timestamp string into epoch seconds (UTC).
+    Shopkeepers writes ISO-8601 instants (e.g. '2024-06-01T12:00:00.123Z');
+    anything else falls back to dateutil. Naive values are treated as UTC.
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        try:
+            parsed = date_parser.parse(value)
+        except (ValueError, OverflowError):
+            logger.warning(f"Unparseable trade timestamp: {value!r}")
+            return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def get_trade_log_watermark(db: Session) -> int:
+    """Returns the highest rowid currently in the trade log (0 if empty)."""
+    return db.execute(select(func.max(ShopkeeperTrade.rowid))).scalar() or 0
+
+
+def fetch_trades_after(db: Session, after_rowid: int, limit: int = 5000) -> List[Any]:
+    """Returns up to `limit` trade rows (TAIL_COLUMNS) with rowid > after_rowid, oldest first."""
+    stmt = select(*TAIL_COLUMNS)\
+        .where(ShopkeeperTrade.rowid > after_rowid)\
+        .order_by(ShopkeeperTrade.rowid)\
+        .limit(limit)
+    return db.execute(stmt).all()
+
+
+def fetch_timestamps_after(db: Session, after_rowid: int, limit: int = 5000) -> List[Any]:
+    """Returns up to `limit` (rowid, timestamp) pairs with rowid > after_rowid, oldest first."""
+    stmt = select(ShopkeeperTrade.rowid, ShopkeeperTrade.timestamp)\
+        .where(ShopkeeperTrade.rowid > after_rowid)\
+        .order_by(ShopkeeperTrade.rowid)\
+        .limit(limit)
+    return db.execute(stmt).all()
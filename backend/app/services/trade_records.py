@@ -0,0 +1,86 @@
+# backend/app/services/trade_records.py
+"""
+ORM-free serialization for trade list endpoints.
+
+Selects only the columns a TradeRecord needs as plain row tuples and builds
+response dicts directly, skipping ORM hydration and per-row Pydantic
+validation (the bulk of the CPU cost at large limits).
+"""
+from typing import List, Dict, Any, Sequence
+from sqlalchemy import select
+from ..models.database import ShopkeeperTrade
+from .trade_items import cached_trade_item, enrich_trade_item
+
+# TradeRecord fields, in order, followed by the three metadata columns
+TRADE_RECORD_COLUMNS = (
+    ShopkeeperTrade.timestamp,
+    ShopkeeperTrade.player_uuid,
+    ShopkeeperTrade.player_name,
+    ShopkeeperTrade.shop_uuid,
+    ShopkeeperTrade.shop_owner_uuid,
+    ShopkeeperTrade.shop_owner_name,
+    ShopkeeperTrade.item_1_type,
+    ShopkeeperTrade.item_1_amount,
+    ShopkeeperTrade.item_2_type,
+    ShopkeeperTrade.item_2_amount,
+    ShopkeeperTrade.result_item_type,
+    ShopkeeperTrade.result_item_amount,
+    ShopkeeperTrade.trade_count,
+    ShopkeeperTrade.item_1_metadata,
+    ShopkeeperTrade.item_2_metadata,
+    ShopkeeperTrade.result_item_metadata,
+)
+TRADE_RECORD_FIELDS = tuple(column.key for column in TRADE_RECORD_COLUMNS[:13])
+
+# The rest of the trade-log row: /trades/player and /trades/shop returned whole
+# rows before they were serialized as TradeRecords, so they still include these
+FULL_ROW_COLUMNS = (
+    ShopkeeperTrade.rowid,
+    ShopkeeperTrade.shop_type,
+    ShopkeeperTrade.shop_world,
+    ShopkeeperTrade.shop_x,
+    ShopkeeperTrade.shop_y,
+    ShopkeeperTrade.shop_z,
+)
+FULL_ROW_FIELDS = (
+    tuple(column.key for column in TRADE_RECORD_COLUMNS[13:])
+    + tuple(column.key for column in FULL_ROW_COLUMNS)
+)
+
+# (type, amount, metadata) row positions for item_1, item_2 and result_item
+ITEM_SLOTS = (
+    ("item_1", 6, 7, 13),
+    ("item_2", 8, 9, 14),
+    ("result_item", 10, 11, 15),
+)
+
+
+def select_trade_records(full_rows: bool = False):
+    """
+    Select statement for TradeRecord rows (add filters/order/limit as needed).
+    `full_rows` also selects the remaining trade-log columns (raw metadata,
+    rowid, shop type and location), which rows_to_records then includes.
+    """
+    if full_rows:
+        return select(*TRADE_RECORD_COLUMNS, *FULL_ROW_COLUMNS)
+    return select(*TRADE_RECORD_COLUMNS)
+
+
+async def rows_to_records(rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Builds TradeRecord-shaped dicts (plus the full-row fields, if selected) from select_trade_records() rows."""
+    records = []
+    for row in rows:
+        record = dict(zip(TRADE_RECORD_FIELDS, row))
+        if len(row) > len(TRADE_RECORD_COLUMNS):
+            record.update(zip(FULL_ROW_FIELDS, row[len(TRADE_RECORD_FIELDS):]))
+        for field, type_index, amount_index, metadata_index in ITEM_SLOTS:
+            item_type = row[type_index]
+            if not item_type:
+                record[field] = None
+                continue
+            item = cached_trade_item(item_type, row[amount_index], row[metadata_index])
+            if item is None:
+                item = await enrich_trade_item(item_type, row[amount_index], row[metadata_index])
+            record[field] = item
+        records.append(record)
+    return records
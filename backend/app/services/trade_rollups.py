@@ -0,0 +1,250 @@
+# backend/app/services/trade_rollups.py
+"""
+Time-windowed trade leaderboards (24h / 7d / 30d / all-time).
+
+New trade-log rows are folded into hourly buckets as they arrive. Each window
+keeps running totals: rows are added when ingested and whole buckets are
+subtracted once they slide out of the window. A background job does this
+every REFRESH_INTERVAL_SECONDS and, when something changed, publishes
+sorted leaderboards and rank maps; requests only read the last published
+set, so they never wait on the trade DB or on a refresh in progress.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple
+from ..database import get_shopkeepers_session
+from .trade_log import fetch_trades_after, parse_trade_timestamp
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600
+REFRESH_INTERVAL_SECONDS = 5
+FETCH_BATCH_SIZE = 5000
+
+# Window name -> length in seconds (None = all-time)
+WINDOWS: Dict[str, Optional[int]] = {
+    "24h": 24 * 3600,
+    "7d": 7 * 24 * 3600,
+    "30d": 30 * 24 * 3600,
+    "all": None,
+}
+BOARDS = ("sellers", "buyers", "items", "shops")
+METRICS = ("trades", "items")
+
+# A tally is [trades, items_moved, {result_item_type: trades}]
+Tally = List[Any]
+# A published leaderboard row: (key, trades, items_moved, unique items)
+RankedRow = Tuple[str, int, int, int]
+
+
+class Ranking(NamedTuple):
+    """One leaderboard as of the last refresh: rows best first, and key -> rank."""
+    rows: List[RankedRow]
+    ranks: Dict[str, int]
+
+
+def _add(totals: Dict[str, Tally], key: str, trades: int, items: int, item_type: str):
+    tally = totals.get(key)
+    if tally is None:
+        tally = totals[key] = [0, 0, {}]
+    tally[0] += trades
+    tally[1] += items
+    tally[2][item_type] = tally[2].get(item_type, 0) + trades
+
+
+def _subtract(totals: Dict[str, Tally], key: str, other: Tally):
+    tally = totals.get(key)
+    if tally is None:
+        return
+    tally[0] -= other[0]
+    tally[1] -= other[1]
+    for item_type, trades in other[2].items():
+        remaining = tally[2].get(item_type, 0) - trades
+        if remaining > 0:
+            tally[2][item_type] = remaining
+        else:
+            tally[2].pop(item_type, None)
+    if tally[0] <= 0:
+        del totals[key]
+
+
+class TradeRollups:
+    """Bucketed trade aggregates fed from the trade-log watermark."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # guards the published rankings
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._rankings: Optional[Dict[Tuple[str, str, str], Ranking]] = None
+        self.generation = 0  # bumped every time new rankings are published
+        self.watermark = 0
+        # bucket start (epoch) -> board -> key -> tally
+        self._buckets: Dict[int, Dict[str, Dict[str, Tally]]] = {}
+        # window -> board -> key -> tally
+        self._totals = {w: {b: {} for b in BOARDS} for w in WINDOWS}
+        # window -> first bucket start still counted in it
+        now = time.time()
+        self._window_start = {w: self._bucket_start(now - span) for w, span in WINDOWS.items() if span}
+        # Latest known names, for display
+        self.player_names: Dict[str, str] = {}
+        self.shop_owners: Dict[str, str] = {}
+
+    @staticmethod
+    def _bucket_start(epoch: float) -> int:
+        return int(epoch // BUCKET_SECONDS) * BUCKET_SECONDS
+
+    def ingest(self, rows):
+        """Folds trade rows (trade_log.TAIL_COLUMNS) into buckets and window totals."""
+        for row in rows:
+            epoch = parse_trade_timestamp(row.timestamp)
+            trades = row.trade_count or 0
+            items = (row.result_item_amount or 0) * trades
+            item_type = row.result_item_type
+
+            keys = {"buyers": row.player_uuid, "items": item_type, "shops": row.shop_uuid}
+            if row.shop_owner_uuid:
+                keys["sellers"] = row.shop_owner_uuid
+                if row.shop_owner_name:
+                    self.player_names[row.shop_owner_uuid] = row.shop_owner_name
+                self.shop_owners[row.shop_uuid] = row.shop_owner_uuid
+            if row.player_name:
+                self.player_names[row.player_uuid] = row.player_name
+
+            targets = [self._totals["all"]]
+            if epoch is not None:
+                bucket_start = self._bucket_start(epoch)
+                oldest = min(self._window_start.values())
+                if bucket_start >= oldest:
+                    targets.append(self._buckets.setdefault(bucket_start, {b: {} for b in BOARDS}))
+                    targets.extend(
+                        self._totals[w] for w, start in self._window_start.items() if bucket_start >= start
+                    )
+
+            for boards in targets:
+                for board, key in keys.items():
+                    _add(boards[board], key, trades, items, item_type)
+
+            self.watermark = max(self.watermark, row.rowid)
+
+    def advance(self, now: Optional[float] = None):
+        """Slides every timed window forward, subtracting buckets that fell out of it."""
+        now = time.time() if now is None else now
+        for window, span in WINDOWS.items():
+            if not span:
+                continue
+            new_start = self._bucket_start(now - span)
+            for bucket_start in range(self._window_start[window], new_start, BUCKET_SECONDS):
+                bucket = self._buckets.get(bucket_start)
+                if not bucket:
+                    continue
+                for board, tallies in bucket.items():
+                    totals = self._totals[window][board]
+                    for key, tally in tallies.items():
+                        _subtract(totals, key, tally)
+            self._window_start[window] = max(self._window_start[window], new_start)
+
+        oldest = min(self._window_start.values())
+        for bucket_start in [b for b in self._buckets if b < oldest]:
+            del self._buckets[bucket_start]
+
+    def refresh(self):
+        """Pulls trades added since the watermark, slides the windows and publishes new rankings."""
+        with self._refresh_lock:
+            # Only the refreshing thread touches buckets and totals; readers use the published rankings
+            watermark = self.watermark
+            window_start = dict(self._window_start)
+            try:
+                with get_shopkeepers_session() as db:
+                    while True:
+                        rows = fetch_trades_after(db, self.watermark, FETCH_BATCH_SIZE)
+                        if not rows:
+                            break
+                        self.ingest(rows)
+                        if len(rows) < FETCH_BATCH_SIZE:
+                            break
+            except Exception as e:
+                logger.error(f"Failed to refresh trade rollups: {e}", exc_info=True)
+            self.advance()
+            if self._rankings is None or self.watermark != watermark or self._window_start != window_start:
+                rankings = self._build_rankings()
+                with self._lock:
+                    self._rankings = rankings
+                    self.generation += 1
+
+    def _build_rankings(self) -> Dict[Tuple[str, str, str], Ranking]:
+        """Sorted entries and rank maps for every (window, board, metric), detached from the live totals."""
+        rankings = {}
+        for window, boards in self._totals.items():
+            for board, totals in boards.items():
+                rows = [(key, tally[0], tally[1], len(tally[2])) for key, tally in totals.items()]
+                for index, metric in enumerate(METRICS):
+                    primary, secondary = 1 + index, 2 - index
+                    rows.sort(key=lambda row: (row[primary], row[secondary]), reverse=True)
+                    ranks: Dict[str, int] = {}
+                    for position, row in enumerate(rows):
+                        # Ties on the metric share a rank (1 + number of strictly better entries)
+                        if position and row[primary] == rows[position - 1][primary]:
+                            ranks[row[0]] = ranks[rows[position - 1][0]]
+                        else:
+                            ranks[row[0]] = position + 1
+                    rankings[(window, board, metric)] = Ranking(list(rows), ranks)
+        return rankings
+
+    def _ranking(self, board: str, window: str, metric: str) -> Optional[Ranking]:
+        with self._lock:
+            rankings = self._rankings
+        return rankings.get((window, board, metric)) if rankings is not None else None
+
+    def top(self, board: str, window: str = "all", metric: str = "trades", limit: int = 10) -> List[Dict[str, Any]]:
+        """Returns the top `limit` entries of a leaderboard (as of the last refresh)."""
+        ranking = self._ranking(board, window, metric)
+        if ranking is None:
+            return []
+        return [self._entry(board, rank, row) for rank, row in enumerate(ranking.rows[:limit], start=1)]
+
+    def rank_of(self, board: str, key: str, window: str = "all", metric: str = "trades") -> Optional[int]:
+        """Returns the 1-based rank of `key` on a leaderboard, or None if it has no trades there."""
+        ranking = self._ranking(board, window, metric)
+        return ranking.ranks.get(key) if ranking is not None else None
+
+    async def run(self):
+        """Background job: keep the rollups caught up with the trade log (the first pass reads the whole log)."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Trade rollups refresh failed: {e}", exc_info=True)
+            await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+
+    def _entry(self, board: str, rank: int, row: RankedRow) -> Dict[str, Any]:
+        key, trades, items_moved, unique_items = row
+        entry: Dict[str, Any] = {"rank": rank}
+        if board in ("sellers", "buyers"):
+            entry.update({
+                "player_uuid": key,
+                "player_name": self.player_names.get(key),
+                "total_sales" if board == "sellers" else "total_purchases": trades,
+            })
+        elif board == "items":
+            entry["item_type"] = key
+        else:
+            owner_uuid = self.shop_owners.get(key)
+            entry.update({
+                "shop_uuid": key,
+                "owner_uuid": owner_uuid,
+                "owner_name": self.player_names.get(owner_uuid) if owner_uuid else None,
+            })
+        entry["trades"] = trades
+        entry["items_moved"] = items_moved
+        if board != "items":
+            entry["unique_items"] = unique_items
+        return entry
+
+
+trade_rollups = TradeRollups()
+
+
+def get_trade_leaderboard(board: str, window: str = "all", metric: str = "trades", limit: int = 10) -> List[Dict[str, Any]]:
+    """Leaderboard of sellers, buyers, items or shops over a time window."""
+    return trade_rollups.top(board, window, metric, limit)
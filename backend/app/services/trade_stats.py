@@ -0,0 +1,73 @@
+# backend/app/services/trade_stats.py
+"""Per-player trade statistics computed from the trade log."""
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import func, case, or_
+from sqlalchemy.orm import Session
+from ..models.database import ShopkeeperTrade
+from .trade_index import apply_time_range
+
+
+def compute_player_trade_stats(
+    db: Session,
+    player_uuid: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Sales/purchase totals, most sold item and unique customers for a player, optionally within [since, until)."""
+    
+    # Sales (player is shop owner)
+    sales = apply_time_range(db.query(ShopkeeperTrade), since, until)\
+        .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
+        .all()
+    
+    # Purchases (player is buyer)
+    purchases = apply_time_range(db.query(ShopkeeperTrade), since, until)\
+        .filter(ShopkeeperTrade.player_uuid == player_uuid)\
+        .all()
+    
+    # Calculate total items sold
+    total_items_sold = sum(trade.result_item_amount * trade.trade_count for trade in sales)
+    
+    # Calculate total items bought
+    total_items_bought = sum(trade.result_item_amount * trade.trade_count for trade in purchases)
+    
+    # Find most sold item
+    item_counts = {}
+    for trade in sales:
+        item = trade.result_item_type
+        count = trade.result_item_amount * trade.trade_count
+        item_counts[item] = item_counts.get(item, 0) + count
+    
+    most_sold_item = None
+    most_sold_count = 0
+    if item_counts:
+        most_sold_item = max(item_counts, key=item_counts.get)
+        most_sold_count = item_counts[most_sold_item]
+    
+    # Unique customers
+    unique_customers = apply_time_range(db.query(func.count(func.distinct(ShopkeeperTrade.player_uuid))), since, until)\
+        .filter(ShopkeeperTrade.shop_owner_uuid == player_uuid)\
+        .scalar() or 0
+    
+    return {
+        "total_trades": len(sales) + len(purchases),
+        "total_items_sold": total_items_sold,
+        "total_items_bought": total_items_bought,
+        "most_sold_item": most_sold_item,
+        "most_sold_count": most_sold_count,
+        "unique_customers": unique_customers
+    }
+
+
+def count_player_trades(db: Session, player_uuid: str) -> Tuple[int, int]:
+    """Returns (total_sales, total_purchases) log rows for a player in a single query."""
+    is_sale = ShopkeeperTrade.shop_owner_uuid == player_uuid
+    is_purchase = ShopkeeperTrade.player_uuid == player_uuid
+    sales, purchases = db.query(
+        func.sum(case((is_sale, 1), else_=0)),
+        func.sum(case((is_purchase, 1), else_=0))
+    )\
+        .filter(or_(is_sale, is_purchase))\
+        .one()
+    return sales or 0, purchases or 0
@@ -0,0 +1,238 @@
+# backend/app/services/webhook_queue.py
+"""
+Background processing of Ko-fi webhooks.
+
+The webhook endpoint only verifies a payload, persists it to the
+kofi_webhooks inbox (through the website writer, so a burst of deliveries
+shares a handful of commits) and acknowledges. A fixed pool of workers takes
+payloads from a bounded in-memory queue and runs them through
+process_kofi_webhook_payload (which deduplicates via the outbox).
+
+Failures are retried with exponential backoff; payloads that are invalid
+(ValueError) or still failing after MAX_ATTEMPTS are parked with status
+'dead' for manual inspection. So are payloads without a transaction id
+after their first failure: nothing deduplicates them, so a retry could
+deliver their commands twice. When the in-memory queue is full, payloads
+simply wait in the inbox: a sweeper enqueues due rows (including retries
+and anything left over from before a restart) as room frees up.
+
+Payloads hold donor names and emails, so 'done' rows are deleted once
+they are KOFI_WEBHOOK_RETENTION_DAYS old (the order itself stays in the
+outbox).
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from ..config import get_settings
+from ..database import get_website_session
+from ..models.database import KofiWebhook
+from .automation import process_kofi_webhook_payload
+from .website_writer import website_writer
+
+settings = get_settings()
+
+WEBHOOK_WORKERS = 4
+WEBHOOK_QUEUE_SIZE = 1000
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 600
+SWEEP_INTERVAL_SECONDS = 5
+PRUNE_INTERVAL_SECONDS = 3600
+LATENCY_SAMPLES = 512
+
+# (inbox id, payload, received at (epoch), attempts so far)
+Job = Tuple[int, Dict[str, Any], float, int]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _percentiles(samples: deque) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+
+    def at(p: float) -> Optional[float]:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+
+    return {"p50": at(0.5), "p95": at(0.95), "max": round(ordered[-1] * 1000, 1) if ordered else None}
+
+
+class WebhookQueue:
+    """Persist-then-acknowledge inbox for Ko-fi webhooks, drained by a bounded worker pool."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Set[int] = set()  # inbox ids queued or being processed
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_prune = 0.0  # monotonic
+        # Metrics
+        self.accepted = 0
+        self.processed = 0
+        self.retried = 0
+        self.dead = 0
+        self._accept_latency: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._process_latency: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._end_to_end_latency: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(WEBHOOK_WORKERS)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def _enqueue(self, job: Job) -> bool:
+        if self._queue is None or job[0] in self._inflight:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False  # Stays in the inbox; the sweeper picks it up
+        self._inflight.add(job[0])
+        return True
+
+    async def accept(self, data: Dict[str, Any]) -> int:
+        """Persists a verified payload and queues it for processing; returns its inbox id."""
+        started = time.perf_counter()
+        received_at = time.time()
+        payload = json.dumps(data)
+
+        def write(db: Session) -> int:
+            webhook = KofiWebhook(
+                transaction_id=data.get('kofi_transaction_id') or data.get('message_id'),
+                payload=payload,
+                received_at=_utcnow(),
+                next_attempt_at=_utcnow(),
+            )
+            db.add(webhook)
+            db.flush()
+            return webhook.id
+
+        webhook_id = await website_writer.submit(write)
+        self.accepted += 1
+        self._accept_latency.append(time.perf_counter() - started)
+        if not self._enqueue((webhook_id, data, received_at, 0)) and self._wakeup is not None:
+            self._wakeup.set()
+        return webhook_id
+
+    @staticmethod
+    def _retry_delay(attempts: int) -> float:
+        return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+    async def _worker(self):
+        while True:
+            webhook_id, data, received_at, attempts = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await process_kofi_webhook_payload(data)
+                values = {"status": "done", "attempts": attempts + 1, "processed_at": _utcnow(), "last_error": None}
+                self.processed += 1
+                self._end_to_end_latency.append(time.time() - received_at)
+            except Exception as e:
+                attempts += 1
+                # Unsupported or unparseable payload: retrying won't help. No transaction id: the outbox
+                # can't deduplicate it, and its commands may already have been queued
+                permanent = isinstance(e, ValueError) or not (data.get('kofi_transaction_id') or data.get('message_id'))
+                if permanent or attempts >= MAX_ATTEMPTS:
+                    print(f"ERROR: Ko-fi webhook {webhook_id} moved to dead letters after {attempts} attempt(s): {e}")
+                    values = {"status": "dead", "attempts": attempts, "last_error": str(e)}
+                    self.dead += 1
+                else:
+                    delay = self._retry_delay(attempts)
+                    print(f"WARN: Ko-fi webhook {webhook_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+                    values = {"attempts": attempts, "last_error": str(e), "next_attempt_at": _utcnow() + timedelta(seconds=delay)}
+                    self.retried += 1
+            self._process_latency.append(time.perf_counter() - started)
+
+            try:
+                await website_writer.submit(
+                    lambda db, values=values: db.execute(update(KofiWebhook).where(KofiWebhook.id == webhook_id).values(**values))
+                )
+            except Exception as e:
+                print(f"ERROR updating Ko-fi webhook {webhook_id}: {e}")
+            finally:
+                self._inflight.discard(webhook_id)
+                self._queue.task_done()
+
+    def _due(self, limit: int, exclude: Set[int]) -> List[Job]:
+        """Pending inbox rows whose next attempt is due, oldest first."""
+        with get_website_session() as db:
+            rows = db.execute(
+                select(KofiWebhook.id, KofiWebhook.payload, KofiWebhook.received_at, KofiWebhook.attempts)
+                .where(KofiWebhook.status == "pending", KofiWebhook.next_attempt_at <= _utcnow())
+                .order_by(KofiWebhook.id)
+                .limit(limit + len(exclude))
+            ).all()
+        jobs = []
+        for webhook_id, payload, received_at, attempts in rows:
+            if webhook_id in exclude:
+                continue
+            jobs.append((webhook_id, json.loads(payload), received_at.replace(tzinfo=timezone.utc).timestamp(), attempts))
+            if len(jobs) >= limit:
+                break
+        return jobs
+
+    async def prune(self) -> int:
+        """Deletes processed payloads older than KOFI_WEBHOOK_RETENTION_DAYS; returns how many."""
+        cutoff = _utcnow() - timedelta(days=settings.KOFI_WEBHOOK_RETENTION_DAYS)
+        return await website_writer.submit(
+            lambda db: db.execute(
+                delete(KofiWebhook).where(KofiWebhook.status == "done", KofiWebhook.processed_at < cutoff)
+            ).rowcount
+        )
+
+    async def _sweep(self):
+        """Enqueues due retries, payloads that didn't fit in the queue, and leftovers from a restart; prunes hourly."""
+        while True:
+            self._wakeup.clear()
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+                try:
+                    pruned = await self.prune()
+                    if pruned:
+                        print(f"Pruned {pruned} processed Ko-fi webhook payloads")
+                except Exception as e:
+                    print(f"ERROR pruning Ko-fi webhook inbox: {e}")
+            try:
+                room = WEBHOOK_QUEUE_SIZE - self._queue.qsize()
+                if room > 0:
+                    for job in await asyncio.to_thread(self._due, room, set(self._inflight)):
+                        if not self._enqueue(job):
+                            break
+            except Exception as e:
+                print(f"ERROR sweeping Ko-fi webhook inbox: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=SWEEP_INTERVAL_SECONDS)
+                await asyncio.sleep(0.5)  # Overflow: let the workers free up some room first
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, counters and latencies (accept = persist + ack, end_to_end = received to processed)."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._inflight),
+            "workers": WEBHOOK_WORKERS,
+            "accepted": self.accepted,
+            "processed": self.processed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "latency_ms": {
+                "accept": _percentiles(self._accept_latency),
+                "process": _percentiles(self._process_latency),
+                "end_to_end": _percentiles(self._end_to_end_latency),
+            },
+        }
+
+
+kofi_webhooks = WebhookQueue()
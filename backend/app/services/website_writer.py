@@ -0,0 +1,129 @@
+# backend/app/services/website_writer.py
+"""
+Single writer for the website database.
+
+All website-DB writes go through one background task: submitted operations
+are queued, and whatever has accumulated is applied in a single transaction
+(each operation in its own savepoint, so one failure doesn't sink the
+batch). Registered flushers add their buffered changes (e.g. session
+activity) to a batch at least every FLUSH_INTERVAL_SECONDS. With the DB in
+WAL mode, readers on other connections never wait for these commits.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from ..database import get_website_session
+
+FLUSH_INTERVAL_SECONDS = 30
+MAX_BATCH = 500
+
+Operation = Callable[[Session], Any]
+
+
+class WebsiteWriter:
+    """Queue of write operations applied in batched transactions by one task."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._flushers: List[Operation] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_flusher(self, flusher: Operation):
+        """Registers a callable that writes buffered changes; it runs inside every batch."""
+        self._flushers.append(flusher)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def submit(self, operation: Operation) -> Any:
+        """Queues `operation(db)` and waits until its batch commits; returns its result."""
+        if not self.running:
+            # Writer not started (e.g. a script): apply directly
+            [(_, ok, value)] = await asyncio.to_thread(self._apply, [(operation, None)])
+            if not ok:
+                raise value
+            return value
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))
+        return await future
+
+    def submit_nowait(self, operation: Operation):
+        """Queues `operation(db)` without waiting for it (fire and forget)."""
+        if self.running:
+            self._queue.put_nowait((operation, None))
+        else:
+            self._report(self._apply([(operation, None)]))
+
+    def _apply(self, batch: List[Tuple[Operation, Optional[asyncio.Future]]],
+               flush: bool = False) -> List[Tuple[Optional[asyncio.Future], bool, Any]]:
+        """Runs a batch in one transaction; returns (future, succeeded, result or exception) per operation."""
+        operations = list(batch)
+        if flush:
+            operations += [(flusher, None) for flusher in self._flushers]
+        results = []
+        with get_website_session() as db:
+            for operation, future in operations:
+                try:
+                    with db.begin_nested():
+                        results.append((future, True, operation(db)))
+                except Exception as e:
+                    results.append((future, False, e))
+        return results
+
+    @staticmethod
+    def _report(results: List[Tuple[Optional[asyncio.Future], bool, Any]]):
+        """Resolves waiting callers; failures nobody waits for are logged."""
+        for future, ok, value in results:
+            if future is None:
+                if not ok:
+                    print(f"ERROR in website DB write: {value}")
+            elif not future.done():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    async def _run_batch(self, batch: List[Tuple[Operation, Optional[asyncio.Future]]], flush: bool):
+        try:
+            results = await asyncio.to_thread(self._apply, batch, flush)
+        except Exception as e:
+            # The commit itself failed: every operation in the batch failed
+            print(f"ERROR committing website DB batch: {e}")
+            results = [(future, False, e) for _, future in batch]
+        self._report(results)
+
+    async def run(self):
+        """Background job: applies queued writes in batches, flushing buffered changes periodically."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + FLUSH_INTERVAL_SECONDS
+        while True:
+            batch = []
+            try:
+                timeout = max(0.0, next_flush - loop.time())
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                while len(batch) < MAX_BATCH and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            flush = loop.time() >= next_flush
+            if flush:
+                next_flush = loop.time() + FLUSH_INTERVAL_SECONDS
+            if batch or flush:
+                await self._run_batch(batch, flush)
+
+    async def stop(self):
+        """Stops the task, then applies whatever is still queued plus a final flush."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        batch = []
+        while self._queue is not None and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        await self._run_batch(batch, True)
+
+
+website_writer = WebsiteWriter()
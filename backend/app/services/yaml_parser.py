@@ -1,6 +1,7 @@
 """Service to parse Shopkeepers save.yml file"""
+import os
 import yaml
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from ..config import get_settings
 from .nbt_parser import parse_nbt_enchantments, parse_nbt_container 
 
@@ -64,6 +65,14 @@ def parse_shop_offers(offers_dict: Dict) -> List[Dict]:
         offers.append(offer)
     return offers
 
+def get_catalog_version() -> Optional[Tuple[int, int]]:
+    """Cheap change marker for save.yml: (mtime_ns, size), or None if the file is missing."""
+    try:
+        stat = os.stat(settings.SHOPKEEPERS_SAVE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 def load_shops() -> List[Dict]:
     """Load all shops from save.yml"""
     try:
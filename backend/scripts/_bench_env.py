@@ -0,0 +1,50 @@
+# backend/scripts/_bench_env.py
+"""
+Shared setup for the local benchmarks in this directory.
+
+Points every setting the app needs at a throwaway directory (unless it is
+already set in the environment), so a benchmark never touches real server
+data. Import this before anything from `app`; run the scripts from backend/:
+
+    python scripts/bench_trade_records.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="ph-bench-"))
+
+DEFAULTS = {
+    "MINECRAFT_DIR": str(WORK_DIR),
+    "SHOPKEEPERS_SAVE": str(WORK_DIR / "save.yml"),
+    "SHOPKEEPERS_DB": str(WORK_DIR / "trades.db"),
+    "PLAYTIME_DB": str(WORK_DIR / "playtime.db"),
+    "TRADE_INDEX_DB": str(WORK_DIR / "trade_index.db"),
+    "STOCK_FILE_PATH": str(WORK_DIR / "shop_stock.json"),
+    "COMMAND_JOURNAL_DIR": str(WORK_DIR / "command_journal"),
+    "MINECRAFT_STATS_DIR": str(WORK_DIR / "mcstats"),
+    "STATS_SNAPSHOT_DIR": str(WORK_DIR / "stats_snapshots"),
+    "STATUS_HISTORY_DIR": str(WORK_DIR / "status_history"),
+    "BANNED_PLAYERS_JSON": str(WORK_DIR / "banned-players.json"),
+    "BANNED_IPS_JSON": str(WORK_DIR / "banned-ips.json"),
+    "USERCACHE_JSON": str(WORK_DIR / "usercache.json"),
+    "DATABASE_URL": f"sqlite:///{WORK_DIR / 'website.db'}",
+    "KOFI_VERIFICATION_TOKEN": "bench-token",
+    "MICROSOFT_CLIENT_ID": "bench",
+    "MICROSOFT_CLIENT_SECRET": "bench",
+    "MICROSOFT_REDIRECT_URI": "http://localhost/auth/callback",
+    "SECRET_KEY": "bench-secret",
+    "ENVIRONMENT": "bench",
+}
+for key, value in DEFAULTS.items():
+    os.environ.setdefault(key, value)
+
+
+def percentile(samples, p: float) -> float:
+    """p-th percentile (0..1) of a list of seconds, in milliseconds."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
@@ -0,0 +1,101 @@
+# backend/scripts/bench_command_journal.py
+"""
+Concurrent-producer benchmark and consistency check for the command journal.
+
+Starts `--producers` threads that each append `--commands` commands (in
+batches of `--batch`) while a JournalReader consumes and acks them, the way
+the plugin's CommandQueueReader does. Small segments force rollovers and
+pruning during the run. At the end every command must have been read
+exactly once, with contiguous sequence numbers, and each producer's
+commands in the order it appended them. Usage (from backend/):
+
+    python scripts/bench_command_journal.py --producers 32 --commands 500
+"""
+import _bench_env  # noqa: F401  (must come first: sets up settings)
+import argparse
+import threading
+import time
+
+from app.services import command_journal as journal_module
+from app.services.command_journal import CommandJournal, JournalReader, list_segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--producers", type=int, default=32)
+    parser.add_argument("--commands", type=int, default=500, help="commands per producer")
+    parser.add_argument("--batch", type=int, default=1, help="commands per append call")
+    parser.add_argument("--segment-bytes", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    journal_module.SEGMENT_MAX_BYTES = args.segment_bytes
+    directory = _bench_env.WORK_DIR / "bench_journal"
+    journal = CommandJournal(str(directory))
+    journal.append(["say bench start"])  # Creates the directory before the reader starts
+    reader = JournalReader(str(directory))
+
+    latencies = []
+    latencies_lock = threading.Lock()
+    done = threading.Event()
+    received = []
+
+    def produce(producer: int):
+        own = []
+        for start in range(0, args.commands, args.batch):
+            commands = [f"say p{producer} c{n}" for n in range(start, min(start + args.batch, args.commands))]
+            started = time.perf_counter()
+            journal.append(commands)
+            own.append(time.perf_counter() - started)
+        with latencies_lock:
+            latencies.extend(own)
+
+    def consume():
+        while True:
+            records = reader.read()
+            if records:
+                received.extend(records)
+                reader.ack()
+            elif done.is_set():
+                records = reader.read()
+                if not records:
+                    return
+                received.extend(records)
+                reader.ack()
+            else:
+                time.sleep(0.005)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    producers = [threading.Thread(target=produce, args=(p,)) for p in range(args.producers)]
+    started = time.perf_counter()
+    for thread in producers:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    consumer.join()
+
+    total = args.producers * args.commands
+    print(f"{total} commands from {args.producers} producers in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+    print(f"append latency: p50 {_bench_env.percentile(latencies, 0.5):.2f}ms  "
+          f"p95 {_bench_env.percentile(latencies, 0.95):.2f}ms  p99 {_bench_env.percentile(latencies, 0.99):.2f}ms")
+    print(f"segments left after pruning: {len(list_segments(directory))}")
+
+    # Every command exactly once, sequence numbers contiguous, per-producer order kept
+    records = received[1:]  # Skip the start marker
+    seqs = [record["seq"] for record in received]
+    assert seqs == list(range(seqs[0], seqs[0] + len(seqs))), "sequence numbers are not contiguous"
+    assert len(records) == total, f"expected {total} records, read {len(records)}"
+    assert len({record["id"] for record in records}) == total, "duplicate record ids"
+    last = {}
+    for record in records:
+        _, producer, command = record["command"].split()
+        number = int(command[1:])
+        assert last.get(producer, -1) == number - 1, f"{producer} out of order at {number}"
+        last[producer] = number
+    print("ok: all commands read exactly once, in order")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/scripts/bench_trade_records.py
+"""
+Before/after benchmark for trade list serialization (/trades/recent etc.).
+
+  before: ORM rows -> TradeRecord.model_validate -> enrich each item -> JSON
+          (what the endpoints did before trade_records.py)
+  after:  column tuples -> rows_to_records -> orjson
+
+Builds a synthetic trade log in a temp dir and times both paths on the same
+`limit` newest rows. Usage (from backend/):
+
+    python scripts/bench_trade_records.py --rows 20000 --limit 1000 --runs 30
+"""
+import _bench_env  # noqa: F401  (must come first: sets up settings)
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy import create_engine, desc
+
+from app.database import get_shopkeepers_session
+from app.models.database import ShopkeeperTrade
+from app.schemas.trade import TradeRecord
+from app.services.trade_items import enrich_trade_item
+from app.services.trade_records import select_trade_records, rows_to_records
+
+ITEMS = ["minecraft:diamond", "minecraft:elytra", "minecraft:echo_shard", "minecraft:netherite_scrap", "minecraft:oak_log"]
+CREST_LORE = '{components: {"minecraft:lore": \'[{color:"gold",italic:0b,text:"Official Minted Currency of Peaceful Haven"}]\'}}'
+
+
+def build_trade_log(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    ShopkeeperTrade.__table__.create(engine, checkfirst=True)
+    rng = random.Random(1)
+    players = [(str(uuid.UUID(int=rng.getrandbits(128))), f"Player{i}") for i in range(40)]
+    shops = [(str(uuid.UUID(int=rng.getrandbits(128))), players[i]) for i in range(8)]
+    now = datetime.now(timezone.utc)
+    records = []
+    for i in range(rows):
+        buyer = rng.choice(players)
+        shop_uuid, owner = rng.choice(shops)
+        records.append({
+            "timestamp": (now - timedelta(seconds=(rows - i) * 300)).isoformat().replace("+00:00", "Z"),
+            "player_uuid": buyer[0], "player_name": buyer[1],
+            "shop_uuid": shop_uuid, "shop_type": "sell", "shop_world": "world", "shop_x": 1, "shop_y": 64, "shop_z": 1,
+            "shop_owner_uuid": owner[0], "shop_owner_name": owner[1],
+            "item_1_type": "minecraft:echo_shard", "item_1_amount": rng.randint(1, 5),
+            "item_1_metadata": CREST_LORE if rng.random() < 0.2 else "",
+            "result_item_type": rng.choice(ITEMS), "result_item_amount": rng.randint(1, 16), "result_item_metadata": "",
+            "trade_count": rng.randint(1, 3),
+        })
+    with engine.begin() as conn:
+        conn.execute(ShopkeeperTrade.__table__.insert(), records)
+    engine.dispose()
+
+
+async def before(limit: int) -> bytes:
+    with get_shopkeepers_session() as db:
+        trades = db.query(ShopkeeperTrade).order_by(desc(ShopkeeperTrade.timestamp)).limit(limit).all()
+        records = []
+        for trade in trades:
+            record = TradeRecord.model_validate(trade)
+            record.item_1 = await enrich_trade_item(trade.item_1_type, trade.item_1_amount, trade.item_1_metadata)
+            record.item_2 = await enrich_trade_item(trade.item_2_type, trade.item_2_amount, trade.item_2_metadata)
+            record.result_item = await enrich_trade_item(trade.result_item_type, trade.result_item_amount, trade.result_item_metadata)
+            records.append(record)
+    return json.dumps([record.model_dump() for record in records]).encode()
+
+
+async def after(limit: int) -> bytes:
+    with get_shopkeepers_session() as db:
+        rows = db.execute(select_trade_records().order_by(desc(ShopkeeperTrade.timestamp)).limit(limit)).all()
+    return orjson.dumps(await rows_to_records(rows))
+
+
+async def measure(fn, limit: int, runs: int):
+    size = len(await fn(limit))  # warm-up (fills the item cache)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn(limit)
+        samples.append(time.perf_counter() - started)
+    return samples, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    build_trade_log(os.environ["SHOPKEEPERS_DB"], args.rows)
+    print(f"{args.rows} trades, limit={args.limit}, {args.runs} runs")
+    for name, fn in (("before", before), ("after", after)):
+        samples, size = asyncio.run(measure(fn, args.limit, args.runs))
+        print(f"  {name:6}: median {statistics.median(samples) * 1000:.1f} ms, "
+              f"p90 {_bench_env.percentile(samples, 0.9):.1f} ms, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/scripts/bench_webhooks.py
+"""
+Load test for the Ko-fi webhook endpoint and its background workers.
+
+Drives POST /webhooks/kofi in-process (ASGI transport, no network) with the
+website writer, outbox drain and webhook workers running as in the app
+lifespan:
+
+  burst:  `--burst` deliveries at once, ~10% of them repeats of an earlier
+          transaction id (Ko-fi retries); reports ack latency and how long
+          the workers take to process the backlog
+  paced:  each rate in `--rates` for `--seconds`; ack latency under a
+          steady load
+
+At the end it checks that every transaction produced exactly one order and
+one journal record per command. Usage (from backend/):
+
+    python scripts/bench_webhooks.py --burst 1000 --rates 200 500
+"""
+import _bench_env  # noqa: F401  (must come first: sets up settings)
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app.database import get_website_session, init_website_db
+from app.main import app
+from app.models.database import KofiCommand, KofiOrder, KofiWebhook
+from app.services.automation import ITEM_DELIVERY_MAP
+from app.services.command_journal import JournalReader
+from app.services.kofi_outbox import kofi_outbox
+from app.services.webhook_queue import kofi_webhooks
+from app.services.website_writer import website_writer
+
+ITEM_CODE = next(iter(ITEM_DELIVERY_MAP))
+
+
+def payload(transaction_id: str) -> dict:
+    return {
+        "verification_token": os.environ["KOFI_VERIFICATION_TOKEN"],
+        "type": "Shop Order",
+        "from_name": "BenchPlayer",
+        "email": "donor@example.com",
+        "kofi_transaction_id": transaction_id,
+        "shop_items": [{"direct_link_code": ITEM_CODE, "quantity": 1}],
+    }
+
+
+async def post(client: httpx.AsyncClient, transaction_id: str, latencies: list):
+    started = time.perf_counter()
+    response = await client.post("/webhooks/kofi", json=payload(transaction_id))
+    latencies.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.text
+
+
+async def wait_for_workers() -> float:
+    started = time.perf_counter()
+    while kofi_webhooks.processed + kofi_webhooks.dead < kofi_webhooks.accepted:
+        await asyncio.sleep(0.02)
+    return time.perf_counter() - started
+
+
+def report(label: str, latencies: list, extra: str = ""):
+    print(f"{label}: ack p50 {_bench_env.percentile(latencies, 0.5):.1f}ms  "
+          f"p95 {_bench_env.percentile(latencies, 0.95):.1f}ms  "
+          f"p99 {_bench_env.percentile(latencies, 0.99):.1f}ms{extra}")
+
+
+async def main(args):
+    init_website_db()
+    writer_task = asyncio.create_task(website_writer.run())
+    outbox_task = asyncio.create_task(kofi_outbox.run())
+    await kofi_webhooks.start()
+    transactions = set()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            latencies = []
+            unique = max(1, args.burst * 9 // 10)
+            ids = [f"burst-{i % unique}" for i in range(args.burst)]
+            transactions.update(ids)
+            started = time.perf_counter()
+            await asyncio.gather(*(post(client, transaction_id, latencies) for transaction_id in ids))
+            elapsed = time.perf_counter() - started
+            drained = await wait_for_workers()
+            report(f"burst of {args.burst}", latencies,
+                   f"  ({args.burst / elapsed:,.0f}/s accepted; backlog processed {drained:.2f}s later)")
+
+            for rate in args.rates:
+                latencies, tasks = [], []
+                total = int(rate * args.seconds)
+                started = time.perf_counter()
+                for i in range(total):
+                    transaction_id = f"paced-{rate}-{i}"
+                    transactions.add(transaction_id)
+                    tasks.append(asyncio.create_task(post(client, transaction_id, latencies)))
+                    await asyncio.sleep(max(0.0, started + (i + 1) / rate - time.perf_counter()))
+                await asyncio.gather(*tasks)
+                drained = await wait_for_workers()
+                report(f"{rate}/s for {args.seconds:g}s", latencies, f"  (backlog processed {drained:.2f}s after the last ack)")
+        await kofi_outbox.drain()
+    finally:
+        await kofi_webhooks.stop()
+        outbox_task.cancel()
+        await website_writer.stop()
+        writer_task.cancel()
+
+    print("metrics:", json.dumps(kofi_webhooks.metrics()["latency_ms"]))
+    with get_website_session() as db:
+        orders = db.scalar(select(func.count()).select_from(KofiOrder))
+        commands = db.scalar(select(func.count()).select_from(KofiCommand))
+        statuses = dict(db.execute(select(KofiWebhook.status, func.count()).group_by(KofiWebhook.status)).all())
+    journal = JournalReader().read(10 ** 7) if JournalReader().directory.exists() else []
+    print(f"webhooks by status: {statuses}; orders: {orders}; journal records: {len(journal)}")
+    assert orders == len(transactions), f"expected {len(transactions)} orders, found {orders}"
+    assert len(journal) == commands == len(transactions), "commands were not queued exactly once"
+    print("ok: one order and one journal record per transaction")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--rates", type=int, nargs="*", default=[200, 500])
+    parser.add_argument("--seconds", type=float, default=4)
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,59 @@
+# backend/tests/conftest.py
+"""
+Points every setting at a throwaway directory before `app` is imported, so
+the tests never touch real server data. Run from backend/: python -m pytest
+"""
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="ph-tests-"))
+
+for key, value in {
+    "MINECRAFT_DIR": str(WORK_DIR),
+    "SHOPKEEPERS_SAVE": str(WORK_DIR / "save.yml"),
+    "SHOPKEEPERS_DB": str(WORK_DIR / "trades.db"),
+    "PLAYTIME_DB": str(WORK_DIR / "playtime.db"),
+    "TRADE_INDEX_DB": str(WORK_DIR / "trade_index.db"),
+    "STOCK_FILE_PATH": str(WORK_DIR / "shop_stock.json"),
+    "COMMAND_JOURNAL_DIR": str(WORK_DIR / "command_journal"),
+    "COMMAND_QUEUE_PATH": str(WORK_DIR / "command_queue.json"),
+    "MINECRAFT_STATS_DIR": str(WORK_DIR / "mcstats"),
+    "STATS_SNAPSHOT_DIR": str(WORK_DIR / "stats_snapshots"),
+    "STATUS_HISTORY_DIR": str(WORK_DIR / "status_history"),
+    "BANNED_PLAYERS_JSON": str(WORK_DIR / "banned-players.json"),
+    "BANNED_IPS_JSON": str(WORK_DIR / "banned-ips.json"),
+    "USERCACHE_JSON": str(WORK_DIR / "usercache.json"),
+    "DATABASE_URL": f"sqlite:///{WORK_DIR / 'website.db'}",
+    "KOFI_VERIFICATION_TOKEN": "test-token",
+    "MICROSOFT_CLIENT_ID": "test",
+    "MICROSOFT_CLIENT_SECRET": "test",
+    "MICROSOFT_REDIRECT_URI": "http://localhost/auth/callback",
+    "SECRET_KEY": "test-secret",
+    "ENVIRONMENT": "test",
+}.items():
+    os.environ[key] = value
+
+from app.database import init_website_db  # noqa: E402
+from app.services.website_writer import website_writer  # noqa: E402
+
+init_website_db()
+
+
+@pytest.fixture
+def run_with_writer():
+    """Runs a coroutine with the website writer task running, as in the app lifespan."""
+    def run(coro):
+        async def main():
+            writer_task = asyncio.create_task(website_writer.run())
+            await asyncio.sleep(0)
+            try:
+                return await coro
+            finally:
+                await website_writer.stop()
+                await asyncio.gather(writer_task, return_exceptions=True)
+        return asyncio.run(main())
+    return run
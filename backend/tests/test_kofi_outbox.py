@@ -0,0 +1,155 @@
+# backend/tests/test_kofi_outbox.py
+"""Ko-fi outbox: one order per transaction id, and drains that survive a crash."""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import get_website_session
+from app.models.database import KofiCommand, KofiOrder
+from app.services import automation, kofi_outbox as outbox_module
+from app.services.command_journal import CommandJournal, JournalReader
+from app.services.kofi_outbox import KofiOutbox, journal_id
+
+
+def shop_order(transaction_id: str) -> dict:
+    return {
+        "type": "Shop Order",
+        "kofi_transaction_id": transaction_id,
+        "from_name": "Steve",
+        "shop_items": [
+            {"direct_link_code": "1a2b3c4d5e", "quantity": 3},
+            {"direct_link_code": "a1b2c3d4e5", "quantity": 1},
+        ],
+    }
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    journal = CommandJournal(str(tmp_path / "journal"))
+    monkeypatch.setattr(outbox_module, "command_journal", journal)
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """A fresh outbox (nothing known in memory), as after a restart."""
+    outbox = KofiOutbox()
+    monkeypatch.setattr(automation, "kofi_outbox", outbox)
+    return outbox
+
+
+def journal_records(journal: CommandJournal) -> list:
+    journal.append(["say marker"])  # Makes sure the journal directory exists for the reader
+    return [record for record in JournalReader(str(journal.directory)).read() if record["command"] != "say marker"]
+
+
+def stored_commands(transaction_id: str) -> list:
+    with get_website_session() as db:
+        return db.execute(
+            select(KofiCommand.position, KofiCommand.journal_seq)
+            .where(KofiCommand.transaction_id == transaction_id)
+            .order_by(KofiCommand.position)
+        ).all()
+
+
+def test_concurrent_duplicate_deliveries_queue_commands_once(run_with_writer, journal, outbox):
+    transaction_id = uuid.uuid4().hex
+    payload = shop_order(transaction_id)
+
+    async def deliver_and_drain():
+        results = await asyncio.gather(*(automation.process_kofi_webhook_payload(dict(payload)) for _ in range(20)))
+        await outbox.drain()
+        return results
+
+    results = run_with_writer(deliver_and_drain())
+
+    assert [result["duplicate"] for result in results].count(False) == 1
+    assert len({result["message"] for result in results}) == 1
+    with get_website_session() as db:
+        assert db.scalar(select(func.count()).select_from(KofiOrder).where(KofiOrder.transaction_id == transaction_id)) == 1
+    records = journal_records(journal)
+    assert [record["id"] for record in records] == [journal_id(transaction_id, 0), journal_id(transaction_id, 1)]
+    assert [record["command"] for record in records] == [
+        "webperks deliver_item Steve DIAMOND 3",
+        "webperks deliver_item Steve NETHERITE_INGOT 1",
+    ]
+
+
+def test_redelivery_after_restart_returns_stored_response(run_with_writer, journal, outbox, monkeypatch):
+    transaction_id = uuid.uuid4().hex
+    first = run_with_writer(automation.process_kofi_webhook_payload(shop_order(transaction_id)))
+
+    restarted = KofiOutbox()
+    monkeypatch.setattr(automation, "kofi_outbox", restarted)
+    again = run_with_writer(automation.process_kofi_webhook_payload(shop_order(transaction_id)))
+
+    assert first["duplicate"] is False
+    assert again == {"message": first["message"], "duplicate": True}
+    assert len(stored_commands(transaction_id)) == 2
+
+
+def test_drain_marks_commands_and_delivers_order(run_with_writer, journal, outbox):
+    transaction_id = uuid.uuid4().hex
+
+    async def record_and_drain():
+        await automation.process_kofi_webhook_payload(shop_order(transaction_id))
+        return await outbox.drain()
+
+    assert run_with_writer(record_and_drain()) >= 2
+    seqs = {record["id"]: record["seq"] for record in journal_records(journal)}
+    assert stored_commands(transaction_id) == [
+        (0, seqs[journal_id(transaction_id, 0)]),
+        (1, seqs[journal_id(transaction_id, 1)]),
+    ]
+    with get_website_session() as db:
+        assert db.get(KofiOrder, transaction_id).delivered_at is not None
+
+
+def test_drain_after_crash_skips_commands_already_in_journal(run_with_writer, journal, outbox):
+    """A drain that appended to the journal but died before marking the DB must not append again."""
+    transaction_id = uuid.uuid4().hex
+    run_with_writer(automation.process_kofi_webhook_payload(shop_order(transaction_id)))
+    [(_, seq_before), _] = stored_commands(transaction_id)
+    assert seq_before is None
+
+    # The crashed drain got the first command into the journal
+    [crashed] = journal.append(["webperks deliver_item Steve DIAMOND 3"], [journal_id(transaction_id, 0)])
+
+    restarted = KofiOutbox()
+    run_with_writer(restarted.drain())
+
+    records = [record for record in journal_records(journal) if record["id"].startswith(f"kofi:{transaction_id}:")]
+    assert [record["id"] for record in records] == [journal_id(transaction_id, 0), journal_id(transaction_id, 1)]
+    assert stored_commands(transaction_id)[0] == (0, crashed["seq"])
+    assert journal.record_ids()[journal_id(transaction_id, 1)] == stored_commands(transaction_id)[1][1]
+
+
+def test_drain_retry_after_failed_mark_does_not_append_again(run_with_writer, journal, outbox, monkeypatch):
+    """The journal append succeeded but storing the seqs failed: the next drain must reuse the records."""
+    transaction_id = uuid.uuid4().hex
+    run_with_writer(automation.process_kofi_webhook_payload(shop_order(transaction_id)))
+
+    mark_queued = KofiOutbox._mark_queued
+    failures = []
+
+    def mark_queued_failing_once(queued, transaction_ids):
+        if not failures:
+            failures.append(transaction_ids)
+            raise OSError("website DB unavailable")
+        return mark_queued(queued, transaction_ids)
+
+    monkeypatch.setattr(outbox, "_mark_queued", mark_queued_failing_once)
+
+    async def drain_twice():
+        with pytest.raises(OSError):
+            await outbox.drain()
+        await outbox.drain()
+
+    run_with_writer(drain_twice())
+
+    records = [record for record in journal_records(journal) if record["id"].startswith(f"kofi:{transaction_id}:")]
+    assert [record["id"] for record in records] == [journal_id(transaction_id, 0), journal_id(transaction_id, 1)]
+    assert [seq for _, seq in stored_commands(transaction_id)] == [record["seq"] for record in records]
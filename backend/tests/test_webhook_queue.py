@@ -0,0 +1,78 @@
+# backend/tests/test_webhook_queue.py
+"""Ko-fi webhook inbox: dead letters for undeduplicable payloads, retention of processed rows."""
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app.database import get_website_session
+from app.models.database import KofiWebhook
+from app.services import webhook_queue
+from app.services.webhook_queue import WebhookQueue, _utcnow
+
+
+def stored(webhook_id: int):
+    with get_website_session() as db:
+        return db.execute(
+            select(KofiWebhook.status, KofiWebhook.attempts, KofiWebhook.next_attempt_at).where(KofiWebhook.id == webhook_id)
+        ).one()
+
+
+def process_one(queue: WebhookQueue, data: dict) -> int:
+    async def accept_and_wait():
+        await queue.start()
+        try:
+            webhook_id = await queue.accept(data)
+            await queue._queue.join()
+            return webhook_id
+        finally:
+            await queue.stop()
+    return accept_and_wait()
+
+
+def failing_processor(calls: list):
+    async def process(data):
+        calls.append(data)
+        raise RuntimeError("journal unavailable")
+    return process
+
+
+def test_failure_without_transaction_id_is_dead_lettered(run_with_writer, monkeypatch):
+    calls = []
+    monkeypatch.setattr(webhook_queue, "process_kofi_webhook_payload", failing_processor(calls))
+    webhook_id = run_with_writer(process_one(WebhookQueue(), {"type": "Shop Order", "from_name": "Steve"}))
+
+    row = stored(webhook_id)
+    assert (row.status, row.attempts, len(calls)) == ("dead", 1, 1)
+
+
+def test_failure_with_transaction_id_is_retried(run_with_writer, monkeypatch):
+    monkeypatch.setattr(webhook_queue, "process_kofi_webhook_payload", failing_processor([]))
+    data = {"type": "Shop Order", "from_name": "Steve", "kofi_transaction_id": uuid.uuid4().hex}
+    webhook_id = run_with_writer(process_one(WebhookQueue(), data))
+
+    row = stored(webhook_id)
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert row.next_attempt_at > _utcnow()
+
+
+def test_prune_deletes_only_old_processed_rows(run_with_writer):
+    now = _utcnow()
+    old = now - timedelta(days=webhook_queue.settings.KOFI_WEBHOOK_RETENTION_DAYS + 1)
+    rows = {
+        "old done": KofiWebhook(payload="{}", status="done", received_at=old, processed_at=old),
+        "recent done": KofiWebhook(payload="{}", status="done", received_at=now, processed_at=now),
+        "old dead": KofiWebhook(payload="{}", status="dead", received_at=old),
+        "old pending": KofiWebhook(payload="{}", status="pending", received_at=old, next_attempt_at=now + timedelta(days=1)),
+    }
+    with get_website_session() as db:
+        db.add_all(rows.values())
+        db.commit()
+        ids = {label: row.id for label, row in rows.items()}
+
+    pruned = run_with_writer(WebhookQueue().prune())
+
+    with get_website_session() as db:
+        remaining = set(db.scalars(select(KofiWebhook.id).where(KofiWebhook.id.in_(ids.values()))))
+    assert pruned >= 1
+    assert remaining == {ids["recent done"], ids["old dead"], ids["old pending"]}
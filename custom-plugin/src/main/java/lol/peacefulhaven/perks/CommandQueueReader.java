@@ -1,83 +1,196 @@
 package lol.peacefulhaven.perks;
 
 import com.google.gson.Gson;
-import com.google.gson.reflect.TypeToken;
+import com.google.gson.JsonSyntaxException;
 import java.io.*;
-import java.lang.reflect.Type;
+import java.nio.charset.StandardCharsets;
 import java.nio.file.Files;
+import java.nio.file.StandardCopyOption;
 import java.util.ArrayList;
 import java.util.List;
-import java.util.Map;
+import java.util.TreeMap;
 
-// Structure of the JSON command we expect
+// One record of the command journal (one NDJSON line)
 class QueuedCommand {
+    public long seq;
     public String id;
     public String command;
     public String timestamp;
 }
 
+/**
+ * Consumes the web backend's command journal: append-only NDJSON segments
+ * named commands-<first seq>.ndjson. Records after the sequence number in
+ * commands.ack are executed in order on the main thread, and the ack file is
+ * advanced only after they ran. The backend deletes segments once they are
+ * fully acked, so this reader never deletes or rewrites anything.
+ */
 public class CommandQueueReader implements Runnable {
+    private static final String SEGMENT_PREFIX = "commands-";
+    private static final String SEGMENT_SUFFIX = ".ndjson";
+    private static final String ACK_FILE = "commands.ack";
+    private static final int MAX_BATCH = 500;
+
     private final WebPerks plugin;
-    private final File queueFile;
+    private final File journalDir;
     private final Gson gson = new Gson();
-    private final Type commandListType = new TypeToken<ArrayList<QueuedCommand>>() {}.getType();
 
-    public CommandQueueReader(WebPerks plugin, File queueFile) {
+    // Last seq handed to the main thread (may be ahead of the ack while a batch is pending)
+    private volatile long dispatchedSeq = -1;
+    private long ackedSeq = -1;
+    private File currentSegment;
+    private long currentOffset;
+
+    public CommandQueueReader(WebPerks plugin, File journalDir) {
         this.plugin = plugin;
-        this.queueFile = queueFile;
+        this.journalDir = journalDir;
     }
 
     @Override
     public void run() {
-        if (!queueFile.exists() || queueFile.length() == 0) {
-            return; // File is empty or doesn't exist
+        if (!journalDir.isDirectory()) {
+            return;
+        }
+        if (dispatchedSeq < 0) {
+            dispatchedSeq = readAck();
         }
 
-        List<QueuedCommand> commandsToExecute = readAndClearQueue();
+        List<QueuedCommand> commandsToExecute = readNewRecords();
+        if (commandsToExecute.isEmpty()) {
+            return;
+        }
+        long lastSeq = commandsToExecute.get(commandsToExecute.size() - 1).seq;
+        dispatchedSeq = lastSeq;
 
-        for (QueuedCommand cmd : commandsToExecute) {
-            // Commands must be run synchronously on the main thread
-            plugin.getServer().getScheduler().runTask(plugin, () -> {
+        // Commands must be run synchronously on the main thread; one task per batch keeps them in order
+        plugin.getServer().getScheduler().runTask(plugin, () -> {
+            for (QueuedCommand cmd : commandsToExecute) {
                 try {
                     // The core logic: parse and execute the command
                     String fullCommand = parseAndExecute(cmd.command);
                     plugin.getLogger().info("Executing web command: " + fullCommand);
                     plugin.getServer().dispatchCommand(plugin.getServer().getConsoleSender(), fullCommand);
-                    
+
                 } catch (Exception e) {
                     plugin.getLogger().severe("Failed to execute command " + cmd.id + ": " + e.getMessage());
                 }
-            });
+            }
+            // Ack off the main thread; the ack is a tiny atomic file replace
+            plugin.getServer().getScheduler().runTaskAsynchronously(plugin, () -> writeAck(lastSeq));
+        });
+    }
+
+    /** Segments by first seq, oldest first. */
+    private TreeMap<Long, File> listSegments() {
+        TreeMap<Long, File> segments = new TreeMap<>();
+        File[] files = journalDir.listFiles((dir, name) -> name.startsWith(SEGMENT_PREFIX) && name.endsWith(SEGMENT_SUFFIX));
+        if (files == null) {
+            return segments;
         }
+        for (File file : files) {
+            String name = file.getName();
+            try {
+                segments.put(Long.parseLong(name.substring(SEGMENT_PREFIX.length(), name.length() - SEGMENT_SUFFIX.length())), file);
+            } catch (NumberFormatException ignored) {
+            }
+        }
+        return segments;
     }
 
-    private List<QueuedCommand> readAndClearQueue() {
+    /** Complete records after dispatchedSeq, reading each segment from where the last call stopped. */
+    private List<QueuedCommand> readNewRecords() {
         List<QueuedCommand> commands = new ArrayList<>();
-        
-        // 1. Read the file
-        try (Reader reader = Files.newBufferedReader(queueFile.toPath())) {
-            commands = gson.fromJson(reader, commandListType);
-        } catch (FileNotFoundException e) {
-            // Expected if file is deleted between checks
-            return new ArrayList<>();
+        TreeMap<Long, File> segments = listSegments();
+
+        for (var entry : segments.entrySet()) {
+            Long nextFirst = segments.higherKey(entry.getKey());
+            if (nextFirst != null && nextFirst - 1 <= dispatchedSeq) {
+                continue; // Fully consumed
+            }
+            File segment = entry.getValue();
+            if (!segment.equals(currentSegment)) {
+                currentSegment = segment;
+                currentOffset = 0;
+            }
+
+            try (RandomAccessFile file = new RandomAccessFile(segment, "r")) {
+                long length = file.length();
+                if (length <= currentOffset) {
+                    if (nextFirst == null) break;
+                    continue;
+                }
+                byte[] data = new byte[(int) (length - currentOffset)];
+                file.seek(currentOffset);
+                file.readFully(data);
+
+                int lineStart = 0;
+                for (int i = 0; i < data.length; i++) {
+                    if (data[i] != '\n') continue;
+                    // Only complete lines; a line still being written is picked up next time
+                    String line = new String(data, lineStart, i - lineStart, StandardCharsets.UTF_8);
+                    currentOffset += i + 1 - lineStart;
+                    lineStart = i + 1;
+                    QueuedCommand cmd;
+                    try {
+                        cmd = gson.fromJson(line, QueuedCommand.class);
+                    } catch (JsonSyntaxException e) {
+                        plugin.getLogger().severe("Skipping unreadable command journal line in " + segment.getName());
+                        continue;
+                    }
+                    if (cmd == null || cmd.seq <= dispatchedSeq) continue;
+                    commands.add(cmd);
+                    if (commands.size() >= MAX_BATCH) {
+                        return commands;
+                    }
+                }
+            } catch (FileNotFoundException e) {
+                // Pruned by the backend between listing and reading
+                continue;
+            } catch (IOException e) {
+                plugin.getLogger().severe("Failed to read command journal segment " + segment.getName() + ": " + e.getMessage());
+                break;
+            }
+            if (nextFirst == null) break;
+        }
+        return commands;
+    }
+
+    private long readAck() {
+        File ackFile = new File(journalDir, ACK_FILE);
+        if (!ackFile.exists()) {
+            return 0;
+        }
+        try {
+            String text = Files.readString(ackFile.toPath()).trim();
+            return text.isEmpty() ? 0 : Long.parseLong(text);
+        } catch (IOException | NumberFormatException e) {
+            plugin.getLogger().severe("Failed to read command journal ack: " + e.getMessage());
+            return 0;
+        }
+    }
+
+    private synchronized void writeAck(long seq) {
+        if (seq <= ackedSeq) {
+            return; // An ack for a later batch already went out
+        }
+        File ackFile = new File(journalDir, ACK_FILE);
+        File tempFile = new File(journalDir, ACK_FILE + ".tmp");
+        try (FileOutputStream out = new FileOutputStream(tempFile)) {
+            out.write((seq + "\n").getBytes(StandardCharsets.UTF_8));
+            out.getFD().sync();
         } catch (IOException e) {
-             plugin.getLogger().severe("Failed to read command queue file: " + e.getMessage());
-             return new ArrayList<>();
-        } catch (Exception e) {
-             plugin.getLogger().severe("Failed to deserialize command queue: " + e.getMessage());
-             return new ArrayList<>();
+            plugin.getLogger().severe("Failed to write command journal ack: " + e.getMessage());
+            return;
         }
-        
-        // 2. Clear the file (Atomic write/delete is crucial)
         try {
-             Files.delete(queueFile.toPath());
+            Files.move(tempFile.toPath(), ackFile.toPath(), StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE);
         } catch (IOException e) {
-             plugin.getLogger().severe("Failed to clear command queue file after reading: " + e.getMessage());
+            plugin.getLogger().severe("Failed to replace command journal ack: " + e.getMessage());
+            return;
         }
-
-        return commands != null ? commands : new ArrayList<>();
+        ackedSeq = seq;
     }
-    
+
     // This function ensures the command format is simple and secure
     private String parseAndExecute(String command) {
         // We know the format is: webperks grant_rank {player} {rank} {duration}
@@ -86,7 +199,7 @@ public class CommandQueueReader implements Runnable {
             // Should never happen, but is a critical safety check
             throw new IllegalArgumentException("Invalid command format.");
         }
-        
+
         // We strip the "webperks " prefix so the dispatchCommand works
         return command.substring(command.indexOf(" ") + 1);
     }
@@ -3,7 +3,12 @@ package lol.peacefulhaven.perks;
 import com.google.gson.Gson;
 import com.nisovin.shopkeepers.api.ShopkeepersAPI;
 import com.nisovin.shopkeepers.api.shopkeeper.Shopkeeper;
+import com.nisovin.shopkeepers.api.shopkeeper.offers.PriceOffer;
+import com.nisovin.shopkeepers.api.shopkeeper.offers.TradeOffer;
 import com.nisovin.shopkeepers.api.shopkeeper.player.PlayerShopkeeper;
+import com.nisovin.shopkeepers.api.shopkeeper.player.sell.SellingPlayerShopkeeper;
+import com.nisovin.shopkeepers.api.shopkeeper.player.trade.TradingPlayerShopkeeper;
+import com.nisovin.shopkeepers.api.util.UnmodifiableItemStack;
 import org.bukkit.block.Block;
 import org.bukkit.block.Container;
 import org.bukkit.inventory.Inventory;
@@ -15,15 +20,15 @@ import java.util.*;
 import java.util.Map;
 import java.util.LinkedHashMap;
 
-// Structure for the JSON file - now tracks by item type instead of trade index
+// Structure for the JSON file - one entry per shop offer
 class StockData {
     String shop_uuid;
-    String item_type;      // e.g., "minecraft:elytra"
+    String trade_id;       // the offer's key in save.yml ("1", "2", ...)
     int stock_remaining;
 
-    public StockData(String shop_uuid, String item_type, int stock_remaining) {
+    public StockData(String shop_uuid, String trade_id, int stock_remaining) {
         this.shop_uuid = shop_uuid;
-        this.item_type = item_type;
+        this.trade_id = trade_id;
         this.stock_remaining = stock_remaining;
     }
 }
@@ -71,17 +76,13 @@ public class StockUpdater implements Runnable {
                 
                 Container container = (Container) containerBlock.getState();
                 Inventory inventory = container.getInventory();
+                String shopUuid = playerShopkeeper.getUniqueId().toString();  // Use shop UUID, not owner UUID
                 
-                // Count items in the inventory grouped by item type
-                Map<String, Integer> itemCounts = countItemsInInventory(inventory);
-                
-                // Add each unique item to the stock list
-                for (Map.Entry<String, Integer> entry : itemCounts.entrySet()) {
-                    allStock.add(new StockData(
-                        playerShopkeeper.getUniqueId().toString(),  // Use shop UUID, not owner UUID
-                        entry.getKey(),
-                        entry.getValue()
-                    ));
+                // One entry per offer, in save.yml order: save.yml keys offers by their 1-based position
+                List<UnmodifiableItemStack> offeredItems = getOfferedItems(playerShopkeeper);
+                for (int i = 0; i < offeredItems.size(); i++) {
+                    ItemStack offered = offeredItems.get(i).copy();
+                    allStock.add(new StockData(shopUuid, String.valueOf(i + 1), countSimilarItems(inventory, offered)));
                 }
             } catch (IllegalStateException e) {
                 // World is unloaded or block entity is not available
@@ -91,37 +92,53 @@ public class StockUpdater implements Runnable {
         
         // 4. Write the JSON file
         writeJsonFile(allStock);
-        plugin.getLogger().info("Live shop stock update complete. Wrote " + allStock.size() + " item entries.");
+        plugin.getLogger().info("Live shop stock update complete. Wrote " + allStock.size() + " offer entries.");
     }
     
     /**
-     * Counts unique item types in an inventory and their quantities.
-     * Returns a map where keys are item type names and values are total quantities.
+     * The item each offer hands to the customer, in the order of the shop's offers (the same
+     * order as in save.yml). Unlike getTradingRecipes(), this includes offers the container
+     * is currently out of stock for. Only selling and trading shops sell items from their
+     * container; buying shops pay out currency, so they (and book shops) get no entries.
+     */
+    private List<UnmodifiableItemStack> getOfferedItems(PlayerShopkeeper shopkeeper) {
+        List<UnmodifiableItemStack> items = new ArrayList<>();
+        if (shopkeeper instanceof SellingPlayerShopkeeper) {
+            for (PriceOffer offer : ((SellingPlayerShopkeeper) shopkeeper).getOffers()) {
+                items.add(offer.getItem());
+            }
+        } else if (shopkeeper instanceof TradingPlayerShopkeeper) {
+            for (TradeOffer offer : ((TradingPlayerShopkeeper) shopkeeper).getOffers()) {
+                items.add(offer.getResultItem());
+            }
+        }
+        return items;
+    }
+
+    /**
+     * Counts the items in an inventory that stack with the given item (same type and meta).
      */
-    private Map<String, Integer> countItemsInInventory(Inventory inventory) {
-        Map<String, Integer> itemCounts = new LinkedHashMap<>();
+    private int countSimilarItems(Inventory inventory, ItemStack target) {
+        int count = 0;
         
         for (ItemStack item : inventory.getContents()) {
-            if (item != null && item.getAmount() > 0) {
-                String itemType = item.getType().name().toLowerCase();
-                // Convert to minecraft: format for consistency
-                String itemKey = "minecraft:" + itemType;
-                itemCounts.put(itemKey, itemCounts.getOrDefault(itemKey, 0) + item.getAmount());
+            if (item != null && item.getAmount() > 0 && item.isSimilar(target)) {
+                count += item.getAmount();
             }
         }
         
-        return itemCounts;
+        return count;
     }
 
     /**
      * Atomically writes the list of StockData objects to the JSON file.
-     * Deduplicates entries to ensure only the latest stock count is kept per shop-item combo.
+     * Deduplicates entries to ensure only the latest stock count is kept per shop offer.
      */
     private void writeJsonFile(List<StockData> data) {
-        // Deduplicate: keep only the last entry for each shop-item combo
+        // Deduplicate: keep only the last entry for each shop offer
         Map<String, StockData> deduped = new LinkedHashMap<>();
         for (StockData item : data) {
-            String key = item.shop_uuid + "-" + item.item_type;
+            String key = item.shop_uuid + "-" + item.trade_id;
             deduped.put(key, item);  // Last write wins
         }
         
@@ -6,7 +6,7 @@ import java.io.File;
 public class WebPerks extends JavaPlugin {
 
     // File objects for the bridge
-    private File commandQueueFile;
+    private File commandJournalDir;
     private File stockDataFile;
 
     @Override
@@ -15,7 +15,7 @@ public class WebPerks extends JavaPlugin {
         getLogger().info("Peaceful Haven WebPerks is starting up...");
         
         // 2. Define bridge file paths (Assuming plugin data folder is the bridge)
-        commandQueueFile = new File(getDataFolder(), "command_queue.json");
+        commandJournalDir = new File(getDataFolder(), "command_journal");
         stockDataFile = new File(getDataFolder(), "shop_stock.json");
 
         // 3. Setup Command Executor
@@ -24,7 +24,7 @@ public class WebPerks extends JavaPlugin {
         // 4. Start Scheduler for Command Queue
         // Runs every 20 ticks (1 second) in an async thread to avoid blocking the server
         getServer().getScheduler().runTaskTimerAsynchronously(this, 
-            new CommandQueueReader(this, commandQueueFile), 20L, 20L);
+            new CommandQueueReader(this, commandJournalDir), 20L, 20L);
 
         // 5. Start Scheduler for Stock Update
         // Runs every 6000 ticks (5 minutes) - SYNCHRONOUSLY because we need to access block data